@@ -0,0 +1,96 @@
+# benchmarks/bench_agenda.py
+"""Benchmark de la agenda en memoria con 100.000 turnos.
+
+Uso: python benchmarks/bench_agenda.py [cantidad_turnos]
+
+No necesita la base: genera turnos sintéticos (semilla fija) para 40
+doctores en el horizonte configurado y mide la carga, las consultas de
+disponibilidad, la búsqueda de huecos libres y las altas/bajas.
+"""
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from utils.agenda import Agenda  # noqa: E402
+
+DOCTORES = 40
+HORARIO = {dia: ("08:00", "20:00") for dia in range(6)}
+
+
+def generar_turnos(cantidad, desde, dias, semilla=42):
+    """Filas (id_turno, id_doctor, fecha, hora) sin superposiciones por doctor"""
+    rnd = random.Random(semilla)
+    slots_por_dia = 24  # 08:00 a 20:00 cada 30 minutos
+    ocupados = set()
+    filas = []
+    while len(filas) < cantidad:
+        id_doctor = rnd.randint(1, DOCTORES)
+        fecha = desde + timedelta(days=rnd.randrange(dias))
+        if fecha.weekday() == 6:
+            continue
+        slot = rnd.randrange(slots_por_dia)
+        if (id_doctor, fecha, slot) in ocupados:
+            continue
+        ocupados.add((id_doctor, fecha, slot))
+        hora = timedelta(hours=8, minutes=30 * slot)  # TIME llega como timedelta
+        filas.append((len(filas) + 1, id_doctor, fecha, hora))
+    return filas
+
+
+def medir(nombre, repeticiones, func):
+    inicio = time.perf_counter()
+    for i in range(repeticiones):
+        func(i)
+    total = time.perf_counter() - inicio
+    print(f"{nombre:<32} {repeticiones:>7} ops  {total * 1e6 / repeticiones:>9.2f} µs/op")
+
+
+def main():
+    cantidad = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    hoy = date.today()
+    # Con 40 doctores y 24 turnos por día, 100k turnos necesitan ~120 días
+    dias = max(60, cantidad // (DOCTORES * 20) + 1)
+    agenda = Agenda(duracion=30, horario=HORARIO, horizonte_dias=dias)
+    desde, hasta = agenda.rango(hoy)
+
+    filas = generar_turnos(cantidad, desde, dias)
+    inicio = time.perf_counter()
+    agenda.cargar(filas, desde, hasta)
+    print(f"Carga de {len(agenda)} turnos: {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    rnd = random.Random(7)
+    consultas = [
+        (
+            rnd.randint(1, DOCTORES),
+            desde + timedelta(days=rnd.randrange(dias)),
+            f"{rnd.randint(8, 19):02d}:{rnd.choice(('00', '30'))}",
+        )
+        for _ in range(10_000)
+    ]
+    medir("esta_libre", len(consultas), lambda i: agenda.esta_libre(*consultas[i]))
+
+    momentos = [
+        datetime.combine(desde + timedelta(days=rnd.randrange(dias - 7)), datetime.min.time())
+        for _ in range(2_000)
+    ]
+    medir(
+        "proximos_libres (5)",
+        len(momentos),
+        lambda i: agenda.proximos_libres(rnd.randint(1, DOCTORES), momentos[i], 5),
+    )
+
+    base = cantidad + 1
+    medir(
+        "agregar",
+        5_000,
+        lambda i: agenda.agregar(base + i, *consultas[i]),
+    )
+    medir("quitar", 5_000, lambda i: agenda.quitar(base + i))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/bench_arranque.py
+"""Benchmark de arranque en frío: tiempo hasta que aparece la ventana de login.
+
+Uso: python benchmarks/bench_arranque.py [--repeticiones N]
+         [--presupuesto SEGUNDOS] [--ejecutable RUTA]
+
+Lanza la aplicación N veces con --medir-arranque (se cierra apenas la
+ventana de login está en pantalla, sin conectarse a la base) y mide el
+tiempo de reloj desde que se crea el proceso. Con --ejecutable se mide el
+.exe generado con PyInstaller en lugar de main.py. Termina con código 1 si
+la mediana supera el presupuesto (ARRANQUE_PRESUPUESTO en config.py).
+Necesita un entorno gráfico.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(RAIZ)
+
+try:
+    from config.config import ARRANQUE_PRESUPUESTO
+except ImportError:
+    ARRANQUE_PRESUPUESTO = 3.0
+
+
+def medir_una_vez(comando):
+    """(segundos hasta la ventana según el reloj externo, según la aplicación)"""
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(
+        comando, cwd=RAIZ, stdout=subprocess.PIPE, text=True, encoding="utf-8", errors="replace"
+    )
+    try:
+        for linea in proceso.stdout:
+            if linea.startswith("ventana_login"):
+                return time.perf_counter() - inicio, float(linea.split()[1])
+    finally:
+        proceso.stdout.close()
+        proceso.wait()
+    raise RuntimeError(
+        f"La aplicación terminó sin mostrar la ventana (código {proceso.returncode})"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--presupuesto", type=float, default=ARRANQUE_PRESUPUESTO)
+    parser.add_argument("--ejecutable")
+    args = parser.parse_args()
+
+    if args.ejecutable:
+        comando = [args.ejecutable, "--medir-arranque"]
+    else:
+        comando = [sys.executable, os.path.join(RAIZ, "main.py"), "--medir-arranque"]
+
+    totales = []
+    for i in range(args.repeticiones):
+        total, interno = medir_una_vez(comando)
+        totales.append(total)
+        print(
+            f"Arranque {i + 1}: {total * 1000:>7.0f} ms  "
+            f"(dentro de main.py: {interno * 1000:.0f} ms)"
+        )
+
+    mediana = statistics.median(totales)
+    print(
+        f"Mediana {mediana * 1000:.0f} ms, máximo {max(totales) * 1000:.0f} ms, "
+        f"presupuesto {args.presupuesto * 1000:.0f} ms"
+    )
+    if mediana > args.presupuesto:
+        print("❌ El arranque supera el presupuesto")
+        sys.exit(1)
+    print("✅ Dentro del presupuesto")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,750 @@
+# benchmarks/bench_queries.py
+"""Benchmark de todos los métodos de *Queries sobre datos sintéticos.
+
+Uso: python benchmarks/bench_queries.py [--escala 10k|100k|1M] [--repeticiones N]
+         [--solo TEXTO] [--sqlite ARCHIVO] [--mysql BASE] [--conservar]
+         [--json SALIDA] [--comparar BASE.json] [--tolerancia 0.25]
+
+Sin interfaz gráfica: genera una clínica con datos_sinteticos.py (o usa una
+base SQLite ya generada, que se copia para no modificarla) y llama a cada
+método público de los *Queries con ids y textos elegidos al azar con
+semilla fija. Informa operaciones por segundo y latencia p50/p95/p99 de
+cada escenario; al final lista los métodos que no tienen escenario.
+
+Por defecto corre sobre el reemplazo en SQLite (sqlite_standin.py), que
+sirve para comparar una versión del código con otra pero no da los
+tiempos de MySQL. Con --mysql BASE se crea esa base en el servidor de
+config.py, se llena y se borra al terminar (salvo con --conservar); nunca
+se usa la base de la aplicación.
+
+Con --comparar se compara contra un JSON guardado antes con --json y se
+sale con código 1 si algún escenario empeoró su p50 más que la tolerancia.
+"""
+import argparse
+import contextlib
+import inspect
+import io
+import itertools
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from database import queries  # noqa: E402
+from database.cache import lookup_cache  # noqa: E402
+from database.metricas import metricas, percentil  # noqa: E402
+from database.queries import (  # noqa: E402
+    ConsultaMedicaQueries,
+    DoctoresQueries,
+    EstudioMedicoQueries,
+    FacturacionQueries,
+    FichaMedicaQueries,
+    LoginQueries,
+    PacientesQueries,
+    RecetaMedicaQueries,
+    ReportesQueries,
+    TurnosQueries,
+    UsuariosQueries,
+    agenda,
+    indice_doctores,
+    indice_pacientes,
+    turnos_sin_facturar,
+)
+from datos_sinteticos import (  # noqa: E402
+    APELLIDOS,
+    ESCALAS,
+    PASSWORD,
+    SLOTS_POR_DIA,
+    ClinicaSintetica,
+    dias_habiles,
+)
+from sqlite_standin import PoolSQLite  # noqa: E402
+
+# Diferencia mínima de p50 (ms) para considerar una regresión: debajo es ruido
+MINIMO_REGRESION_MS = 0.05
+BULK = 20  # filas por llamada en los insertar_* masivos
+
+Escenario = namedtuple("Escenario", ["nombre", "func", "preparar", "pesado"])
+
+
+def abrir_mysql(base):
+    """Crear la base de benchmark en el servidor de config.py y abrir un pool hacia ella"""
+    import mysql.connector
+
+    from config.config import DB_HOST, DB_NAME, DB_PASSWORD, DB_USER
+    from database.connection import DatabaseConnection
+
+    if base == DB_NAME:
+        raise SystemExit(f"❌ {base} es la base de la aplicación: usar otra para medir")
+
+    class PoolBenchmark(DatabaseConnection):
+        def _new_connection(self):
+            return mysql.connector.connect(
+                host=DB_HOST,
+                database=base,
+                user=DB_USER,
+                password=DB_PASSWORD,
+                auth_plugin="mysql_native_password",
+            )
+
+    conn = mysql.connector.connect(
+        host=DB_HOST, user=DB_USER, password=DB_PASSWORD, auth_plugin="mysql_native_password"
+    )
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{base}`")
+        cursor.close()
+    finally:
+        conn.close()
+    db = PoolBenchmark().connect()
+    if db is None:
+        raise SystemExit(1)
+    return db
+
+
+def borrar_mysql(base):
+    import mysql.connector
+
+    from config.config import DB_HOST, DB_PASSWORD, DB_USER
+
+    conn = mysql.connector.connect(
+        host=DB_HOST, user=DB_USER, password=DB_PASSWORD, auth_plugin="mysql_native_password"
+    )
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"DROP DATABASE IF EXISTS `{base}`")
+        cursor.close()
+    finally:
+        conn.close()
+
+
+def metodos_publicos():
+    """'Clase.metodo' de todos los métodos de instancia públicos de *Queries"""
+    return {
+        f"{nombre}.{metodo}"
+        for nombre, cls in vars(queries).items()
+        if nombre.endswith("Queries") and inspect.isclass(cls)
+        for metodo, valor in vars(cls).items()
+        if not metodo.startswith("_") and inspect.isfunction(valor)
+    }
+
+
+def agotar(stream):
+    """Leer completo un stream de exportar_* (ver DatabaseConnection.stream)"""
+    with stream as (_, bloques):
+        return sum(len(bloque) for bloque in bloques)
+
+
+class BenchQueries:
+    """Escenarios sobre una base ya cargada con ClinicaSintetica.
+
+    Los escenarios que escriben usan horarios y turnos que los datos
+    generados dejan libres, y los que modifican o borran trabajan sobre las
+    filas que crearon los anteriores, así la base queda casi igual.
+    """
+
+    def __init__(self, db, clinica, semilla=7):
+        self.db = db
+        self.clinica = clinica
+        self.rnd = random.Random(semilla)
+        self.nuevos = {}  # entidad -> ids creados por los escenarios de alta
+
+        self.pacientes = PacientesQueries(db)
+        self.turnos = TurnosQueries(db)
+        self.doctores = DoctoresQueries(db)
+        self.login = LoginQueries(db)
+        self.usuarios = UsuariosQueries(db)
+        self.facturacion = FacturacionQueries(db)
+        self.reportes = ReportesQueries(db)
+        self.fichas = FichaMedicaQueries(db)
+        self.consultas = ConsultaMedicaQueries(db)
+        self.recetas = RecetaMedicaQueries(db)
+        self.estudios = EstudioMedicoQueries(db)
+
+        with db.cursor() as cursor:
+            self.maximos = {}
+            for tabla, clave in (
+                ("Paciente", "id_paciente"),
+                ("Turno", "id_turno"),
+                ("Facturacion", "id_factura"),
+                ("FichaMedica", "id_ficha_medica"),
+                ("ConsultaMedica", "id_consulta"),
+                ("RecetaMedica", "id_receta"),
+                ("EstudioMedico", "id_estudio"),
+            ):
+                cursor.execute(f"SELECT MAX({clave}) FROM {tabla}")
+                self.maximos[tabla] = cursor.fetchone()[0] or 1
+            # Turnos futuros, todavía sin factura, para las altas de facturas
+            cursor.execute(
+                "SELECT id_turno FROM Turno WHERE fecha >= %s ORDER BY id_turno LIMIT %s",
+                (clinica.hoy, 20_000),
+            )
+            self.sin_factura = iter([fila[0] for fila in cursor.fetchall()])
+            cursor.execute("SELECT fecha FROM Turno ORDER BY fecha DESC LIMIT 1")
+            self.ultimo_dia = cursor.fetchone()[0]
+            cursor.execute(
+                "SELECT apellido, nombre, id_paciente FROM Paciente WHERE id_paciente <= %s",
+                (2000,),
+            )
+            self.claves_pacientes = [tuple(fila) for fila in cursor.fetchall()]
+
+        # Horarios libres: lunes a viernes a partir de un mes después de los datos
+        inicio = clinica.dias[-1] + timedelta(days=30)
+        self.dias_libres = dias_habiles(inicio, 800)[400:]
+        self.slots_libres = itertools.count()
+        # Las series empiezan un lunes, más adelante que todo lo anterior
+        ultimo = self.dias_libres[-1]
+        self.lunes_series = ultimo + timedelta(days=7 - ultimo.weekday())
+        self.series_creadas = itertools.count()
+        self.usuarios_creados = itertools.count()
+
+    # ----------------------- Datos al azar -----------------------
+    def id_al_azar(self, tabla):
+        return self.rnd.randint(1, self.maximos[tabla])
+
+    def doctor_al_azar(self):
+        return self.rnd.randint(1, self.clinica.doctores)
+
+    def prefijo_apellido(self):
+        return self.rnd.choice(APELLIDOS)[:3]
+
+    def dia_pasado(self):
+        return self.rnd.choice(self.clinica.dias[: len(self.clinica.dias) // 2])
+
+    def horario_libre(self):
+        """(id_doctor, fecha, hora) que ningún turno ocupa"""
+        k = next(self.slots_libres)
+        doctores = self.clinica.doctores
+        slot = (k // doctores) % SLOTS_POR_DIA
+        fecha = self.dias_libres[k // (doctores * SLOTS_POR_DIA)]
+        return 1 + k % doctores, fecha, timedelta(hours=8, minutes=30 * slot)
+
+    def turno_libre(self):
+        id_doctor, fecha, hora = self.horario_libre()
+        return (self.rnd.randint(1, self.clinica.pacientes), id_doctor, fecha, hora, "Bench", False)
+
+    def serie_libre(self):
+        """Primer turno de una serie semanal de 4 que no se pisa con otra"""
+        k = next(self.series_creadas)
+        doctores = self.clinica.doctores
+        slot = (k // doctores) % SLOTS_POR_DIA
+        lunes = self.lunes_series + timedelta(weeks=4 * (k // (doctores * SLOTS_POR_DIA)))
+        hora = timedelta(hours=8, minutes=30 * slot)
+        id_paciente = self.rnd.randint(1, self.clinica.pacientes)
+        return (id_paciente, 1 + k % doctores, lunes, hora, "Serie", False)
+
+    def persona(self, dni):
+        return (dni, self.rnd.choice(APELLIDOS), "Bench", "1100000000", "bench@correo.com")
+
+    def guardar(self, entidad, id_nuevo):
+        self.nuevos.setdefault(entidad, []).append(id_nuevo)
+        return id_nuevo
+
+    def creado(self, entidad, i):
+        return self.nuevos[entidad][i]
+
+    def sacar(self, entidad):
+        return self.nuevos[entidad].pop()
+
+    # ----------------------- Escenarios -----------------------
+    def escenarios(self):
+        p, t, d, u = self.pacientes, self.turnos, self.doctores, self.usuarios
+        f, r, fm = self.facturacion, self.reportes, self.fichas
+        c, rc, e = self.consultas, self.recetas, self.estudios
+        hoy = self.clinica.hoy
+        desde, hasta = self.clinica.dias[0], self.clinica.dias[-1]
+        dias_futuros = [dia for dia in self.clinica.dias if hoy <= dia <= self.ultimo_dia]
+
+        def sin_cache(*nombres):
+            return lambda i: lookup_cache.invalidate(*nombres)
+
+        def semana(i):
+            dia = self.dia_pasado()
+            return dia, dia + timedelta(days=6)
+
+        def turno_insertado(i):
+            return self.guardar("turno", t.insertar_turno(self.turno_libre()))
+
+        def reservar(i):
+            reserva = t.reservar_turno(self.turno_libre())
+            if not reserva.ok:
+                raise RuntimeError(reserva.mensaje)
+
+        def crear_serie(i):
+            datos = self.serie_libre()
+            resultado = t.crear_serie(datos, "semanal", 1, cantidad=4)
+            if not resultado.ok:
+                raise RuntimeError(resultado.mensaje)
+            self.guardar("serie", (resultado.id_serie, datos[1], datos[3]))
+
+        def modificar_serie(i):
+            id_serie, id_doctor, hora = self.creado("serie", i)
+            t.modificar_serie(id_serie, id_doctor, hora, "Serie modificada", True)
+
+        def facturar_lote(i):
+            dia = dias_futuros[-1 - i % len(dias_futuros)]
+            resumen = f.facturar_lote(dia, dia)
+            self.guardar("corrida", resumen["id_corrida"])
+
+        def factura(i):
+            return (next(self.sin_factura), hoy, Decimal("12000.00"), "Bench", False)
+
+        def factura_insertada(i):
+            datos = factura(i)
+            return self.guardar("factura", (f.insertar_factura(datos), datos[0]))
+
+        return [
+            # Pacientes
+            Escenario("PacientesQueries.obtener_pacientes_para_combo",
+                      lambda i: p.obtener_pacientes_para_combo(), sin_cache("pacientes"), True),
+            Escenario("PacientesQueries.obtener_pacientes (primera página)",
+                      lambda i: p.obtener_pacientes(limit=100), None, False),
+            Escenario("PacientesQueries.obtener_pacientes (página siguiente)",
+                      lambda i: p.obtener_pacientes(
+                          limit=100, after=self.rnd.choice(self.claves_pacientes)
+                      ), None, False),
+            Escenario("PacientesQueries.exportar_pacientes",
+                      lambda i: agotar(p.exportar_pacientes()), None, True),
+            Escenario("PacientesQueries.obtener_paciente_por_id",
+                      lambda i: p.obtener_paciente_por_id(self.id_al_azar("Paciente")),
+                      None, False),
+            Escenario("PacientesQueries.buscar_paciente_por_dni",
+                      lambda i: p.buscar_paciente_por_dni(
+                          str(20_000_000 + self.id_al_azar("Paciente"))[:6]
+                      ), None, False),
+            Escenario("PacientesQueries.buscar_paciente_por_apellido",
+                      lambda i: p.buscar_paciente_por_apellido(self.prefijo_apellido()),
+                      None, False),
+            Escenario("PacientesQueries.obtener_indice", lambda i: p.obtener_indice(),
+                      lambda i: indice_pacientes.invalidar(), True),
+            Escenario("PacientesQueries.buscar_para_selector",
+                      lambda i: p.buscar_para_selector(self.prefijo_apellido()), None, False),
+            Escenario("PacientesQueries.refrescar_indice",
+                      lambda i: p.refrescar_indice(self.id_al_azar("Paciente")), None, False),
+            Escenario("PacientesQueries.obtener_dnis", lambda i: p.obtener_dnis(), None, True),
+            Escenario("PacientesQueries.obtener_obras_sociales",
+                      lambda i: p.obtener_obras_sociales(), sin_cache("obras_sociales"), False),
+            Escenario("PacientesQueries.insertar_paciente",
+                      lambda i: self.guardar("paciente", p.insertar_paciente(
+                          (*self.persona(f"9{i:07d}"), date(1980, 1, 1), "Bench 1", None)
+                      )), None, False),
+            Escenario("PacientesQueries.insertar_pacientes",
+                      lambda i: p.insertar_pacientes([
+                          (*self.persona(f"8{i:04d}{j:03d}"), date(1980, 1, 1), "Bench", None)
+                          for j in range(BULK)
+                      ]), None, True),
+            Escenario("PacientesQueries.actualizar_paciente",
+                      lambda i: p.actualizar_paciente(self.creado("paciente", i), (
+                          *self.persona(f"7{i:07d}"), date(1981, 2, 2), "Bench 2", 1
+                      )), None, False),
+            Escenario("PacientesQueries.eliminar_paciente",
+                      lambda i: p.eliminar_paciente(self.sacar("paciente")), None, False),
+            Escenario("PacientesQueries.insertar_obras_sociales",
+                      lambda i: p.insertar_obras_sociales(
+                          [(f"Bench {i}", None, None, None)]
+                      ), None, True),
+            # Turnos
+            Escenario("TurnosQueries.obtener_turnos (una semana)",
+                      lambda i: t.obtener_turnos(*semana(i), limit=100), None, False),
+            Escenario("TurnosQueries.obtener_turnos_proximos",
+                      lambda i: t.obtener_turnos_proximos(limit=100), None, False),
+            Escenario("TurnosQueries.exportar_turnos (una semana)",
+                      lambda i: agotar(t.exportar_turnos(*semana(i))), None, False),
+            Escenario("TurnosQueries.exportar_turnos_proximos",
+                      lambda i: agotar(t.exportar_turnos_proximos()), None, True),
+            Escenario("TurnosQueries.obtener_turno_por_id",
+                      lambda i: t.obtener_turno_por_id(self.id_al_azar("Turno")), None, False),
+            Escenario("TurnosQueries.obtener_agenda", lambda i: t.obtener_agenda(),
+                      lambda i: agenda.invalidar(), True),
+            Escenario("TurnosQueries.refrescar_indice",
+                      lambda i: t.refrescar_indice(self.id_al_azar("Turno")), None, False),
+            Escenario("TurnosQueries.verificar_disponibilidad",
+                      lambda i: t.verificar_disponibilidad(
+                          self.doctor_al_azar(), self.dia_pasado(),
+                          timedelta(hours=8, minutes=30 * self.rnd.randrange(SLOTS_POR_DIA)),
+                      ), None, False),
+            Escenario("TurnosQueries.proximos_turnos_libres",
+                      lambda i: t.proximos_turnos_libres(
+                          self.doctor_al_azar(), datetime.combine(hoy, datetime.min.time())
+                      ), None, False),
+            Escenario("TurnosQueries.insertar_turno", turno_insertado, None, False),
+            Escenario("TurnosQueries.insertar_turnos",
+                      lambda i: t.insertar_turnos([self.turno_libre() for _ in range(BULK)]),
+                      None, True),
+            Escenario("TurnosQueries.actualizar_turno",
+                      lambda i: t.actualizar_turno(self.creado("turno", i), self.turno_libre()),
+                      None, False),
+            Escenario("TurnosQueries.eliminar_turno",
+                      lambda i: t.eliminar_turno(self.sacar("turno")), None, False),
+            Escenario("TurnosQueries.reservar_turno", reservar, None, False),
+            Escenario("TurnosQueries.crear_serie", crear_serie, None, False),
+            Escenario("TurnosQueries.modificar_serie", modificar_serie, None, False),
+            Escenario("TurnosQueries.cancelar_serie",
+                      lambda i: t.cancelar_serie(self.sacar("serie")[0]), None, False),
+            # Doctores
+            Escenario("DoctoresQueries.obtener_doctores_para_combo",
+                      lambda i: d.obtener_doctores_para_combo(), sin_cache("doctores"), False),
+            Escenario("DoctoresQueries.obtener_doctores", lambda i: d.obtener_doctores(),
+                      None, False),
+            Escenario("DoctoresQueries.obtener_doctor_por_id",
+                      lambda i: d.obtener_doctor_por_id(self.doctor_al_azar()), None, False),
+            Escenario("DoctoresQueries.buscar_doctor_por_dni",
+                      lambda i: d.buscar_doctor_por_dni(str(10_000_000 + self.doctor_al_azar())),
+                      None, False),
+            Escenario("DoctoresQueries.buscar_doctor_por_apellido",
+                      lambda i: d.buscar_doctor_por_apellido(self.prefijo_apellido()),
+                      None, False),
+            Escenario("DoctoresQueries.obtener_indice", lambda i: d.obtener_indice(),
+                      lambda i: indice_doctores.invalidar(), False),
+            Escenario("DoctoresQueries.buscar_para_selector",
+                      lambda i: d.buscar_para_selector(self.prefijo_apellido()), None, False),
+            Escenario("DoctoresQueries.refrescar_indice",
+                      lambda i: d.refrescar_indice(self.doctor_al_azar()), None, False),
+            Escenario("DoctoresQueries.insertar_doctor",
+                      lambda i: self.guardar("doctor", d.insertar_doctor(
+                          (f"9{i:07d}", f"B{i}", "Bench", "Doctor", None, None, "Cardiología")
+                      )), None, False),
+            Escenario("DoctoresQueries.actualizar_doctor",
+                      lambda i: d.actualizar_doctor(self.creado("doctor", i), (
+                          f"8{i:07d}", f"C{i}", "Bench", "Doctora", None, None, "Cardiología"
+                      )), None, False),
+            Escenario("DoctoresQueries.eliminar_doctor",
+                      lambda i: d.eliminar_doctor(self.sacar("doctor")), None, False),
+            # Login y usuarios
+            Escenario("LoginQueries.verificar_usuario",
+                      lambda i: self.login.verificar_usuario("admin", PASSWORD), None, False),
+            Escenario("LoginQueries.obtener_roles", lambda i: self.login.obtener_roles(),
+                      sin_cache("roles"), False),
+            Escenario("UsuariosQueries.obtener_usuarios", lambda i: u.obtener_usuarios(),
+                      None, False),
+            Escenario("UsuariosQueries.buscar_usuarios",
+                      lambda i: u.buscar_usuarios("doctor1"), None, False),
+            Escenario("UsuariosQueries.obtener_usuario_por_id",
+                      lambda i: u.obtener_usuario_por_id(1 + i % 10), None, False),
+            Escenario("UsuariosQueries.verificar_nombre_usuario",
+                      lambda i: u.verificar_nombre_usuario(f"doctor{i}", exclude_id=1),
+                      None, False),
+            Escenario("UsuariosQueries.obtener_roles", lambda i: u.obtener_roles(),
+                      sin_cache("roles"), False),
+            Escenario("UsuariosQueries.obtener_doctores_para_combo",
+                      lambda i: u.obtener_doctores_para_combo(), sin_cache("doctores"), False),
+            Escenario("UsuariosQueries.insertar_usuario",
+                      lambda i: self.guardar("usuario", u.insertar_usuario(
+                          (f"bench{next(self.usuarios_creados)}", PASSWORD, 3, None)
+                      )), None, False),
+            Escenario("UsuariosQueries.actualizar_usuario",
+                      lambda i: u.actualizar_usuario(
+                          self.creado("usuario", i), (f"bench_{i}", 3, None)
+                      ), None, False),
+            Escenario("UsuariosQueries.actualizar_contrasena",
+                      lambda i: u.actualizar_contrasena(self.creado("usuario", i), "otra"),
+                      None, False),
+            Escenario("UsuariosQueries.eliminar_usuario",
+                      lambda i: u.eliminar_usuario(self.sacar("usuario")), None, False),
+            # Facturación
+            Escenario("FacturacionQueries.obtener_facturas (primera página)",
+                      lambda i: f.obtener_facturas(limit=100), None, False),
+            Escenario("FacturacionQueries.obtener_facturas (impagas de un doctor)",
+                      lambda i: f.obtener_facturas(
+                          desde, hasta, False, None, self.doctor_al_azar(), limit=100
+                      ), None, False),
+            Escenario("FacturacionQueries.exportar_facturas (una semana)",
+                      lambda i: agotar(f.exportar_facturas(*semana(i))), None, False),
+            Escenario("FacturacionQueries.obtener_factura_por_id",
+                      lambda i: f.obtener_factura_por_id(self.id_al_azar("Facturacion")),
+                      None, False),
+            Escenario("FacturacionQueries.obtener_turnos_sin_facturar",
+                      lambda i: f.obtener_turnos_sin_facturar(),
+                      lambda i: turnos_sin_facturar.invalidar(), True),
+            Escenario("FacturacionQueries.obtener_turnos_sin_facturar (sin cache, una semana)",
+                      lambda i: f.obtener_turnos_sin_facturar(*semana(i), usar_cache=False),
+                      None, False),
+            Escenario("FacturacionQueries.obtener_tarifas", lambda i: f.obtener_tarifas(),
+                      None, False),
+            Escenario("FacturacionQueries.insertar_tarifa",
+                      lambda i: self.guardar("tarifa", f.insertar_tarifa(
+                          (None, "bench", Decimal("1.00"), hoy)
+                      )), None, False),
+            Escenario("FacturacionQueries.eliminar_tarifa",
+                      lambda i: f.eliminar_tarifa(self.sacar("tarifa")), None, False),
+            Escenario("FacturacionQueries.insertar_factura",
+                      factura_insertada, None, False),
+            Escenario("FacturacionQueries.actualizar_factura",
+                      lambda i: f.actualizar_factura(self.creado("factura", i)[0], (
+                          self.creado("factura", i)[1], hoy, Decimal("13000.00"), "Bench", False
+                      )), None, False),
+            Escenario("FacturacionQueries.marcar_como_pagada",
+                      lambda i: f.marcar_como_pagada(self.creado("factura", i)[0]), None, False),
+            Escenario("FacturacionQueries.marcar_como_pagadas",
+                      lambda i: f.marcar_como_pagadas([
+                          self.id_al_azar("Facturacion") for _ in range(BULK)
+                      ]), None, True),
+            Escenario("FacturacionQueries.eliminar_factura",
+                      lambda i: f.eliminar_factura(self.sacar("factura")[0]), None, False),
+            Escenario("FacturacionQueries.insertar_facturas",
+                      lambda i: f.insertar_facturas([factura(i) for _ in range(BULK)]),
+                      None, True),
+            Escenario("FacturacionQueries.facturar_lote (un día)", facturar_lote, None, True),
+            Escenario("FacturacionQueries.obtener_corrida_pendiente",
+                      lambda i: f.obtener_corrida_pendiente(), None, False),
+            Escenario("FacturacionQueries.reanudar_corrida",
+                      lambda i: f.reanudar_corrida(self.creado("corrida", i)), None, True),
+            # Reportes
+            *[
+                Escenario(f"ReportesQueries.obtener_resumen (por {agrupar})",
+                          lambda i, a=agrupar: r.obtener_resumen(desde, hasta, a), None, False)
+                for agrupar in ReportesQueries.AGRUPACIONES
+            ],
+            Escenario("ReportesQueries.obtener_filas_desde (Turno)",
+                      lambda i: sum(len(b) for b in r.obtener_filas_desde("Turno")), None, True),
+            Escenario("ReportesQueries.recalcular (una semana)",
+                      lambda i: r.recalcular(*semana(i)), None, False),
+            # Fichas médicas
+            Escenario("FichaMedicaQueries.obtener_fichas_medicas",
+                      lambda i: fm.obtener_fichas_medicas(limit=100), None, False),
+            Escenario("FichaMedicaQueries.exportar_fichas_medicas",
+                      lambda i: agotar(fm.exportar_fichas_medicas()), None, True),
+            Escenario("FichaMedicaQueries.buscar_fichas",
+                      lambda i: fm.buscar_fichas(
+                          f"{self.prefijo_apellido()} {self.rnd.choice('AJMLS')}"
+                      ), None, False),
+            Escenario("FichaMedicaQueries.obtener_ficha_medica_por_id",
+                      lambda i: fm.obtener_ficha_medica_por_id(self.id_al_azar("FichaMedica")),
+                      None, False),
+            Escenario("FichaMedicaQueries.obtener_ficha_medica_por_paciente",
+                      lambda i: fm.obtener_ficha_medica_por_paciente(
+                          self.id_al_azar("Paciente")
+                      ), None, False),
+            Escenario("FichaMedicaQueries.obtener_pacientes_con_ficha",
+                      lambda i: fm.obtener_pacientes_con_ficha(), None, True),
+            Escenario("FichaMedicaQueries.obtener_pacientes_sin_ficha",
+                      lambda i: fm.obtener_pacientes_sin_ficha(), None, True),
+            Escenario("FichaMedicaQueries.insertar_ficha_medica",
+                      lambda i: self.guardar("ficha", fm.insertar_ficha_medica(
+                          (2 * (i + 1), 1, hoy, "0+", None, None, None, None)
+                      )), None, False),
+            Escenario("FichaMedicaQueries.actualizar_ficha_medica",
+                      lambda i: fm.actualizar_ficha_medica(self.creado("ficha", i), (
+                          2 * (i + 1), 2, hoy, "A+", "Ninguna", None, None, None
+                      )), None, False),
+            Escenario("FichaMedicaQueries.eliminar_ficha_medica",
+                      lambda i: fm.eliminar_ficha_medica(self.sacar("ficha")), None, False),
+            # Consultas, recetas y estudios
+            Escenario("ConsultaMedicaQueries.obtener_consultas_por_ficha",
+                      lambda i: c.obtener_consultas_por_ficha(self.id_al_azar("FichaMedica")),
+                      None, False),
+            Escenario("ConsultaMedicaQueries.obtener_consulta_por_id",
+                      lambda i: c.obtener_consulta_por_id(self.id_al_azar("ConsultaMedica")),
+                      None, False),
+            Escenario("ConsultaMedicaQueries.insertar_consulta",
+                      lambda i: self.guardar("consulta", c.insertar_consulta(
+                          (self.id_al_azar("FichaMedica"), hoy, "Control", "Bench", None)
+                      )), None, False),
+            Escenario("ConsultaMedicaQueries.insertar_consultas",
+                      lambda i: c.insertar_consultas([
+                          (self.id_al_azar("FichaMedica"), hoy, "Control", "Bench", None)
+                          for _ in range(BULK)
+                      ]), None, True),
+            Escenario("ConsultaMedicaQueries.actualizar_consulta",
+                      lambda i: c.actualizar_consulta(
+                          self.creado("consulta", i), (hoy, "Arritmia", "Bench", "Editada")
+                      ), None, False),
+            Escenario("RecetaMedicaQueries.obtener_recetas_por_consulta",
+                      lambda i: rc.obtener_recetas_por_consulta(
+                          self.id_al_azar("ConsultaMedica")
+                      ), None, False),
+            Escenario("RecetaMedicaQueries.obtener_receta_por_id",
+                      lambda i: rc.obtener_receta_por_id(self.id_al_azar("RecetaMedica")),
+                      None, False),
+            Escenario("RecetaMedicaQueries.insertar_receta",
+                      lambda i: self.guardar("receta", rc.insertar_receta(
+                          (self.creado("consulta", i), "Enalapril", "10 mg", "Cada 12 hs",
+                           "30 días")
+                      )), None, False),
+            Escenario("RecetaMedicaQueries.insertar_recetas",
+                      lambda i: rc.insertar_recetas([
+                          (self.id_al_azar("ConsultaMedica"), "Aspirina", "100 mg",
+                           "Cada 24 hs", "Crónico")
+                          for _ in range(BULK)
+                      ]), None, True),
+            Escenario("RecetaMedicaQueries.actualizar_receta",
+                      lambda i: rc.actualizar_receta(
+                          self.creado("receta", i), ("Losartán", "50 mg", "Cada 24 hs", "90 días")
+                      ), None, False),
+            Escenario("RecetaMedicaQueries.eliminar_receta",
+                      lambda i: rc.eliminar_receta(self.sacar("receta")), None, False),
+            Escenario("EstudioMedicoQueries.obtener_estudios_por_consulta",
+                      lambda i: e.obtener_estudios_por_consulta(
+                          self.id_al_azar("ConsultaMedica")
+                      ), None, False),
+            Escenario("EstudioMedicoQueries.obtener_estudio_por_id",
+                      lambda i: e.obtener_estudio_por_id(self.id_al_azar("EstudioMedico")),
+                      None, False),
+            Escenario("EstudioMedicoQueries.insertar_estudio",
+                      lambda i: self.guardar("estudio", e.insertar_estudio(
+                          (self.creado("consulta", i), "Electrocardiograma", hoy, "Normal")
+                      )), None, False),
+            Escenario("EstudioMedicoQueries.insertar_estudios",
+                      lambda i: e.insertar_estudios([
+                          (self.id_al_azar("ConsultaMedica"), "Laboratorio", hoy, None)
+                          for _ in range(BULK)
+                      ]), None, True),
+            Escenario("EstudioMedicoQueries.actualizar_estudio",
+                      lambda i: e.actualizar_estudio(
+                          self.creado("estudio", i), ("Ecocardiograma", hoy, "Ver informe")
+                      ), None, False),
+            Escenario("EstudioMedicoQueries.eliminar_estudio",
+                      lambda i: e.eliminar_estudio(self.sacar("estudio")), None, False),
+            # Las consultas se borran al final: recetas y estudios nuevos las usan
+            Escenario("ConsultaMedicaQueries.eliminar_consulta",
+                      lambda i: c.eliminar_consulta(self.sacar("consulta")), None, False),
+        ]
+
+
+def medir(escenario, repeticiones):
+    """{ops, ops_s, p50_ms, p95_ms, p99_ms} de repetir el escenario, o {error}"""
+    duraciones = []
+    # Algunos métodos imprimen mensajes de depuración: no se mezclan con la tabla
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(repeticiones):
+            try:
+                if escenario.preparar is not None:
+                    escenario.preparar(i)
+                inicio = time.perf_counter()
+                escenario.func(i)
+                duraciones.append(time.perf_counter() - inicio)
+            except Exception as e:
+                return {"error": f"{type(e).__name__}: {e}"[:120]}
+    duraciones.sort()
+    total = sum(duraciones)
+    return {
+        "ops": len(duraciones),
+        "ops_s": len(duraciones) / total if total else 0.0,
+        "p50_ms": percentil(duraciones, 50) * 1000,
+        "p95_ms": percentil(duraciones, 95) * 1000,
+        "p99_ms": percentil(duraciones, 99) * 1000,
+    }
+
+
+def comparar(resultados, archivo, tolerancia):
+    """Escenarios cuyo p50 empeoró más que la tolerancia respecto de archivo"""
+    with open(archivo, encoding="utf-8") as f:
+        base = json.load(f)["escenarios"]
+    regresiones = []
+    for nombre, datos in resultados.items():
+        anterior = base.get(nombre)
+        if not anterior or "p50_ms" not in anterior or "p50_ms" not in datos:
+            continue
+        diferencia = datos["p50_ms"] - anterior["p50_ms"]
+        if diferencia > MINIMO_REGRESION_MS and datos["p50_ms"] > anterior["p50_ms"] * (
+            1 + tolerancia
+        ):
+            regresiones.append((nombre, anterior["p50_ms"], datos["p50_ms"]))
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--escala", choices=ESCALAS, default="10k")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--repeticiones", type=int, default=200)
+    parser.add_argument("--solo", help="correr solo los escenarios que contienen este texto")
+    parser.add_argument(
+        "--sqlite", metavar="ARCHIVO", help="base generada antes con datos_sinteticos.py"
+    )
+    parser.add_argument("--mysql", metavar="BASE", help="medir contra MySQL en esta base nueva")
+    parser.add_argument("--conservar", action="store_true", help="no borrar la base MySQL")
+    parser.add_argument("--json", metavar="SALIDA", help="guardar los resultados")
+    parser.add_argument("--comparar", metavar="BASE", help="JSON de una corrida anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.25)
+    args = parser.parse_args()
+
+    # Las llamadas lentas son esperables acá: no llenar el log de la aplicación
+    metricas.umbral_ms = float("inf")
+
+    clinica = ClinicaSintetica(ESCALAS[args.escala], args.semilla)
+    print(f"🏥 Escala {args.escala}: {clinica.tamanios()}")
+    carga = {}
+    if args.mysql:
+        motor = "mysql"
+        db = abrir_mysql(args.mysql)
+        carga = clinica.cargar(db)
+    elif args.sqlite:
+        motor = "sqlite"
+        # Se mide sobre una copia: los escenarios escriben
+        copia = os.path.join(tempfile.mkdtemp(prefix="consultorio_bench_"), "bench.db")
+        shutil.copy(args.sqlite, copia)
+        db = PoolSQLite(copia).connect()
+    else:
+        motor = "sqlite"
+        db = PoolSQLite().connect()
+        carga = clinica.cargar(db)
+
+    bench = BenchQueries(db, clinica)
+    escenarios = [
+        escenario
+        for escenario in bench.escenarios()
+        if not args.solo or args.solo.lower() in escenario.nombre.lower()
+    ]
+    pesadas = max(3, args.repeticiones // 20)
+
+    print(f"\n{'Escenario':<72} {'ops':>5} {'ops/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    resultados = {}
+    for escenario in escenarios:
+        datos = medir(escenario, pesadas if escenario.pesado else args.repeticiones)
+        resultados[escenario.nombre] = datos
+        if "error" in datos:
+            print(f"{escenario.nombre:<72} ⚠️ no soportada: {datos['error']}")
+            continue
+        print(
+            f"{escenario.nombre:<72} {datos['ops']:>5} {datos['ops_s']:>9.1f} "
+            f"{datos['p50_ms']:>8.2f} {datos['p95_ms']:>8.2f} {datos['p99_ms']:>8.2f}"
+        )
+
+    if not args.solo:
+        cubiertos = {escenario.nombre.split(" ")[0] for escenario in escenarios}
+        faltan = sorted(metodos_publicos() - cubiertos)
+        if faltan:
+            print(f"\n⚠️ Métodos sin escenario: {', '.join(faltan)}")
+
+    db.disconnect()
+    if args.mysql and not args.conservar:
+        borrar_mysql(args.mysql)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "generado": datetime.now().isoformat(timespec="seconds"),
+                    "escala": args.escala,
+                    "semilla": args.semilla,
+                    "motor": motor,
+                    "repeticiones": args.repeticiones,
+                    "carga_s": carga,
+                    "escenarios": resultados,
+                },
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+        print(f"\n💾 Resultados guardados en {args.json}")
+
+    if args.comparar:
+        regresiones = comparar(resultados, args.comparar, args.tolerancia)
+        for nombre, antes, ahora in regresiones:
+            print(f"❌ Regresión en {nombre}: p50 {antes:.2f} → {ahora:.2f} ms")
+        if regresiones:
+            sys.exit(1)
+        print(f"✅ Sin regresiones de p50 mayores al {args.tolerancia:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+# benchmarks/datos_sinteticos.py
+"""Generador determinístico de datos de un consultorio para los benchmarks.
+
+Uso: python benchmarks/datos_sinteticos.py [--escala 10k|100k|1M] [--mysql BASE]
+
+La escala es la cantidad de turnos; el resto se dimensiona a partir de
+ella (un paciente cada 5 turnos, un doctor cada 2500, facturas para el 85%
+de los turnos pasados, fichas para la mitad de los pacientes, una consulta
+cada 4 turnos con su receta y un estudio cada 2 consultas). Con la misma
+semilla y el mismo día se generan exactamente las mismas filas.
+
+Los turnos caen de lunes a viernes entre las 08:00 y las 20:00, cada 30
+minutos, sin repetir (doctor, fecha, hora), la mitad antes de hoy y la
+mitad después, con un 20% de los horarios libres para poder reservar.
+Se cargan con los métodos de inserción masiva de *Queries sobre una base
+vacía. Sin --mysql se usa el reemplazo en SQLite (ver sqlite_standin.py).
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from database.migrations import migrar  # noqa: E402
+from database.queries import (  # noqa: E402
+    ConsultaMedicaQueries,
+    EstudioMedicoQueries,
+    FacturacionQueries,
+    PacientesQueries,
+    RecetaMedicaQueries,
+    TurnosQueries,
+    UsuariosQueries,
+    ejecutar_en_lotes,
+)
+
+ESCALAS = {"10k": 10_000, "100k": 100_000, "1M": 1_000_000}
+
+OBRAS_SOCIALES = 30
+SLOTS_POR_DIA = 24  # 08:00 a 20:00 cada 30 minutos
+OCUPACION = 0.8
+PASSWORD = "bench"
+
+APELLIDOS = [
+    "González", "Rodríguez", "Gómez", "Fernández", "López", "Díaz", "Martínez",
+    "Pérez", "García", "Sánchez", "Romero", "Sosa", "Álvarez", "Torres", "Ruiz",
+    "Ramírez", "Flores", "Acosta", "Benítez", "Medina", "Suárez", "Herrera",
+    "Aguirre", "Pereyra", "Gutiérrez", "Giménez", "Molina", "Silva", "Castro",
+    "Rojas", "Ortiz", "Núñez", "Luna", "Juárez", "Cabrera", "Ríos", "Ferreyra",
+    "Godoy", "Morales", "Domínguez", "Moreno", "Peralta", "Vega", "Carrizo",
+    "Quiroga", "Castillo", "Ledesma", "Muñoz", "Ojeda", "Ponce",
+]
+NOMBRES = [
+    "María", "Juan", "José", "Ana", "Carlos", "Laura", "Jorge", "Marta", "Luis",
+    "Silvia", "Miguel", "Patricia", "Roberto", "Graciela", "Daniel", "Claudia",
+    "Ricardo", "Susana", "Sergio", "Mónica", "Diego", "Lucía", "Pablo", "Sofía",
+    "Martín", "Valentina", "Facundo", "Camila", "Nicolás", "Florencia",
+]
+ESPECIALIDADES = [
+    "Cardiología", "Cardiología Intervencionista", "Electrofisiología",
+    "Ecocardiografía", "Clínica Médica",
+]
+MOTIVOS = [
+    "Control", "Dolor de pecho", "Palpitaciones", "Hipertensión", "Chequeo anual",
+    "Disnea", "Prequirúrgico", "Resultado de estudios", None,
+]
+GRUPOS_SANGUINEOS = ["0+", "0-", "A+", "A-", "B+", "B-", "AB+", "AB-"]
+DIAGNOSTICOS = [
+    "Hipertensión arterial", "Arritmia", "Insuficiencia cardíaca", "Angina estable",
+    "Control normal", "Dislipemia", "Fibrilación auricular",
+]
+MEDICAMENTOS = [
+    ("Enalapril", "10 mg"), ("Atenolol", "50 mg"), ("Atorvastatina", "20 mg"),
+    ("Aspirina", "100 mg"), ("Losartán", "50 mg"), ("Amlodipina", "5 mg"),
+    ("Furosemida", "40 mg"), ("Bisoprolol", "2.5 mg"),
+]
+ESTUDIOS = [
+    "Electrocardiograma", "Ecocardiograma", "Ergometría", "Holter 24 hs",
+    "Laboratorio", "Presurometría (MAPA)",
+]
+
+
+def dias_habiles(hoy, cantidad):
+    """cantidad días de lunes a viernes, la mitad antes de hoy y el resto desde hoy"""
+    antes, desde = [], []
+    dia = hoy - timedelta(days=1)
+    while len(antes) < cantidad // 2:
+        if dia.weekday() < 5:
+            antes.append(dia)
+        dia -= timedelta(days=1)
+    dia = hoy
+    while len(desde) < cantidad - len(antes):
+        if dia.weekday() < 5:
+            desde.append(dia)
+        dia += timedelta(days=1)
+    return antes[::-1] + desde
+
+
+class ClinicaSintetica:
+    """Filas de todas las tablas para una escala (en turnos) y una semilla.
+
+    Cada tabla usa su propio generador al azar derivado de la semilla, así
+    que el resultado no depende del orden en que se pidan. Los ids que se
+    referencian entre tablas son los que asigna AUTO_INCREMENT en una base
+    vacía (1, 2, 3...).
+    """
+
+    def __init__(self, turnos, semilla=42, hoy=None):
+        self.semilla = semilla
+        self.hoy = hoy or date.today()
+        self.turnos = turnos
+        self.pacientes = max(turnos // 5, 10)
+        self.doctores = max(turnos // 2500, 10)
+        self.fichas = self.pacientes // 2
+        self.consultas = turnos // 4
+        self.recetas = self.consultas
+        self.estudios = self.consultas // 2
+
+        por_dia = self.doctores * SLOTS_POR_DIA * OCUPACION
+        self.dias = dias_habiles(self.hoy, int(turnos / por_dia) + 2)
+
+        rnd = self._azar(0)
+        # Obra social de cada paciente (None = sin obra social), indexado por id
+        self.obra_social_de = [None] + [
+            None if rnd.random() < 0.2 else rnd.randint(1, OBRAS_SOCIALES)
+            for _ in range(self.pacientes)
+        ]
+        self.tarifa_de = {None: Decimal("15000.00")}
+        for id_obra_social in range(1, OBRAS_SOCIALES + 1):
+            self.tarifa_de[id_obra_social] = Decimal(8000 + 250 * id_obra_social)
+
+    def _azar(self, tabla):
+        return random.Random(self.semilla * 1000 + tabla)
+
+    def tamanios(self):
+        return {
+            "ObraSocial": OBRAS_SOCIALES,
+            "Doctor": self.doctores,
+            "Paciente": self.pacientes,
+            "Turno": self.turnos,
+            "FichaMedica": self.fichas,
+            "ConsultaMedica": self.consultas,
+            "RecetaMedica": self.recetas,
+            "EstudioMedico": self.estudios,
+        }
+
+    def _persona(self, rnd, i):
+        apellido = rnd.choice(APELLIDOS)
+        nombre = rnd.choice(NOMBRES)
+        correo = f"{nombre}.{apellido}{i}@correo.com".lower()
+        telefono = f"11{rnd.randint(40_000_000, 69_999_999)}"
+        return apellido, nombre, telefono, correo
+
+    def obras_sociales(self):
+        """(nombre, direccion, telefono, correo_electronico)"""
+        return [
+            (f"Obra Social {i:02d}", f"Av. Corrientes {1000 + i}", f"0800-{i:03d}-0000",
+             f"contacto{i}@os{i}.com.ar")
+            for i in range(1, OBRAS_SOCIALES + 1)
+        ]
+
+    def doctores_filas(self):
+        """(dni, matricula, apellido, nombre, telefono, correo_electronico, especialidad)"""
+        rnd = self._azar(1)
+        for i in range(1, self.doctores + 1):
+            apellido, nombre, telefono, correo = self._persona(rnd, i)
+            yield (
+                str(10_000_000 + i), f"MN{100_000 + i}", apellido, nombre, telefono,
+                correo, rnd.choice(ESPECIALIDADES),
+            )
+
+    def usuarios_filas(self):
+        """(nombre_usuario, contrasena, id_rol, id_doctor): admin, secretaria y
+        un usuario por doctor (roles 1, 3 y 2 de migracion_esquema_inicial)"""
+        filas = [("admin", PASSWORD, 1, None), ("secretaria", PASSWORD, 3, None)]
+        filas += [
+            (f"doctor{i}", PASSWORD, 2, i) for i in range(1, min(self.doctores, 50) + 1)
+        ]
+        return filas
+
+    def pacientes_filas(self):
+        """Mismo orden que PacientesQueries.INSERT"""
+        rnd = self._azar(2)
+        for i in range(1, self.pacientes + 1):
+            apellido, nombre, telefono, correo = self._persona(rnd, i)
+            nacimiento = date(1935, 1, 1) + timedelta(days=rnd.randrange(365 * 70))
+            yield (
+                str(20_000_000 + i), apellido, nombre, telefono, correo, nacimiento,
+                f"Calle {rnd.randint(1, 200)} N° {rnd.randint(1, 5000)}",
+                self.obra_social_de[i],
+            )
+
+    def _turnos(self):
+        """(id_turno, id_paciente, id_doctor, fecha, hora, motivo, es_particular)"""
+        rnd = self._azar(3)
+        id_turno = 0
+        for fecha in self.dias:
+            for slot in range(SLOTS_POR_DIA):
+                hora = timedelta(hours=8, minutes=30 * slot)
+                for id_doctor in range(1, self.doctores + 1):
+                    if rnd.random() >= OCUPACION:
+                        continue
+                    id_turno += 1
+                    id_paciente = rnd.randint(1, self.pacientes)
+                    particular = (
+                        self.obra_social_de[id_paciente] is None or rnd.random() < 0.1
+                    )
+                    yield (
+                        id_turno, id_paciente, id_doctor, fecha, hora,
+                        rnd.choice(MOTIVOS), particular,
+                    )
+                    if id_turno == self.turnos:
+                        return
+
+    def turnos_filas(self):
+        """Mismo orden que TurnosQueries.INSERT"""
+        return (turno[1:] for turno in self._turnos())
+
+    def facturas_filas(self):
+        """Mismo orden que FacturacionQueries.INSERT, para el 85% de los turnos pasados"""
+        rnd = self._azar(4)
+        for id_turno, id_paciente, _, fecha, _, _, particular in self._turnos():
+            if fecha >= self.hoy:
+                return
+            if rnd.random() >= 0.85:
+                continue
+            id_obra_social = None if particular else self.obra_social_de[id_paciente]
+            # Las más viejas ya están casi todas cobradas
+            pagado = rnd.random() < (0.9 if (self.hoy - fecha).days > 30 else 0.4)
+            yield (id_turno, fecha, self.tarifa_de[id_obra_social], None, pagado)
+
+    def tarifas_filas(self):
+        """(id_obra_social, practica, monto, vigente_desde): la actual y la anterior"""
+        inicio = self.dias[0] - timedelta(days=365)
+        filas = []
+        for id_obra_social, monto in self.tarifa_de.items():
+            filas.append((id_obra_social, "consulta", monto * Decimal("0.8"), inicio))
+            filas.append((id_obra_social, "consulta", monto, self.dias[0]))
+        return filas
+
+    def fichas_filas(self):
+        """(id_paciente, id_doctor, fecha_apertura, grupo_sanguineo, alergias,
+        antecedentes_personales, antecedentes_familiares, medicacion_actual)"""
+        rnd = self._azar(5)
+        for i in range(1, self.fichas + 1):
+            yield (
+                2 * i - 1,  # los pacientes impares tienen ficha
+                rnd.randint(1, self.doctores),
+                self.dias[0] - timedelta(days=rnd.randrange(3 * 365)),
+                rnd.choice(GRUPOS_SANGUINEOS),
+                rnd.choice([None, "Penicilina", "Iodo", "AINEs"]),
+                rnd.choice([None, "HTA", "Diabetes tipo 2", "Tabaquismo"]),
+                rnd.choice([None, "Cardiopatía isquémica", "Muerte súbita"]),
+                rnd.choice([None, "Enalapril 10 mg", "Aspirina 100 mg"]),
+            )
+
+    def consultas_filas(self):
+        """Mismo orden que ConsultaMedicaQueries.INSERT"""
+        rnd = self._azar(6)
+        for _ in range(self.consultas):
+            yield (
+                rnd.randint(1, self.fichas),
+                rnd.choice(self.dias[: len(self.dias) // 2]),
+                rnd.choice(DIAGNOSTICOS),
+                "Control en 3 meses",
+                None,
+            )
+
+    def recetas_filas(self):
+        """Mismo orden que RecetaMedicaQueries.INSERT"""
+        rnd = self._azar(7)
+        for _ in range(self.recetas):
+            medicamento, dosis = rnd.choice(MEDICAMENTOS)
+            yield (
+                rnd.randint(1, self.consultas), medicamento, dosis,
+                rnd.choice(["Cada 12 hs", "Cada 24 hs", "Cada 8 hs"]),
+                rnd.choice(["30 días", "90 días", "Crónico"]),
+            )
+
+    def estudios_filas(self):
+        """Mismo orden que EstudioMedicoQueries.INSERT"""
+        rnd = self._azar(8)
+        for _ in range(self.estudios):
+            yield (
+                rnd.randint(1, self.consultas),
+                rnd.choice(ESTUDIOS),
+                rnd.choice(self.dias[: len(self.dias) // 2]),
+                rnd.choice(["Normal", "Sin particularidades", "Ver informe adjunto"]),
+            )
+
+    def cargar(self, db):
+        """Migrar y llenar una base vacía. Devuelve {tabla: segundos}"""
+        migrar(db)
+        with db.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM Turno")
+            if cursor.fetchone()[0]:
+                raise ValueError("La base ya tiene turnos: usar una base vacía")
+
+        pacientes = PacientesQueries(db)
+        usuarios = UsuariosQueries(db)
+        consultas = ConsultaMedicaQueries(db)
+        pasos = [
+            ("ObraSocial", lambda: pacientes.insertar_obras_sociales(self.obras_sociales())),
+            ("Doctor", lambda: ejecutar_en_lotes(
+                db,
+                """
+                INSERT INTO Doctor (dni, matricula, apellido, nombre, telefono,
+                                    correo_electronico, especialidad)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """,
+                self.doctores_filas(),
+            )),
+            ("Usuario", lambda: [
+                usuarios.insertar_usuario(fila) for fila in self.usuarios_filas()
+            ]),
+            ("Paciente", lambda: pacientes.insertar_pacientes(self.pacientes_filas())),
+            ("Turno", lambda: TurnosQueries(db).insertar_turnos(self.turnos_filas())),
+            ("Tarifa", lambda: ejecutar_en_lotes(
+                db,
+                """
+                INSERT INTO Tarifa (id_obra_social, practica, monto, vigente_desde)
+                VALUES (%s, %s, %s, %s)
+                """,
+                self.tarifas_filas(),
+            )),
+            ("Facturacion", lambda: FacturacionQueries(db).insertar_facturas(
+                self.facturas_filas()
+            )),
+            ("FichaMedica", lambda: ejecutar_en_lotes(
+                db,
+                """
+                INSERT INTO FichaMedica (id_paciente, id_doctor, fecha_apertura,
+                                         grupo_sanguineo, alergias, antecedentes_personales,
+                                         antecedentes_familiares, medicacion_actual)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                """,
+                self.fichas_filas(),
+            )),
+            ("ConsultaMedica", lambda: consultas.insertar_consultas(self.consultas_filas())),
+            ("RecetaMedica", lambda: RecetaMedicaQueries(db).insertar_recetas(
+                self.recetas_filas()
+            )),
+            ("EstudioMedico", lambda: EstudioMedicoQueries(db).insertar_estudios(
+                self.estudios_filas()
+            )),
+        ]
+
+        tiempos = {}
+        for tabla, paso in pasos:
+            inicio = time.perf_counter()
+            resultado = paso()
+            tiempos[tabla] = time.perf_counter() - inicio
+            errores = getattr(resultado, "errores", [])
+            if errores:
+                raise ValueError(f"{len(errores)} filas rechazadas en {tabla}: {errores[0]}")
+            print(f"   {tabla:<16} {tiempos[tabla]:>8.2f} s")
+        return tiempos
+
+
+def main():
+    from sqlite_standin import PoolSQLite
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--escala", choices=ESCALAS, default="10k")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--sqlite", help="archivo SQLite a crear (por defecto, uno temporal)")
+    parser.add_argument("--mysql", metavar="BASE", help="cargar en esta base MySQL")
+    args = parser.parse_args()
+
+    clinica = ClinicaSintetica(ESCALAS[args.escala], args.semilla)
+    if args.mysql:
+        from bench_queries import abrir_mysql
+
+        db = abrir_mysql(args.mysql)
+    else:
+        db = PoolSQLite(args.sqlite).connect()
+    print(f"🏥 Generando escala {args.escala}: {clinica.tamanios()}")
+    inicio = time.perf_counter()
+    clinica.cargar(db)
+    print(f"✅ Carga completa en {time.perf_counter() - inicio:.1f} s")
+    if not args.mysql:
+        print(f"   Base SQLite: {db.archivo}")
+    db.disconnect()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+# benchmarks/sqlite_standin.py
+"""Reemplazo de DatabaseConnection sobre SQLite, para medir sin un servidor MySQL.
+
+Ofrece la misma interfaz que usa database/queries.py (cursor, transaction,
+consultar, stream, acquire/release y stats) y traduce al vuelo lo propio
+de MySQL: parámetros %s, AUTO_INCREMENT, FOR UPDATE, ON DUPLICATE KEY
+UPDATE, FROM DUAL, DROP INDEX ... ON, information_schema, y las funciones
+SHA2, CONCAT, CURDATE, DATE_FORMAT, LOCATE, CHAR_LENGTH, GET_LOCK y
+RELEASE_LOCK. Las fechas vuelven como date y las horas como timedelta, y
+los errores de sqlite3 se levantan como mysql.connector.Error (un UNIQUE
+violado con el errno de MySQL), igual que los ve queries.py.
+
+Sirve para comparar versiones del código entre sí: los tiempos absolutos
+no son los de MySQL, y alguna consulta puede no tener traducción (el
+benchmark la informa como no soportada).
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from mysql.connector import Error
+
+ER_DUP_ENTRY = 1062
+ER_LOCK_WAIT_TIMEOUT = 1205
+
+RE_PARAMETRO = re.compile(r"%([s%])")
+RE_FOR_UPDATE = re.compile(r"\s+FOR\s+UPDATE\b", re.IGNORECASE)
+RE_VALUES = re.compile(r"VALUES\((\w+)\)")
+RE_ADD_CONSTRAINT = re.compile(r",\s*ADD\s+CONSTRAINT\b.*$", re.IGNORECASE | re.DOTALL)
+RE_CAST = re.compile(r"CAST\((%s) AS (?:DATE|TIME)\)", re.IGNORECASE)
+RE_LIKE = re.compile(r"LIKE\s+%s")
+RE_ESTADISTICAS = re.compile(r"information_schema\.STATISTICS", re.IGNORECASE)
+RE_COLUMNAS = re.compile(r"information_schema\.COLUMNS", re.IGNORECASE)
+RE_DROP_INDEX = re.compile(r"DROP\s+INDEX\s+(\w+)\s+ON\s+\w+", re.IGNORECASE)
+
+
+def traducir(sql):
+    """SQL de MySQL (como lo escribe queries.py) a SQL de SQLite"""
+    if RE_ESTADISTICAS.search(sql):
+        return (
+            "SELECT COUNT(*) FROM sqlite_master "
+            "WHERE type = 'index' AND tbl_name = ? AND name = ?"
+        )
+    if RE_COLUMNAS.search(sql):
+        return "SELECT COUNT(*) FROM pragma_table_info(?) WHERE name = ?"
+
+    # En SQLite CAST(x AS TIME) convierte a número; las horas se comparan como texto
+    sql = RE_CAST.sub(r"\1", sql)
+    # MySQL escapa los comodines de LIKE con barra invertida por defecto
+    sql = RE_LIKE.sub(r"LIKE %s ESCAPE '\\'", sql)
+    sql = RE_PARAMETRO.sub(lambda m: "?" if m.group(1) == "s" else "%", sql)
+    sql = sql.replace("INT AUTO_INCREMENT PRIMARY KEY", "INTEGER PRIMARY KEY AUTOINCREMENT")
+    sql = sql.replace("ON UPDATE CURRENT_TIMESTAMP", "")
+    sql = sql.replace(" FROM DUAL", "")
+    sql = RE_FOR_UPDATE.sub("", sql)
+    # En SQLite el nombre del índice es único en toda la base
+    sql = RE_DROP_INDEX.sub(r"DROP INDEX \1", sql)
+    if sql.lstrip().upper().startswith("ALTER TABLE"):
+        # SQLite no agrega restricciones a una tabla existente
+        sql = RE_ADD_CONSTRAINT.sub("", sql)
+
+    i = sql.find("ON DUPLICATE KEY UPDATE")
+    if i >= 0:
+        antes, despues = sql[:i], sql[i + len("ON DUPLICATE KEY UPDATE") :]
+        # Un upsert con SELECT necesita WHERE para que SQLite lo interprete bien
+        if "SELECT" in antes.upper() and "WHERE" not in antes[antes.rfind(")") :].upper():
+            antes += " WHERE true "
+        sql = antes + "ON CONFLICT DO UPDATE SET" + RE_VALUES.sub(r"excluded.\1", despues)
+    return sql
+
+
+def _date_format(valor, formato):
+    if valor is None:
+        return None
+    return date.fromisoformat(str(valor)[:10]).strftime(formato)
+
+
+def _locate(buscado, texto):
+    if buscado is None or texto is None:
+        return None
+    return str(texto).lower().find(str(buscado).lower()) + 1
+
+
+def _hora(valor):
+    horas, minutos, segundos = (int(float(p)) for p in valor.decode().split(":"))
+    return timedelta(hours=horas, minutes=minutos, seconds=segundos)
+
+
+def _texto_hora(valor):
+    segundos = int(valor.total_seconds())
+    return f"{segundos // 3600:02d}:{segundos % 3600 // 60:02d}:{segundos % 60:02d}"
+
+
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda v: v.isoformat(sep=" "))
+sqlite3.register_adapter(timedelta, _texto_hora)
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_converter("DATE", lambda v: date.fromisoformat(v.decode()[:10]))
+sqlite3.register_converter("DATETIME", lambda v: datetime.fromisoformat(v.decode()))
+sqlite3.register_converter("TIME", _hora)
+sqlite3.register_converter("DECIMAL", lambda v: Decimal(v.decode()))
+
+
+@contextmanager
+def errores_mysql():
+    """Levantar los errores de sqlite3 como los de mysql.connector"""
+    try:
+        yield
+    except sqlite3.IntegrityError as e:
+        errno = ER_DUP_ENTRY if "UNIQUE" in str(e) else None
+        raise Error(msg=str(e), errno=errno) from e
+    except sqlite3.OperationalError as e:
+        errno = ER_LOCK_WAIT_TIMEOUT if "locked" in str(e) else None
+        raise Error(msg=str(e), errno=errno) from e
+    except sqlite3.Error as e:
+        raise Error(msg=str(e)) from e
+
+
+class CursorSQLite:
+    """Cursor de sqlite3 con la interfaz de mysql.connector que usa la app"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, params=()):
+        with errores_mysql():
+            self._cursor.execute(traducir(sql), tuple(params))
+
+    def executemany(self, sql, filas):
+        with errores_mysql():
+            self._cursor.executemany(traducir(sql), [tuple(f) for f in filas])
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, cantidad):
+        return self._cursor.fetchmany(cantidad)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def column_names(self):
+        return tuple(d[0] for d in self._cursor.description or ())
+
+    def close(self):
+        self._cursor.close()
+
+
+class ConexionSQLite:
+    """Conexión con commit/rollback/cursor como una de mysql.connector"""
+
+    def __init__(self, archivo):
+        self._conn = sqlite3.connect(
+            archivo, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        funciones = {
+            ("SHA2", 2): lambda texto, bits: hashlib.sha256(str(texto).encode()).hexdigest(),
+            ("CONCAT", -1): lambda *partes: (
+                None if None in partes else "".join(str(p) for p in partes)
+            ),
+            ("CURDATE", 0): lambda: date.today().isoformat(),
+            ("NOW", 0): lambda: datetime.now().isoformat(sep=" ", timespec="seconds"),
+            ("DATE_FORMAT", 2): _date_format,
+            ("LOCATE", 2): _locate,
+            ("CHAR_LENGTH", 1): lambda texto: None if texto is None else len(str(texto)),
+            ("GET_LOCK", 2): lambda nombre, espera: 1,
+            ("RELEASE_LOCK", 1): lambda nombre: 1,
+        }
+        for (nombre, argumentos), funcion in funciones.items():
+            self._conn.create_function(nombre, argumentos, funcion)
+
+    def cursor(self, **kwargs):
+        return CursorSQLite(self._conn.cursor())
+
+    @property
+    def in_transaction(self):
+        return self._conn.in_transaction
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+
+class PoolSQLite:
+    """Mismo papel que DatabaseConnection, con conexiones a un archivo SQLite"""
+
+    def __init__(self, archivo=None):
+        if archivo is None:
+            archivo = os.path.join(tempfile.mkdtemp(prefix="consultorio_bench_"), "bench.db")
+        self.archivo = archivo
+        self._lock = threading.Lock()
+        self._libres = []
+        self._abiertas = 0
+        self._checkouts = 0
+
+    def connect(self):
+        self.release(self.acquire())
+        return self
+
+    def acquire(self):
+        with self._lock:
+            self._checkouts += 1
+            if self._libres:
+                return self._libres.pop()
+            self._abiertas += 1
+        return ConexionSQLite(self.archivo)
+
+    def release(self, conn, descartar=False):
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if not descartar:
+                self._libres.append(conn)
+                return
+            self._abiertas -= 1
+        conn.close()
+
+    @contextmanager
+    def cursor(self, **kwargs):
+        conn = self.acquire()
+        try:
+            yield conn.cursor()
+        finally:
+            self.release(conn)
+
+    @contextmanager
+    def transaction(self, **kwargs):
+        conn = self.acquire()
+        try:
+            yield conn.cursor()
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+
+    def consultar(self, query, params=(), uno=False):
+        # sqlite3 ya guarda las sentencias preparadas de cada conexión
+        with self.cursor() as cursor:
+            cursor.execute(query, params)
+            filas = cursor.fetchall()
+        if uno:
+            return filas[0] if filas else None
+        return filas
+
+    @contextmanager
+    def stream(self, query, params=(), lote=1000):
+        with self.cursor() as cursor:
+            cursor.execute(query, params)
+
+            def bloques():
+                while True:
+                    filas = cursor.fetchmany(lote)
+                    if not filas:
+                        return
+                    yield filas
+
+            yield cursor.column_names, bloques()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_use": self._abiertas - len(self._libres),
+                "idle": len(self._libres),
+                "open": self._abiertas,
+                "checkouts": self._checkouts,
+            }
+
+    def disconnect(self):
+        with self._lock:
+            libres, self._libres = self._libres, []
+            self._abiertas -= len(libres)
+        for conn in libres:
+            conn.close()
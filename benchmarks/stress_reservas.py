@@ -0,0 +1,114 @@
+# benchmarks/stress_reservas.py
+"""Prueba de estrés de TurnosQueries.reservar_turno contra una base MySQL real.
+
+Uso: python benchmarks/stress_reservas.py ID_DOCTOR ID_PACIENTE [--hilos N]
+         [--reservas-por-hilo N] [--fecha YYYY-MM-DD] [--conservar]
+
+Muchos hilos intentan reservar a la vez unos pocos horarios del mismo
+doctor, algunos superpuestos entre sí (09:00, 09:15, 09:30...). Al final se
+leen los turnos de ese día y se verifica que no haya dos que se pisen.
+Los turnos creados se borran salvo con --conservar. Usar una fecha sin
+turnos reales (por defecto, un lunes dentro de un año).
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from datetime import date, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from database.connection import DatabaseConnection  # noqa: E402
+from database.queries import TurnosQueries, agenda  # noqa: E402
+from utils.agenda import a_datetime  # noqa: E402
+
+HORARIOS = ["09:00", "09:15", "09:30", "09:45", "10:00", "10:10", "10:30"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("id_doctor", type=int)
+    parser.add_argument("id_paciente", type=int)
+    parser.add_argument("--hilos", type=int, default=32)
+    parser.add_argument("--reservas-por-hilo", type=int, default=20)
+    parser.add_argument("--fecha")
+    parser.add_argument("--conservar", action="store_true")
+    args = parser.parse_args()
+
+    if args.fecha:
+        fecha = date.fromisoformat(args.fecha)
+    else:
+        fecha = date.today() + timedelta(days=365)
+        fecha -= timedelta(days=fecha.weekday())
+
+    db = DatabaseConnection(pool_size=args.hilos, timeout=60)
+    if not db.connect():
+        sys.exit(1)
+    queries = TurnosQueries(db)
+
+    resultados = {"ok": 0, "conflicto": 0, "error": 0}
+    creados = []
+    lock = threading.Lock()
+    largada = threading.Barrier(args.hilos)
+
+    def trabajar(semilla):
+        rnd = random.Random(semilla)
+        largada.wait()
+        for _ in range(args.reservas_por_hilo):
+            hora = rnd.choice(HORARIOS)
+            datos = (args.id_paciente, args.id_doctor, fecha, hora, "stress", False)
+            try:
+                reserva = queries.reservar_turno(datos)
+            except Exception as e:
+                with lock:
+                    resultados["error"] += 1
+                print(f"❌ {e}")
+                continue
+            with lock:
+                if reserva.ok:
+                    resultados["ok"] += 1
+                    creados.append(reserva.id_turno)
+                else:
+                    resultados["conflicto"] += 1
+
+    hilos = [threading.Thread(target=trabajar, args=(i,)) for i in range(args.hilos)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+
+    with db.cursor() as cursor:
+        cursor.execute(
+            "SELECT id_turno, hora FROM Turno WHERE id_doctor = %s AND fecha = %s ORDER BY hora",
+            (args.id_doctor, fecha),
+        )
+        turnos = [(id_turno, a_datetime(fecha, hora)) for id_turno, hora in cursor.fetchall()]
+
+    superpuestos = [
+        (a[0], b[0])
+        for a, b in zip(turnos, turnos[1:])
+        if b[1] < a[1] + agenda.duracion
+    ]
+
+    total = args.hilos * args.reservas_por_hilo
+    print(f"{total} intentos en {duracion:.2f} s ({total / duracion:.0f}/s) con {args.hilos} hilos")
+    print(f"Reservados: {resultados['ok']}  Conflictos: {resultados['conflicto']}  "
+          f"Errores: {resultados['error']}")
+    print(f"Turnos superpuestos el {fecha}: {len(superpuestos)} {superpuestos or ''}")
+    print(f"Pool: {db.stats()}")
+
+    if creados and not args.conservar:
+        with db.transaction() as cursor:
+            cursor.executemany(
+                "DELETE FROM Turno WHERE id_turno = %s", [(i,) for i in creados]
+            )
+    db.disconnect()
+    sys.exit(1 if superpuestos else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,3 +3,42 @@ DB_HOST = "localhost"
 DB_NAME = "consultorioMedico"
 DB_USER = "root"
 DB_PASSWORD = "root"
+
+# Pool de conexiones
+DB_POOL_SIZE = 5
+DB_POOL_TIMEOUT = 10  # segundos
+DB_POOL_PING_INTERVAL = 60  # segundos
+DB_STMT_CACHE = 64  # sentencias preparadas guardadas por conexión
+
+# Métricas de consultas
+DB_SLOW_QUERY_MS = 500  # milisegundos a partir de los que se registra una consulta
+DB_SLOW_QUERY_LOG = "consultas_lentas.log"
+
+# Cache de listas de referencia (combos)
+DB_LOOKUP_TTL = 300  # segundos
+
+# Agenda de turnos
+AGENDA_DURACION_TURNO = 30  # minutos
+AGENDA_HORIZONTE_DIAS = 60  # días hacia adelante que se mantienen en memoria
+# Día de la semana (0 = lunes) -> (desde, hasta)
+AGENDA_HORARIO = {
+    0: ("08:00", "20:00"),
+    1: ("08:00", "20:00"),
+    2: ("08:00", "20:00"),
+    3: ("08:00", "20:00"),
+    4: ("08:00", "20:00"),
+    5: ("08:00", "13:00"),
+}
+# Horarios particulares por id_doctor, con el mismo formato
+AGENDA_HORARIOS_DOCTOR = {}
+
+# Inserciones masivas
+DB_BULK_CHUNK = 500  # filas por transacción
+
+# Exportación a CSV/XLSX
+EXPORT_LOTE = 1000  # filas leídas del servidor por bloque
+
+# Diagnóstico
+DEBUG = False  # también con: python main.py --debug
+ARRANQUE_PRESUPUESTO = 3.0  # segundos máximos hasta la ventana de login
+UI_PERFIL_JSON = "rendimiento_ui.json"  # tiempos de carga de la interfaz (modo debug)
@@ -0,0 +1,107 @@
+# database/cache.py
+import sys
+import os
+import threading
+import time
+from functools import wraps
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    from config.config import DB_LOOKUP_TTL
+except ImportError:
+    DB_LOOKUP_TTL = 300  # Segundos que vale una lista de referencia
+
+
+class LookupCache:
+    """Cache de datos de referencia (listas de los combos) compartido por la app.
+
+    Cada lista se guarda con un nombre ("pacientes", "doctores",
+    "obras_sociales", "roles") y vence a los ttl segundos, por si otro puesto
+    modificó la base. Los cambios hechos desde esta app la invalidan en el
+    momento a través de invalidate(), que además avisa a los suscriptos.
+    """
+
+    def __init__(self, ttl=DB_LOOKUP_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entradas = {}  # nombre -> (vence, filas)
+        self._generaciones = {}  # nombre -> contador de invalidaciones
+        self._suscriptos = {}  # nombre -> [callback]
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, nombre, cargar):
+        """Devolver la lista guardada o cargarla con cargar() si no está o venció"""
+        with self._lock:
+            entrada = self._entradas.get(nombre)
+            if entrada and entrada[0] > time.monotonic():
+                self.hits += 1
+                return list(entrada[1])
+            self.misses += 1
+            generacion = self._generaciones.get(nombre, 0)
+
+        # La consulta corre fuera del lock para no frenar a los otros nombres
+        filas = list(cargar())
+
+        with self._lock:
+            # Si la invalidaron mientras se cargaba, el resultado puede ser viejo
+            if self._generaciones.get(nombre, 0) == generacion:
+                self._entradas[nombre] = (time.monotonic() + self.ttl, filas)
+        return list(filas)
+
+    def invalidate(self, *nombres):
+        with self._lock:
+            for nombre in nombres:
+                self._entradas.pop(nombre, None)
+                self._generaciones[nombre] = self._generaciones.get(nombre, 0) + 1
+            callbacks = [
+                callback
+                for nombre in nombres
+                for callback in self._suscriptos.get(nombre, [])
+            ]
+        for callback in callbacks:
+            callback()
+
+    def subscribe(self, nombre, callback):
+        """Llamar a callback() cada vez que se invalide nombre"""
+        with self._lock:
+            self._suscriptos.setdefault(nombre, []).append(callback)
+
+    def clear(self):
+        with self._lock:
+            nombres = list(self._entradas)
+        self.invalidate(*nombres)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entradas),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
+
+
+lookup_cache = LookupCache()
+
+
+def invalida(*nombres):
+    """Decorador para métodos de escritura: invalida esas listas al terminar.
+
+    Se aplica también si el método falla: invalidar de más solo cuesta una
+    consulta la próxima vez.
+    """
+
+    def decorador(func):
+        @wraps(func)
+        def envoltura(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            finally:
+                lookup_cache.invalidate(*nombres)
+
+        return envoltura
+
+    return decorador
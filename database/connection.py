@@ -1,8 +1,13 @@
 # database/connection.py
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector.errors import PoolError
 import sys
 import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
 
 # Agregar la ruta del proyecto al path de Python
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
@@ -16,27 +21,345 @@ except ImportError:
     DB_USER = "root"
     DB_PASSWORD = "root"
 
+try:
+    from config.config import DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_POOL_PING_INTERVAL
+except ImportError:
+    DB_POOL_SIZE = 5
+    DB_POOL_TIMEOUT = 10  # Segundos esperando una conexión libre
+    DB_POOL_PING_INTERVAL = 60  # Segundos ociosa antes de verificarla con ping
+
+try:
+    from config.config import DB_STMT_CACHE
+except ImportError:
+    DB_STMT_CACHE = 64  # Sentencias preparadas por conexión
+
 
 class DatabaseConnection:
-    def __init__(self):
-        self.connection = None
+    """Pool acotado de conexiones MySQL, seguro entre hilos.
+
+    Cada consulta toma prestada una conexión con cursor() o transaction() y la
+    devuelve al terminar. Las conexiones que estuvieron ociosas más de
+    ping_interval segundos se verifican (y reconectan) antes de entregarse.
+
+    consultar() usa sentencias preparadas en el servidor: cada conexión
+    guarda las últimas stmt_cache que usó, así una consulta frecuente se
+    analiza una sola vez por conexión.
+    """
+
+    def __init__(
+        self,
+        pool_size=DB_POOL_SIZE,
+        timeout=DB_POOL_TIMEOUT,
+        ping_interval=DB_POOL_PING_INTERVAL,
+        stmt_cache=DB_STMT_CACHE,
+    ):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+        self.stmt_cache = stmt_cache
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (conexión, momento en que se devolvió)
+        self._open = 0
+        self._in_use = 0
+        self._closed = True
+        # conexión -> OrderedDict(sql -> cursor preparado), la más usada al final
+        self._sentencias = {}
+
+        # Estadísticas para dimensionar el pool
+        self._checkouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._timeouts = 0
+        self._reconnects = 0
+        self._stmt_hits = 0
+        self._stmt_misses = 0
+        self._stmt_evictions = 0
+
+    def _new_connection(self):
+        return mysql.connector.connect(
+            host=DB_HOST,
+            database=DB_NAME,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            auth_plugin="mysql_native_password",  # Agregar esta línea
+        )
 
     def connect(self):
+        """Abrir el pool con una primera conexión.
+
+        Devuelve el propio pool, listo para pasar a los módulos, o None si no
+        se pudo conectar.
+        """
         try:
-            self.connection = mysql.connector.connect(
-                host=DB_HOST,
-                database=DB_NAME,
-                user=DB_USER,
-                password=DB_PASSWORD,
-                auth_plugin="mysql_native_password",  # Agregar esta línea
-            )
-            print("Conexión a la base de datos establecida correctamente")
-            return self.connection
+            conn = self._new_connection()
         except Error as e:
             print(f"Error conectando a MySQL: {e}")
             return None
 
+        with self._cond:
+            self._closed = False
+            self._open += 1
+            self._idle.append((conn, time.monotonic()))
+        print("Conexión a la base de datos establecida correctamente")
+        return self
+
+    def acquire(self):
+        """Tomar una conexión del pool, esperando hasta timeout si están todas en uso"""
+        inicio = time.monotonic()
+        limite = inicio + self.timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolError("El pool de conexiones está cerrado")
+                if self._idle:
+                    conn, devuelta = self._idle.pop()
+                    break
+                if self._open < self.pool_size:
+                    # Hay cupo: se abre una conexión nueva fuera del lock
+                    self._open += 1
+                    conn, devuelta = None, None
+                    break
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    self._timeouts += 1
+                    raise PoolError(
+                        f"No hay conexiones libres (máximo {self.pool_size})"
+                    )
+                self._cond.wait(restante)
+
+            espera = time.monotonic() - inicio
+            self._in_use += 1
+            self._checkouts += 1
+            self._wait_total += espera
+            self._wait_max = max(self._wait_max, espera)
+
+        try:
+            if conn is None:
+                conn = self._new_connection()
+            elif time.monotonic() - devuelta > self.ping_interval:
+                try:
+                    conn.ping()
+                except Error:
+                    # Conexión vencida (wait_timeout del servidor): reconectar
+                    conn.reconnect(attempts=3, delay=1)
+                    with self._cond:
+                        self._reconnects += 1
+                        # Las sentencias preparadas murieron con la sesión vieja
+                        self._sentencias.pop(conn, None)
+        except Error:
+            with self._cond:
+                self._open -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return conn
+
+    def release(self, conn, descartar=False):
+        """Devolver una conexión al pool descartando cualquier transacción abierta.
+
+        Con descartar=True la conexión se cierra en lugar de volver al pool.
+        """
+        reutilizable = not descartar
+        try:
+            if reutilizable and conn.in_transaction:
+                # Evita que una lectura deje abierta una instantánea vieja
+                conn.rollback()
+        except Error:
+            reutilizable = False
+
+        with self._cond:
+            self._in_use -= 1
+            if reutilizable and not self._closed:
+                self._idle.append((conn, time.monotonic()))
+                conn = None
+            else:
+                self._open -= 1
+                self._sentencias.pop(conn, None)
+            self._cond.notify()
+
+        if conn is not None:
+            try:
+                conn.close()
+            except Error:
+                pass
+
+    @contextmanager
+    def cursor(self, **kwargs):
+        """Cursor sobre una conexión prestada; se devuelve al salir del bloque"""
+        kwargs.setdefault("buffered", True)
+        conn = self.acquire()
+        try:
+            cursor = conn.cursor(**kwargs)
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+        finally:
+            self.release(conn)
+
+    @contextmanager
+    def transaction(self, **kwargs):
+        """Cursor dentro de una transacción: commit al salir, rollback si falla"""
+        kwargs.setdefault("buffered", True)
+        conn = self.acquire()
+        try:
+            cursor = conn.cursor(**kwargs)
+            try:
+                yield cursor
+                conn.commit()
+            except BaseException:
+                try:
+                    conn.rollback()
+                except Error:
+                    pass
+                raise
+            finally:
+                cursor.close()
+        finally:
+            self.release(conn)
+
+    def _preparada(self, conn, query):
+        """Cursor preparado de conn para query, creado la primera vez"""
+        with self._cond:
+            cache = self._sentencias.setdefault(conn, OrderedDict())
+            cursor = cache.get(query)
+            if cursor is not None:
+                cache.move_to_end(query)
+                self._stmt_hits += 1
+                return cursor
+            self._stmt_misses += 1
+            vieja = None
+            if len(cache) >= self.stmt_cache:
+                vieja = cache.popitem(last=False)[1]
+                self._stmt_evictions += 1
+
+        if vieja is not None:
+            self._cerrar_cursor(vieja)  # DEALLOCATE PREPARE en el servidor
+        cursor = conn.cursor(prepared=True)
+        with self._cond:
+            cache[query] = cursor
+        return cursor
+
+    def _descartar_sentencia(self, conn, query):
+        with self._cond:
+            cursor = self._sentencias.get(conn, {}).pop(query, None)
+        if cursor is not None:
+            self._cerrar_cursor(cursor)
+
+    @staticmethod
+    def _cerrar_cursor(cursor):
+        try:
+            cursor.close()
+        except Error:
+            pass
+
+    def consultar(self, query, params=(), uno=False):
+        """Lectura con una sentencia preparada, cacheada por conexión.
+
+        La primera vez que una conexión ve query la prepara (el servidor la
+        analiza y planifica una sola vez) y guarda el cursor; las siguientes
+        solo envían los parámetros, en binario. Pensado para las consultas
+        cortas y frecuentes por clave. Devuelve todas las filas, o con
+        uno=True la primera (None si no hay).
+        """
+        conn = self.acquire()
+        try:
+            cursor = self._preparada(conn, query)
+            try:
+                cursor.execute(query, params)
+                filas = cursor.fetchall()
+            except Error:
+                self._descartar_sentencia(conn, query)
+                raise
+        finally:
+            self.release(conn)
+        if uno:
+            return filas[0] if filas else None
+        return filas
+
+    @contextmanager
+    def stream(self, query, params=(), lote=1000):
+        """Ejecutar query con un cursor sin buffer y leer el resultado por bloques.
+
+        Devuelve (nombres de columnas, generador de bloques de hasta lote
+        filas). El servidor envía las filas a medida que se leen, así
+        recorrer un millón ocupa solo la memoria de un bloque. La conexión
+        queda ocupada hasta salir del with; si se sale sin leer todo, tiene
+        filas pendientes y se cierra en lugar de volver al pool.
+        """
+        conn = self.acquire()
+        cursor = None
+        leido = False
+        try:
+            cursor = conn.cursor(buffered=False)
+            # Escribir un archivo puede demorar la lectura más que el default (60 s)
+            cursor.execute("SET SESSION net_write_timeout = 600")
+            cursor.execute(query, params)
+
+            def bloques():
+                nonlocal leido
+                while True:
+                    filas = cursor.fetchmany(lote)
+                    if not filas:
+                        leido = True
+                        return
+                    yield filas
+
+            yield cursor.column_names, bloques()
+        finally:
+            if leido:
+                try:
+                    # La conexión vuelve al pool con el timeout de siempre
+                    cursor.execute("SET SESSION net_write_timeout = DEFAULT")
+                    cursor.close()
+                except Error:
+                    leido = False
+            self.release(conn, descartar=not leido)
+
+    def stats(self):
+        """Estado del pool: conexiones en uso, libres y tiempos de espera"""
+        with self._cond:
+            return {
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "open": self._open,
+                "max_size": self.pool_size,
+                "checkouts": self._checkouts,
+                "wait_total_ms": self._wait_total * 1000,
+                "wait_avg_ms": (
+                    self._wait_total * 1000 / self._checkouts if self._checkouts else 0.0
+                ),
+                "wait_max_ms": self._wait_max * 1000,
+                "timeouts": self._timeouts,
+                "reconnects": self._reconnects,
+                "stmt_cached": sum(len(cache) for cache in self._sentencias.values()),
+                "stmt_hits": self._stmt_hits,
+                "stmt_misses": self._stmt_misses,
+                "stmt_evictions": self._stmt_evictions,
+                "stmt_hit_rate": (
+                    self._stmt_hits / (self._stmt_hits + self._stmt_misses)
+                    if self._stmt_hits + self._stmt_misses
+                    else 0.0
+                ),
+            }
+
     def disconnect(self):
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
-            print("Conexión a la base de datos cerrada")
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            ociosas = [conn for conn, _ in self._idle]
+            self._open -= len(ociosas)
+            self._idle.clear()
+            for conn in ociosas:
+                self._sentencias.pop(conn, None)
+            self._cond.notify_all()
+
+        # Las conexiones en uso se cierran al devolverse
+        for conn in ociosas:
+            try:
+                conn.close()
+            except Error:
+                pass
+        print("Conexión a la base de datos cerrada")
@@ -0,0 +1,188 @@
+# database/metricas.py
+import sys
+import os
+import inspect
+import logging
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    from config.config import DB_SLOW_QUERY_MS, DB_SLOW_QUERY_LOG
+except ImportError:
+    DB_SLOW_QUERY_MS = 500  # Milisegundos a partir de los que una consulta es lenta
+    DB_SLOW_QUERY_LOG = "consultas_lentas.log"
+
+MUESTRAS = 1000  # Duraciones guardadas por método para los percentiles
+LENTAS_RECIENTES = 100  # Consultas lentas que se muestran en Diagnóstico
+
+# Métodos que devuelven filas leídas; el resto devuelve estados como
+# (ok, mensaje), Reserva o ResultadoSerie, que no son filas
+PREFIJOS_LECTURA = ("obtener_", "buscar_")
+
+
+def filas_de(resultado, lectura=True):
+    """Cantidad de filas que devolvió (o escribió, en lote) un método de consulta"""
+    if hasattr(resultado, "procesadas"):
+        return resultado.procesadas  # ResultadoLote
+    if not lectura or resultado is None or isinstance(resultado, bool):
+        return 0
+    if isinstance(resultado, list):
+        return len(resultado)
+    if isinstance(resultado, tuple):
+        return 1  # fetchone
+    return 0
+
+
+def percentil(ordenadas, p):
+    if not ordenadas:
+        return 0.0
+    return ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * p / 100))]
+
+
+class MetricasConsultas:
+    """Cantidad de llamadas, filas y latencias de cada método de *Queries.
+
+    Los percentiles (p50/p95/p99) salen de las últimas MUESTRAS duraciones
+    de cada método. Las llamadas que superan umbral_ms van al log de
+    consultas lentas y a una lista de las más recientes.
+    """
+
+    def __init__(self, umbral_ms=DB_SLOW_QUERY_MS, archivo=DB_SLOW_QUERY_LOG):
+        self.umbral_ms = umbral_ms
+        self.archivo = archivo
+        self._lock = threading.Lock()
+        self._metodos = {}  # método -> dict con contadores y muestras
+        self.lentas = deque(maxlen=LENTAS_RECIENTES)  # (momento, método, ms, detalle)
+        self._log = None
+
+    def registrar(self, metodo, segundos, filas, error=None, detalle=""):
+        ms = segundos * 1000
+        with self._lock:
+            datos = self._metodos.get(metodo)
+            if datos is None:
+                datos = self._metodos[metodo] = {
+                    "llamadas": 0,
+                    "errores": 0,
+                    "filas": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "muestras": deque(maxlen=MUESTRAS),
+                }
+            datos["llamadas"] += 1
+            datos["filas"] += filas
+            datos["total_ms"] += ms
+            datos["max_ms"] = max(datos["max_ms"], ms)
+            datos["muestras"].append(ms)
+            if error is not None:
+                datos["errores"] += 1
+            lenta = ms >= self.umbral_ms
+            if lenta:
+                self.lentas.append((time.strftime("%Y-%m-%d %H:%M:%S"), metodo, ms, detalle))
+
+        if lenta:
+            estado = f"error: {error}" if error is not None else f"{filas} filas"
+            self._logger().warning("%s %.0f ms (%s) %s", metodo, ms, estado, detalle)
+
+    def _logger(self):
+        if self._log is None:
+            log = logging.getLogger("consultorio.consultas_lentas")
+            if self.archivo and not log.handlers:
+                handler = logging.FileHandler(self.archivo, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+                log.addHandler(handler)
+                log.propagate = False
+            self._log = log
+        return self._log
+
+    def stats(self):
+        """{método: llamadas, errores, filas, p50/p95/p99/max y total en ms}"""
+        with self._lock:
+            copia = {
+                metodo: dict(datos, muestras=sorted(datos["muestras"]))
+                for metodo, datos in self._metodos.items()
+            }
+        resultado = {}
+        for metodo, datos in copia.items():
+            muestras = datos.pop("muestras")
+            datos["p50_ms"] = percentil(muestras, 50)
+            datos["p95_ms"] = percentil(muestras, 95)
+            datos["p99_ms"] = percentil(muestras, 99)
+            resultado[metodo] = datos
+        return resultado
+
+    def lentas_recientes(self):
+        """[(momento, método, ms, detalle)], la más reciente primero"""
+        with self._lock:
+            return list(reversed(self.lentas))
+
+    def reiniciar(self):
+        with self._lock:
+            self._metodos.clear()
+            self.lentas.clear()
+
+
+metricas = MetricasConsultas()
+
+
+def medida(func, con_argumentos=True, lectura=True):
+    """Decorador: registrar duración, filas y errores de cada llamada a func.
+
+    Con lectura=False el resultado no se cuenta como filas leídas.
+    """
+    nombre = func.__qualname__
+
+    def detalle(segundos, args, kwargs):
+        # Los argumentos solo se formatean para el log de las lentas
+        if not con_argumentos or segundos * 1000 < metricas.umbral_ms:
+            return ""
+        partes = [repr(a) for a in args[1:]] + [f"{k}={v!r}" for k, v in kwargs.items()]
+        return f"({', '.join(partes)[:200]})"
+
+    @wraps(func)
+    def envoltura(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            resultado = func(*args, **kwargs)
+        except Exception as e:
+            segundos = time.perf_counter() - inicio
+            metricas.registrar(nombre, segundos, 0, e, detalle(segundos, args, kwargs))
+            raise
+        segundos = time.perf_counter() - inicio
+        if not hasattr(resultado, "__enter__"):
+            # Los streams (exportar_*) se miden recién al leerlos
+            metricas.registrar(
+                nombre,
+                segundos,
+                filas_de(resultado, lectura),
+                None,
+                detalle(segundos, args, kwargs),
+            )
+        return resultado
+
+    return envoltura
+
+
+def instrumentada(cls=None, con_argumentos=True):
+    """Decorador de clase: aplicar medida a todos los métodos públicos.
+
+    Se saltean los staticmethod y los generadores (su trabajo ocurre al
+    recorrerlos). Solo los métodos de PREFIJOS_LECTURA cuentan filas leídas.
+    Con con_argumentos=False el log de lentas no incluye los argumentos
+    (clases que reciben contraseñas).
+    """
+
+    def decorador(cls):
+        for nombre, valor in list(vars(cls).items()):
+            if nombre.startswith("_") or not inspect.isfunction(valor):
+                continue
+            if inspect.isgeneratorfunction(inspect.unwrap(valor)):
+                continue
+            lectura = nombre.startswith(PREFIJOS_LECTURA)
+            setattr(cls, nombre, medida(valor, con_argumentos, lectura))
+        return cls
+
+    return decorador(cls) if cls is not None else decorador
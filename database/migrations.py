@@ -0,0 +1,415 @@
+# database/migrations.py
+"""Migraciones versionadas del esquema.
+
+Cada migración tiene un número de versión y se aplica una sola vez; la
+versión aplicada queda registrada en la tabla SchemaVersion. Todas son
+idempotentes (CREATE ... IF NOT EXISTS, índices creados solo si faltan), así
+que una base creada a mano antes de este módulo se pone al día sin errores.
+"""
+from mysql.connector import Error
+
+TABLAS = [
+    """
+    CREATE TABLE IF NOT EXISTS ObraSocial (
+        id_obra_social INT AUTO_INCREMENT PRIMARY KEY,
+        nombre VARCHAR(100) NOT NULL,
+        direccion VARCHAR(200),
+        telefono VARCHAR(30),
+        correo_electronico VARCHAR(100)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Paciente (
+        id_paciente INT AUTO_INCREMENT PRIMARY KEY,
+        dni VARCHAR(20) NOT NULL,
+        apellido VARCHAR(100) NOT NULL,
+        nombre VARCHAR(100) NOT NULL,
+        telefono VARCHAR(30),
+        correo_electronico VARCHAR(100),
+        fecha_de_nacimiento DATE,
+        direccion VARCHAR(200),
+        id_obra_social INT,
+        FOREIGN KEY (id_obra_social) REFERENCES ObraSocial (id_obra_social)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Doctor (
+        id_doctor INT AUTO_INCREMENT PRIMARY KEY,
+        dni VARCHAR(20) NOT NULL,
+        matricula VARCHAR(30) NOT NULL,
+        apellido VARCHAR(100) NOT NULL,
+        nombre VARCHAR(100) NOT NULL,
+        telefono VARCHAR(30),
+        correo_electronico VARCHAR(100),
+        especialidad VARCHAR(100) DEFAULT 'Cardiología'
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Rol (
+        id_rol INT AUTO_INCREMENT PRIMARY KEY,
+        nombre_rol VARCHAR(50) NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Usuario (
+        id_usuario INT AUTO_INCREMENT PRIMARY KEY,
+        nombre_usuario VARCHAR(50) NOT NULL UNIQUE,
+        contrasena CHAR(64) NOT NULL,
+        id_rol INT NOT NULL,
+        id_doctor INT,
+        FOREIGN KEY (id_rol) REFERENCES Rol (id_rol),
+        FOREIGN KEY (id_doctor) REFERENCES Doctor (id_doctor)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Turno (
+        id_turno INT AUTO_INCREMENT PRIMARY KEY,
+        id_paciente INT NOT NULL,
+        id_doctor INT NOT NULL,
+        fecha DATE NOT NULL,
+        hora TIME NOT NULL,
+        motivo_de_consulta TEXT,
+        es_particular BOOLEAN NOT NULL DEFAULT FALSE,
+        FOREIGN KEY (id_paciente) REFERENCES Paciente (id_paciente),
+        FOREIGN KEY (id_doctor) REFERENCES Doctor (id_doctor)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Facturacion (
+        id_factura INT AUTO_INCREMENT PRIMARY KEY,
+        id_turno INT NOT NULL,
+        fecha_emision DATE NOT NULL,
+        monto DECIMAL(10, 2) NOT NULL,
+        observacion TEXT,
+        pagado BOOLEAN NOT NULL DEFAULT FALSE,
+        FOREIGN KEY (id_turno) REFERENCES Turno (id_turno)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS FichaMedica (
+        id_ficha_medica INT AUTO_INCREMENT PRIMARY KEY,
+        id_paciente INT NOT NULL,
+        id_doctor INT,
+        fecha_apertura DATE NOT NULL,
+        grupo_sanguineo VARCHAR(5),
+        alergias TEXT,
+        antecedentes_personales TEXT,
+        antecedentes_familiares TEXT,
+        medicacion_actual TEXT,
+        FOREIGN KEY (id_paciente) REFERENCES Paciente (id_paciente),
+        FOREIGN KEY (id_doctor) REFERENCES Doctor (id_doctor)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS ConsultaMedica (
+        id_consulta INT AUTO_INCREMENT PRIMARY KEY,
+        id_ficha_medica INT NOT NULL,
+        fecha_consulta DATE NOT NULL,
+        diagnostico TEXT,
+        tratamiento TEXT,
+        observaciones TEXT,
+        FOREIGN KEY (id_ficha_medica) REFERENCES FichaMedica (id_ficha_medica)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS RecetaMedica (
+        id_receta INT AUTO_INCREMENT PRIMARY KEY,
+        id_consulta INT NOT NULL,
+        medicamento VARCHAR(150) NOT NULL,
+        dosis VARCHAR(100),
+        frecuencia VARCHAR(100),
+        duracion VARCHAR(100),
+        FOREIGN KEY (id_consulta) REFERENCES ConsultaMedica (id_consulta)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS EstudioMedico (
+        id_estudio INT AUTO_INCREMENT PRIMARY KEY,
+        id_consulta INT NOT NULL,
+        tipo_estudio VARCHAR(100) NOT NULL,
+        fecha_estudio DATE,
+        resultados TEXT,
+        FOREIGN KEY (id_consulta) REFERENCES ConsultaMedica (id_consulta)
+    )
+    """,
+]
+
+ROLES = ["Administrador", "Cardiólogo", "Secretaria"]
+
+# (tabla, nombre del índice, columnas) según los filtros y órdenes de queries.py
+INDICES = [
+    # Listado paginado y búsqueda por apellido/nombre/DNI
+    ("Paciente", "idx_paciente_apellido_nombre", "apellido, nombre"),
+    ("Paciente", "idx_paciente_nombre", "nombre"),
+    ("Paciente", "idx_paciente_dni", "dni"),
+    ("Doctor", "idx_doctor_apellido_nombre", "apellido, nombre"),
+    ("Doctor", "idx_doctor_dni", "dni"),
+    # verificar_disponibilidad y agenda por doctor (lo reemplaza el índice
+    # único uq_turno_doctor_fecha_hora en cuanto se puede crear)
+    ("Turno", "idx_turno_doctor_fecha_hora", "id_doctor, fecha, hora"),
+    # Listado de turnos por rango de fechas
+    ("Turno", "idx_turno_fecha_hora", "fecha, hora"),
+    ("Turno", "idx_turno_paciente", "id_paciente"),
+    # Turnos sin facturar y eliminación de turnos
+    ("Facturacion", "idx_facturacion_turno", "id_turno"),
+    # Listado de facturas por fecha y filtro de pagadas
+    ("Facturacion", "idx_facturacion_fecha", "fecha_emision"),
+    ("Facturacion", "idx_facturacion_pagado_fecha", "pagado, fecha_emision"),
+    ("FichaMedica", "idx_ficha_paciente", "id_paciente"),
+    ("FichaMedica", "idx_ficha_fecha_apertura", "fecha_apertura"),
+    ("ConsultaMedica", "idx_consulta_ficha_fecha", "id_ficha_medica, fecha_consulta"),
+    ("RecetaMedica", "idx_receta_consulta", "id_consulta"),
+    ("EstudioMedico", "idx_estudio_consulta_fecha", "id_consulta, fecha_estudio"),
+]
+
+
+def existe_indice(cursor, tabla, nombre):
+    cursor.execute(
+        """
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+        """,
+        (tabla, nombre),
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def existe_columna(cursor, tabla, columna):
+    cursor.execute(
+        """
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+        """,
+        (tabla, columna),
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def crear_indice(cursor, tabla, nombre, columnas, tipo=""):
+    """Crear el índice solo si no existe (MySQL no tiene CREATE INDEX IF NOT EXISTS)"""
+    if not existe_indice(cursor, tabla, nombre):
+        cursor.execute(f"CREATE {tipo} INDEX {nombre} ON {tabla} ({columnas})")
+        print(f"🗂️ Índice creado: {tabla}.{nombre}")
+
+
+def borrar_indice(cursor, tabla, nombre):
+    if existe_indice(cursor, tabla, nombre):
+        cursor.execute(f"DROP INDEX {nombre} ON {tabla}")
+        print(f"🗂️ Índice borrado: {tabla}.{nombre}")
+
+
+def migracion_esquema_inicial(cursor):
+    for sql in TABLAS:
+        cursor.execute(sql)
+
+    # Roles base solo en una instalación nueva
+    cursor.execute("SELECT COUNT(*) FROM Rol")
+    if cursor.fetchone()[0] == 0:
+        cursor.executemany(
+            "INSERT INTO Rol (nombre_rol) VALUES (%s)", [(r,) for r in ROLES]
+        )
+
+
+def migracion_indices(cursor):
+    for tabla, nombre, columnas in INDICES:
+        crear_indice(cursor, tabla, nombre, columnas)
+
+
+def asegurar_turno_unico(cursor):
+    """Índice único (doctor, fecha, hora): la base rechaza un doble turno exacto.
+
+    Si ya hay turnos duplicados no se puede crear; se avisa y la reserva
+    queda protegida solo por el bloqueo de TurnosQueries.reservar_turno.
+    migrar() lo vuelve a intentar en cada arranque hasta que se corrijan
+    los duplicados. Con el índice único, el común sobre las mismas columnas
+    (migración 2) sobra. Devuelve True si el índice único existe.
+    """
+    if existe_indice(cursor, "Turno", "uq_turno_doctor_fecha_hora"):
+        borrar_indice(cursor, "Turno", "idx_turno_doctor_fecha_hora")
+        return True
+
+    cursor.execute(
+        """
+        SELECT COUNT(*) FROM (
+            SELECT 1 FROM Turno GROUP BY id_doctor, fecha, hora HAVING COUNT(*) > 1
+        ) duplicados
+        """
+    )
+    duplicados = cursor.fetchone()[0]
+    if duplicados:
+        print(
+            f"⚠️ {duplicados} horarios con turnos duplicados: "
+            "no se creó el índice único de Turno (se reintenta al próximo arranque)"
+        )
+        return False
+    crear_indice(
+        cursor, "Turno", "uq_turno_doctor_fecha_hora", "id_doctor, fecha, hora", "UNIQUE"
+    )
+    borrar_indice(cursor, "Turno", "idx_turno_doctor_fecha_hora")
+    return True
+
+
+def migracion_turno_unico(cursor):
+    asegurar_turno_unico(cursor)
+
+
+def migracion_series(cursor):
+    """Series de turnos recurrentes: cada turno puede pertenecer a una serie"""
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS SerieTurno (
+            id_serie INT AUTO_INCREMENT PRIMARY KEY,
+            frecuencia VARCHAR(10) NOT NULL,
+            intervalo INT NOT NULL,
+            hasta DATE,
+            cantidad INT,
+            creada_en DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    if not existe_columna(cursor, "Turno", "id_serie"):
+        cursor.execute(
+            """
+            ALTER TABLE Turno ADD COLUMN id_serie INT NULL,
+            ADD CONSTRAINT fk_turno_serie
+                FOREIGN KEY (id_serie) REFERENCES SerieTurno (id_serie)
+            """
+        )
+    crear_indice(cursor, "Turno", "idx_turno_serie_fecha", "id_serie, fecha")
+
+
+def migracion_facturacion_lote(cursor):
+    """Tarifas por obra social y práctica, y registro de corridas de facturación"""
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS Tarifa (
+            id_tarifa INT AUTO_INCREMENT PRIMARY KEY,
+            id_obra_social INT NULL,
+            practica VARCHAR(50) NOT NULL DEFAULT 'consulta',
+            monto DECIMAL(10, 2) NOT NULL,
+            vigente_desde DATE NOT NULL,
+            FOREIGN KEY (id_obra_social) REFERENCES ObraSocial (id_obra_social)
+        )
+        """
+    )
+    crear_indice(
+        cursor, "Tarifa", "idx_tarifa_clave", "id_obra_social, practica, vigente_desde"
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS CorridaFacturacion (
+            id_corrida INT AUTO_INCREMENT PRIMARY KEY,
+            fecha_desde DATE NOT NULL,
+            fecha_hasta DATE NOT NULL,
+            fecha_emision DATE NOT NULL,
+            practica VARCHAR(50) NOT NULL,
+            estado VARCHAR(12) NOT NULL DEFAULT 'en_curso',
+            procesados INT NOT NULL DEFAULT 0,
+            facturados INT NOT NULL DEFAULT 0,
+            sin_tarifa INT NOT NULL DEFAULT 0,
+            iniciada_en DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            actualizada_en DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+                ON UPDATE CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+
+def migracion_resumen_facturacion(cursor):
+    """Resumen diario de facturación (día × obra social × doctor × pagado).
+
+    id_obra_social = 0 agrupa a los particulares y a los pacientes sin obra
+    social. Se llena una vez desde Facturacion; después lo mantienen al día
+    las altas, cambios y bajas de FacturacionQueries.
+    """
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ResumenFacturacion (
+            fecha DATE NOT NULL,
+            id_obra_social INT NOT NULL DEFAULT 0,
+            id_doctor INT NOT NULL,
+            pagado BOOLEAN NOT NULL,
+            cantidad INT NOT NULL DEFAULT 0,
+            total DECIMAL(14, 2) NOT NULL DEFAULT 0,
+            PRIMARY KEY (fecha, id_obra_social, id_doctor, pagado)
+        )
+        """
+    )
+    cursor.execute("DELETE FROM ResumenFacturacion")
+    cursor.execute(
+        """
+        INSERT INTO ResumenFacturacion
+            (fecha, id_obra_social, id_doctor, pagado, cantidad, total)
+        SELECT f.fecha_emision,
+               CASE WHEN t.es_particular THEN 0 ELSE COALESCE(p.id_obra_social, 0) END,
+               t.id_doctor, f.pagado, COUNT(*), SUM(f.monto)
+        FROM Facturacion f
+        JOIN Turno t ON f.id_turno = t.id_turno
+        JOIN Paciente p ON t.id_paciente = p.id_paciente
+        GROUP BY 1, 2, 3, 4
+        """
+    )
+
+
+# (versión, descripción, función) en orden; nunca renumerar las ya publicadas
+MIGRACIONES = [
+    (1, "Esquema inicial", migracion_esquema_inicial),
+    (2, "Índices para las consultas del sistema", migracion_indices),
+    (3, "Turno único por doctor, fecha y hora", migracion_turno_unico),
+    (4, "Series de turnos recurrentes", migracion_series),
+    (5, "Tarifas y facturación por lote", migracion_facturacion_lote),
+    (6, "Resumen diario de facturación", migracion_resumen_facturacion),
+]
+
+LOCK_NAME = "consultorio_migraciones"
+
+
+def version_actual(cursor):
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS SchemaVersion (
+            version INT PRIMARY KEY,
+            descripcion VARCHAR(200) NOT NULL,
+            aplicada_en DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM SchemaVersion")
+    return cursor.fetchone()[0]
+
+
+def migrar(db):
+    """Aplicar las migraciones pendientes. Devuelve la versión final del esquema.
+
+    Un lock con nombre evita que dos puestos migren a la vez al arrancar.
+    """
+    conn = db.acquire()
+    cursor = conn.cursor(buffered=True)
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, 30)", (LOCK_NAME,))
+        if cursor.fetchone()[0] != 1:
+            raise Error(msg="No se pudo obtener el lock de migraciones")
+        try:
+            version = version_actual(cursor)
+            for numero, descripcion, migracion in MIGRACIONES:
+                if numero <= version:
+                    continue
+                print(f"🔧 Aplicando migración {numero}: {descripcion}")
+                migracion(cursor)
+                cursor.execute(
+                    "INSERT INTO SchemaVersion (version, descripcion) VALUES (%s, %s)",
+                    (numero, descripcion),
+                )
+                conn.commit()
+                version = numero
+            if version >= 3:
+                # La migración 3 pudo quedar sin índice único por turnos duplicados
+                asegurar_turno_unico(cursor)
+                conn.commit()
+            return version
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+            cursor.fetchall()
+    finally:
+        cursor.close()
+        db.release(conn)
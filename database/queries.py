@@ -1,7 +1,377 @@
 # database/queries.py
+import random
+import threading
+import time
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import date, datetime
+from functools import wraps
+from itertools import islice
+
 from mysql.connector import Error
 
+from database.cache import DB_LOOKUP_TTL, invalida, lookup_cache
+from database.metricas import instrumentada
+from utils.agenda import Agenda, a_datetime
+from utils.prefix_index import PrefixIndex
+from utils.recurrencia import generar_fechas
+
+try:
+    from config.config import (
+        AGENDA_DURACION_TURNO,
+        AGENDA_HORIZONTE_DIAS,
+        AGENDA_HORARIO,
+        AGENDA_HORARIOS_DOCTOR,
+    )
+except ImportError:
+    AGENDA_DURACION_TURNO = 30
+    AGENDA_HORIZONTE_DIAS = 60
+    AGENDA_HORARIO = {dia: ("08:00", "20:00") for dia in range(5)}
+    AGENDA_HORARIOS_DOCTOR = {}
+
+try:
+    from config.config import DB_BULK_CHUNK
+except ImportError:
+    DB_BULK_CHUNK = 500
+
+try:
+    from config.config import EXPORT_LOTE
+except ImportError:
+    EXPORT_LOTE = 1000
+
+
+def paginar_keyset(
+    query, params, columnas, descendente=False, limit=None, after=None, before=None
+):
+    """Completar una consulta (que ya tiene su WHERE) con orden y paginación keyset.
+
+    columnas es la clave de orden completa y debe terminar en la PK para ser
+    única. after/before son los valores de esa clave en la última/primera
+    fila ya mostrada. Para traer la página anterior se recorre en sentido
+    inverso, así que el llamador debe invertir el resultado cuando usa before.
+    """
+    params = list(params)
+    tupla = "(" + ", ".join(columnas) + ")"
+    marcadores = "(" + ", ".join(["%s"] * len(columnas)) + ")"
+
+    if after is not None:
+        query += f" AND {tupla} {'<' if descendente else '>'} {marcadores}"
+        params.extend(after)
+    if before is not None:
+        query += f" AND {tupla} {'>' if descendente else '<'} {marcadores}"
+        params.extend(before)
+
+    ascendente = descendente if before is not None else not descendente
+    direccion = "ASC" if ascendente else "DESC"
+    query += " ORDER BY " + ", ".join(f"{c} {direccion}" for c in columnas)
+
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+    return query, params
+
+
+def escapar_like(texto):
+    """Escapar los comodines de LIKE para buscar el texto tal cual"""
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+LIMITE_BUSQUEDA = 100
+
+
+def buscar_con_fallback(connection, select, columna, texto, orden, limit):
+    """Buscar texto al principio de columna y, si no hay resultados, en cualquier parte.
+
+    La búsqueda por prefijo puede usar el índice de la columna. La de
+    subcadena recorre la tabla, por eso solo corre cuando la primera no
+    encontró nada, y ordena los resultados por dónde aparece el texto (antes
+    es mejor) y por largo del valor. Mayúsculas y acentos se ignoran según la
+    collation de la columna (utf8mb4_0900_ai_ci por defecto en MySQL 8).
+    """
+    texto = texto.strip()
+    if not texto:
+        return []
+
+    patron = escapar_like(texto)
+    query_prefijo = f"{select} WHERE {columna} LIKE %s ORDER BY {orden} LIMIT %s"
+    query_subcadena = f"""{select} WHERE {columna} LIKE %s
+        ORDER BY LOCATE(%s, {columna}), CHAR_LENGTH({columna}), {orden}
+        LIMIT %s"""
+
+    with connection.cursor() as cursor:
+        cursor.execute(query_prefijo, (f"{patron}%", limit))
+        filas = cursor.fetchall()
+        if not filas:
+            cursor.execute(query_subcadena, (f"%{patron}%", texto, limit))
+            filas = cursor.fetchall()
+        return filas
+
+
+# Resultado de ejecutar_en_lotes: errores es una lista de (índice, fila, mensaje)
+ResultadoLote = namedtuple("ResultadoLote", ["procesadas", "errores"])
+
+
+def ejecutar_en_lotes(
+    connection, query, filas, chunk_size=DB_BULK_CHUNK, antes=None, despues=None
+):
+    """Ejecutar query para muchas filas con executemany, una transacción por bloque.
+
+    Con un INSERT ... VALUES, mysql.connector arma un único INSERT de varias
+    filas por bloque. Si un bloque falla se revierte entero y se repite fila
+    por fila en una transacción con SAVEPOINT: las filas válidas se guardan y
+    cada error queda informado con el índice de la fila. filas puede ser un
+    generador; se consume de a un bloque.
+
+    antes(cursor, bloque) y despues(cursor, bloque) corren dentro de la
+    transacción de cada bloque, para mantener tablas derivadas al día.
+    """
+    filas = iter(filas)
+    procesadas = 0
+    errores = []
+    inicio = 0
+    while True:
+        bloque = list(islice(filas, chunk_size))
+        if not bloque:
+            break
+        try:
+            with connection.transaction() as cursor:
+                if antes:
+                    antes(cursor, bloque)
+                cursor.executemany(query, bloque)
+                if despues:
+                    despues(cursor, bloque)
+            procesadas += len(bloque)
+        except Error:
+            with connection.transaction() as cursor:
+                if antes:
+                    antes(cursor, bloque)
+                for i, fila in enumerate(bloque, start=inicio):
+                    cursor.execute("SAVEPOINT fila")
+                    try:
+                        cursor.execute(query, fila)
+                    except Error as e:
+                        cursor.execute("ROLLBACK TO SAVEPOINT fila")
+                        errores.append((i, fila, str(e)))
+                    else:
+                        procesadas += 1
+                if despues:
+                    despues(cursor, bloque)
+        inicio += len(bloque)
+    return ResultadoLote(procesadas, errores)
+
+
+# Aporte de un conjunto de facturas al resumen diario, sumado (signo 1) o
+# restado (signo -1). id_obra_social 0 = particular o sin obra social.
+SUMAR_AL_RESUMEN = """
+    INSERT INTO ResumenFacturacion (fecha, id_obra_social, id_doctor, pagado, cantidad, total)
+    SELECT * FROM (
+        SELECT f.fecha_emision,
+               CASE WHEN t.es_particular THEN 0 ELSE COALESCE(p.id_obra_social, 0) END,
+               t.id_doctor, f.pagado, {signo} * COUNT(*) AS n, {signo} * SUM(f.monto) AS suma
+        FROM Facturacion f
+        JOIN Turno t ON f.id_turno = t.id_turno
+        JOIN Paciente p ON t.id_paciente = p.id_paciente
+        WHERE {condicion}
+        GROUP BY 1, 2, 3, 4
+    ) aporte
+    ON DUPLICATE KEY UPDATE cantidad = cantidad + VALUES(cantidad),
+                            total = total + VALUES(total)
+    """
+
+
+def sumar_al_resumen(cursor, condicion, params, signo=1):
+    """Aplicar al resumen las facturas que cumplen condicion (sobre el alias f)"""
+    cursor.execute(
+        SUMAR_AL_RESUMEN.format(signo=int(signo), condicion=condicion), params
+    )
+
+
+def ajustar_resumen(cursor, factura_ids, signo):
+    """Sumar o restar del resumen el aporte actual de esas facturas.
+
+    Para un cambio se llama con -1 antes y con 1 después, en la misma
+    transacción: así se corrige cualquier columna que haya cambiado. La
+    clave sale de los joins actuales, así que todo cambio en el turno
+    (doctor, tipo) o en el paciente (obra social) de una factura tiene que
+    hacer lo mismo; si no, hay que correr recalcular_resumen.
+    """
+    factura_ids = list(factura_ids)
+    if factura_ids:
+        marcas = ", ".join(["%s"] * len(factura_ids))
+        sumar_al_resumen(cursor, f"f.id_factura IN ({marcas})", factura_ids, signo)
+
+
+def recalcular_resumen(cursor, fecha_desde, fecha_hasta):
+    """Rehacer desde Facturacion los días del resumen entre dos fechas"""
+    cursor.execute(
+        "DELETE FROM ResumenFacturacion WHERE fecha BETWEEN %s AND %s",
+        (fecha_desde, fecha_hasta),
+    )
+    sumar_al_resumen(
+        cursor, "f.fecha_emision BETWEEN %s AND %s", (fecha_desde, fecha_hasta)
+    )
+
+
+def como_fecha(valor):
+    """Aceptar una fecha como date o como texto 'YYYY-MM-DD'"""
+    if valor is None or isinstance(valor, date):
+        return valor
+    return date.fromisoformat(str(valor))
+
+
+# Anti-join: usa el índice de Facturacion(id_turno) en lugar de evaluar un
+# NOT IN contra toda la tabla de facturas para cada turno.
+SELECT_TURNOS_SIN_FACTURAR = """
+    SELECT t.id_turno, t.fecha, t.hora,
+           CONCAT(p.apellido, ', ', p.nombre) as paciente,
+           CONCAT(d.apellido, ', ', d.nombre) as doctor,
+           CASE WHEN t.es_particular THEN 'Particular' ELSE os.nombre END as tipo,
+           t.es_particular, p.id_obra_social
+    FROM Turno t
+    JOIN Paciente p ON t.id_paciente = p.id_paciente
+    JOIN Doctor d ON t.id_doctor = d.id_doctor
+    LEFT JOIN ObraSocial os ON p.id_obra_social = os.id_obra_social
+    LEFT JOIN Facturacion f ON f.id_turno = t.id_turno
+    WHERE f.id_factura IS NULL
+    """
+
+
+class TurnosSinFacturar:
+    """Turnos sin factura, cargados una vez y mantenidos al día.
+
+    La primera consulta trae el conjunto completo; después las altas, bajas
+    y cambios de turnos y facturas llaman a refrescar() con los turnos
+    afectados, que se releen de a uno. Como LookupCache, el conjunto vence a
+    los ttl segundos por si otro puesto reservó o facturó turnos.
+    """
+
+    def __init__(self, ttl=DB_LOOKUP_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._filas = None  # id_turno -> fila
+        self._vence = 0.0
+
+    def obtener(self, connection, fecha_desde=None, fecha_hasta=None):
+        fecha_desde, fecha_hasta = como_fecha(fecha_desde), como_fecha(fecha_hasta)
+        with self._lock:
+            if self._filas is None or self._vence <= time.monotonic():
+                with connection.cursor() as cursor:
+                    cursor.execute(SELECT_TURNOS_SIN_FACTURAR)
+                    self._filas = {fila[0]: fila for fila in cursor.fetchall()}
+                self._vence = time.monotonic() + self.ttl
+            filas = [
+                fila
+                for fila in self._filas.values()
+                if (fecha_desde is None or fila[1] >= fecha_desde)
+                and (fecha_hasta is None or fila[1] <= fecha_hasta)
+            ]
+        return sorted(filas, key=lambda fila: (fila[1], fila[2], fila[0]))
+
+    def refrescar(self, connection, *ids_turno):
+        """Releer esos turnos después de un cambio ya confirmado"""
+        ids = [i for i in ids_turno if i is not None]
+        with self._lock:
+            if self._filas is None or not ids:
+                return
+            query = SELECT_TURNOS_SIN_FACTURAR + " AND t.id_turno IN ({})".format(
+                ", ".join(["%s"] * len(ids))
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(query, ids)
+                filas = cursor.fetchall()
+            for id_turno in ids:
+                self._filas.pop(id_turno, None)
+            for fila in filas:
+                self._filas[fila[0]] = fila
+
+    def invalidar(self):
+        with self._lock:
+            self._filas = None
+
+
+turnos_sin_facturar = TurnosSinFacturar()
+# Las filas incluyen nombres de paciente y doctor
+lookup_cache.subscribe("pacientes", turnos_sin_facturar.invalidar)
+lookup_cache.subscribe("doctores", turnos_sin_facturar.invalidar)
+
+
+# Índices de prefijos para los selectores de paciente y doctor, compartidos
+# por todos los formularios. Se construyen la primera vez que se piden y se
+# reconstruyen al vencer, como las listas de lookup_cache.
+indice_pacientes = PrefixIndex(ttl=DB_LOOKUP_TTL)
+indice_doctores = PrefixIndex(ttl=DB_LOOKUP_TTL)
+
+
+# Turnos ocupados por doctor para los próximos días; ver TurnosQueries.obtener_agenda
+agenda = Agenda(
+    duracion=AGENDA_DURACION_TURNO,
+    horario=AGENDA_HORARIO,
+    horarios_doctor=AGENDA_HORARIOS_DOCTOR,
+    horizonte_dias=AGENDA_HORIZONTE_DIAS,
+    ttl=DB_LOOKUP_TTL,
+)
+
+# Resultado de TurnosQueries.reservar_turno. Si ok es False, conflicto es el
+# id del turno que se superpone (None si el problema es otro) y libres, los
+# próximos horarios libres del doctor.
+Reserva = namedtuple("Reserva", ["ok", "id_turno", "mensaje", "conflicto", "libres"])
+
+# Errores de MySQL ante los que conviene reintentar la transacción
+ER_LOCK_WAIT_TIMEOUT = 1205
+ER_LOCK_DEADLOCK = 1213
+ER_DUP_ENTRY = 1062
+
+
+def esperar_reintento(e, intento, intentos):
+    """True (tras una pausa al azar) si la transacción abortada por e se puede reintentar"""
+    if e.errno in (ER_LOCK_DEADLOCK, ER_LOCK_WAIT_TIMEOUT) and intento < intentos:
+        time.sleep(random.uniform(0.02, 0.1) * intento)
+        return True
+    return False
+
+
+# Resultado de las operaciones sobre series de turnos. conflictos es una
+# lista de (fecha, id_turno) con los turnos que impiden la serie; id_turno es
+# None si esa fecha cae fuera del horario de atención.
+ResultadoSerie = namedtuple(
+    "ResultadoSerie", ["ok", "id_serie", "mensaje", "conflictos", "turnos"]
+)
+
+
+def hora_sql(desplazamiento):
+    """timedelta desde la medianoche -> literal TIME ('HH:MM:SS', puede pasar de 24)"""
+    total = int(desplazamiento.total_seconds())
+    if total < 0:
+        # Antes de la medianoche: cualquier hora del día es mayor
+        return "-00:00:01"
+    return f"{total // 3600:02d}:{total % 3600 // 60:02d}:{total % 60:02d}"
+
+
+def elemento_indice(fila):
+    """(id, apellido, nombre, dni) -> (id, etiqueta, textos) para PrefixIndex"""
+    return fila[0], f"{fila[1]}, {fila[2]}", fila[1:]
+
+
+def reindexa(por_resultado=False):
+    """Decorador para altas, cambios y bajas: mantener al día el índice de prefijos.
+
+    El id afectado es el primer argumento o, con por_resultado, el valor
+    devuelto (el lastrowid de un alta).
+    """
 
+    def decorador(func):
+        @wraps(func)
+        def envoltura(self, *args, **kwargs):
+            resultado = func(self, *args, **kwargs)
+            self.refrescar_indice(resultado if por_resultado else args[0])
+            return resultado
+
+        return envoltura
+
+    return decorador
+
+
+@instrumentada
 class PacientesQueries:
     def __init__(self, connection):
         self.connection = connection
@@ -13,23 +383,44 @@ class PacientesQueries:
         FROM Paciente
         ORDER BY apellido, nombre
         """
-        cursor = self.connection.cursor()
-        cursor.execute(query)
-        return cursor.fetchall()
 
-    def obtener_pacientes(self):
-        """Obtener todos los pacientes con información completa"""
-        query = """
+        def cargar():
+            with self.connection.cursor() as cursor:
+                cursor.execute(query)
+                return cursor.fetchall()
+
+        return lookup_cache.get("pacientes", cargar)
+
+    ORDEN = ("p.apellido", "p.nombre", "p.id_paciente")
+
+    @staticmethod
+    def clave_orden(fila):
+        """Clave keyset (apellido, nombre, id) de una fila de obtener_pacientes"""
+        return (fila[2], fila[3], fila[0])
+
+    SELECT_LISTADO = """
         SELECT p.id_paciente, p.dni, p.apellido, p.nombre, p.telefono, 
                p.correo_electronico, p.fecha_de_nacimiento, p.direccion,
                COALESCE(os.nombre, 'Particular') as obra_social
         FROM Paciente p
         LEFT JOIN ObraSocial os ON p.id_obra_social = os.id_obra_social
-        ORDER BY p.apellido, p.nombre
+        WHERE 1=1
         """
-        cursor = self.connection.cursor()
-        cursor.execute(query)
-        return cursor.fetchall()
+
+    def obtener_pacientes(self, limit=None, after=None, before=None):
+        """Obtener pacientes con información completa, opcionalmente paginados"""
+        query, params = paginar_keyset(
+            self.SELECT_LISTADO, [], self.ORDEN, limit=limit, after=after, before=before
+        )
+        with self.connection.cursor() as cursor:
+            cursor.execute(query, params)
+            filas = cursor.fetchall()
+        return filas[::-1] if before is not None else filas
+
+    def exportar_pacientes(self, lote=EXPORT_LOTE):
+        """Listado completo de pacientes para exportar (ver DatabaseConnection.stream)"""
+        query, params = paginar_keyset(self.SELECT_LISTADO, [], self.ORDEN)
+        return self.connection.stream(query, params, lote)
 
     def obtener_paciente_por_id(self, paciente_id):
         """Obtener un paciente específico por ID"""
@@ -39,41 +430,105 @@ class PacientesQueries:
         FROM Paciente
         WHERE id_paciente = %s
         """
-        cursor = self.connection.cursor()
-        cursor.execute(query, (paciente_id,))
-        return cursor.fetchone()
+        return self.connection.consultar(query, (paciente_id,), uno=True)
 
-    def buscar_paciente_por_dni(self, dni):
-        """Buscar paciente por DNI"""
-        query = """
+    SELECT_BUSQUEDA = """
         SELECT p.id_paciente, p.dni, p.apellido, p.nombre, p.telefono, 
                p.correo_electronico, p.fecha_de_nacimiento, p.direccion,
                COALESCE(os.nombre, 'Particular') as obra_social
         FROM Paciente p
         LEFT JOIN ObraSocial os ON p.id_obra_social = os.id_obra_social
-        WHERE p.dni LIKE %s
-        ORDER BY p.apellido, p.nombre
         """
-        cursor = self.connection.cursor()
-        cursor.execute(query, (f"%{dni}%",))
-        return cursor.fetchall()
 
-    def insertar_paciente(self, datos_paciente):
-        """Insertar nuevo paciente"""
-        query = """
+    def buscar_paciente_por_dni(self, dni, limit=LIMITE_BUSQUEDA):
+        """Buscar paciente por DNI (prefijo, o subcadena si no hay coincidencias)"""
+        return buscar_con_fallback(
+            self.connection,
+            self.SELECT_BUSQUEDA,
+            "p.dni",
+            dni,
+            "p.dni, p.id_paciente",
+            limit,
+        )
+
+    def buscar_paciente_por_apellido(self, apellido, limit=LIMITE_BUSQUEDA):
+        """Buscar paciente por apellido, sin distinguir mayúsculas ni acentos"""
+        return buscar_con_fallback(
+            self.connection,
+            self.SELECT_BUSQUEDA,
+            "p.apellido",
+            apellido,
+            ", ".join(self.ORDEN),
+            limit,
+        )
+
+    SELECT_INDICE = "SELECT id_paciente, apellido, nombre, dni FROM Paciente"
+
+    def obtener_indice(self):
+        """Índice de prefijos (apellido, nombre, DNI) de todos los pacientes"""
+        if not indice_pacientes.listo:
+            with self.connection.cursor() as cursor:
+                cursor.execute(self.SELECT_INDICE)
+                indice_pacientes.cargar(map(elemento_indice, cursor.fetchall()))
+        return indice_pacientes
+
+    def buscar_para_selector(self, texto, limit=LIMITE_BUSQUEDA):
+        """(id, "Apellido, Nombre") de los pacientes cuyo apellido empieza con texto"""
+        select = """
+        SELECT id_paciente, CONCAT(apellido, ', ', nombre) as nombre_completo
+        FROM Paciente
+        """
+        return buscar_con_fallback(
+            self.connection,
+            select,
+            "apellido",
+            texto,
+            "apellido, nombre, id_paciente",
+            limit,
+        )
+
+    def refrescar_indice(self, paciente_id):
+        """Releer un paciente en el índice, si ya fue construido"""
+        if not indice_pacientes.listo or paciente_id is None:
+            return
+        try:
+            fila = self.connection.consultar(
+                self.SELECT_INDICE + " WHERE id_paciente = %s", (paciente_id,), uno=True
+            )
+        except Error as e:
+            # Mejor reconstruirlo la próxima vez que dejarlo desactualizado
+            print(f"⚠️ No se pudo actualizar el índice de pacientes: {e}")
+            indice_pacientes.invalidar()
+            return
+        if fila:
+            indice_pacientes.agregar(*elemento_indice(fila))
+        else:
+            indice_pacientes.quitar(paciente_id)
+
+    INSERT = """
         INSERT INTO Paciente (dni, apellido, nombre, telefono, correo_electronico, 
                          fecha_de_nacimiento, direccion, id_obra_social)
         VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
         """
-        cursor = self.connection.cursor()
-        try:
-            cursor.execute(query, datos_paciente)
-            self.connection.commit()
+
+    @invalida("pacientes")
+    @reindexa(por_resultado=True)
+    def insertar_paciente(self, datos_paciente):
+        """Insertar nuevo paciente"""
+        with self.connection.transaction() as cursor:
+            cursor.execute(self.INSERT, datos_paciente)
             return cursor.lastrowid
-        except Exception as e:
-            self.connection.rollback()
-            raise e
 
+    @invalida("pacientes")
+    def insertar_pacientes(self, filas, chunk_size=DB_BULK_CHUNK):
+        """Insertar muchos pacientes por bloques (ver ejecutar_en_lotes)"""
+        resultado = ejecutar_en_lotes(self.connection, self.INSERT, filas, chunk_size)
+        # Más barato reconstruir el índice que reindexar fila por fila
+        indice_pacientes.invalidar()
+        return resultado
+
+    @invalida("pacientes")
+    @reindexa()
     def actualizar_paciente(self, paciente_id, datos_paciente):
         """Actualizar paciente existente"""
         query = """
@@ -82,35 +537,48 @@ class PacientesQueries:
             correo_electronico = %s, fecha_de_nacimiento = %s, direccion = %s, id_obra_social = %s
         WHERE id_paciente = %s
         """
-        cursor = self.connection.cursor()
-        try:
+        with self.connection.transaction() as cursor:
+            # Si cambia la obra social, sus facturas pasan a otra fila del resumen
+            sumar_al_resumen(cursor, "t.id_paciente = %s", (paciente_id,), -1)
             cursor.execute(query, (*datos_paciente, paciente_id))
-            self.connection.commit()
+            sumar_al_resumen(cursor, "t.id_paciente = %s", (paciente_id,), 1)
             return cursor.rowcount > 0
-        except Exception as e:
-            self.connection.rollback()
-            raise e
 
+    @invalida("pacientes")
+    @reindexa()
     def eliminar_paciente(self, paciente_id):
         """Eliminar paciente con verificación"""
         # Verificar si el paciente tiene turnos
         query_check = "SELECT COUNT(*) FROM Turno WHERE id_paciente = %s"
-        cursor = self.connection.cursor()
-        cursor.execute(query_check, (paciente_id,))
-        count = cursor.fetchone()[0]
+        try:
+            with self.connection.transaction() as cursor:
+                cursor.execute(query_check, (paciente_id,))
+                count = cursor.fetchone()[0]
 
-        if count > 0:
-            return False
+                if count > 0:
+                    return False
 
-        try:
-            query_delete = "DELETE FROM Paciente WHERE id_paciente = %s"
-            cursor.execute(query_delete, (paciente_id,))
-            self.connection.commit()
-            return cursor.rowcount > 0
+                query_delete = "DELETE FROM Paciente WHERE id_paciente = %s"
+                cursor.execute(query_delete, (paciente_id,))
+                return cursor.rowcount > 0
         except Exception as e:
-            self.connection.rollback()
             return False
 
+    def obtener_dnis(self):
+        """Conjunto de todos los DNI registrados, para descartar duplicados al importar"""
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT dni FROM Paciente")
+            return {fila[0] for fila in cursor}
+
+    @invalida("obras_sociales")
+    def insertar_obras_sociales(self, filas, chunk_size=DB_BULK_CHUNK):
+        """filas = (nombre, direccion, telefono, correo_electronico); ver ejecutar_en_lotes"""
+        query = """
+        INSERT INTO ObraSocial (nombre, direccion, telefono, correo_electronico)
+        VALUES (%s, %s, %s, %s)
+        """
+        return ejecutar_en_lotes(self.connection, query, filas, chunk_size)
+
     def obtener_obras_sociales(self):
         """Obtener todas las obras sociales"""
         query = """
@@ -118,17 +586,28 @@ class PacientesQueries:
         FROM ObraSocial
         ORDER BY nombre
         """
-        cursor = self.connection.cursor()
-        cursor.execute(query)
-        return cursor.fetchall()
 
+        def cargar():
+            with self.connection.cursor() as cursor:
+                cursor.execute(query)
+                return cursor.fetchall()
+
+        return lookup_cache.get("obras_sociales", cargar)
 
+
+@instrumentada
 class TurnosQueries:
     def __init__(self, connection):
         self.connection = connection
 
-    def obtener_turnos(self, fecha_desde=None, fecha_hasta=None):
-        query = """
+    ORDEN = ("t.fecha", "t.hora", "t.id_turno")
+
+    @staticmethod
+    def clave_orden(fila):
+        """Clave keyset (fecha, hora, id) de una fila de obtener_turnos"""
+        return (fila[1], fila[2], fila[0])
+
+    SELECT_LISTADO = """
         SELECT t.id_turno, t.fecha, t.hora, 
                p.id_paciente, CONCAT(p.apellido, ', ', p.nombre) as paciente,
                d.id_doctor, CONCAT(d.apellido, ', ', d.nombre) as doctor,
@@ -137,8 +616,10 @@ class TurnosQueries:
         FROM Turno t
         JOIN Paciente p ON t.id_paciente = p.id_paciente
         JOIN Doctor d ON t.id_doctor = d.id_doctor
-        WHERE 1=1
         """
+
+    def _consulta_turnos(self, fecha_desde=None, fecha_hasta=None):
+        query = self.SELECT_LISTADO + " WHERE 1=1"
         params = []
         if fecha_desde:
             query += " AND t.fecha >= %s"
@@ -146,52 +627,109 @@ class TurnosQueries:
         if fecha_hasta:
             query += " AND t.fecha <= %s"
             params.append(fecha_hasta)
-        query += " ORDER BY t.fecha, t.hora"
-        cursor = self.connection.cursor()
-        cursor.execute(query, params)
-        return cursor.fetchall()
-
-    def obtener_turnos_proximos(self):
-        query = """
-        SELECT t.id_turno, t.fecha, t.hora, 
-               p.id_paciente, CONCAT(p.apellido, ', ', p.nombre) as paciente,
-               d.id_doctor, CONCAT(d.apellido, ', ', d.nombre) as doctor,
-               t.motivo_de_consulta, 
-               CASE WHEN t.es_particular THEN 'Particular' ELSE 'Obra Social' END as tipo
-        FROM Turno t
-        JOIN Paciente p ON t.id_paciente = p.id_paciente
-        JOIN Doctor d ON t.id_doctor = d.id_doctor
-        WHERE t.fecha >= CURDATE()
-        ORDER BY t.fecha, t.hora
-        """
-        cursor = self.connection.cursor()
-        cursor.execute(query)
-        return cursor.fetchall()
+        return query, params
+
+    def obtener_turnos(
+        self, fecha_desde=None, fecha_hasta=None, limit=None, after=None, before=None
+    ):
+        query, params = paginar_keyset(
+            *self._consulta_turnos(fecha_desde, fecha_hasta),
+            self.ORDEN,
+            limit=limit,
+            after=after,
+            before=before,
+        )
+        with self.connection.cursor() as cursor:
+            cursor.execute(query, params)
+            filas = cursor.fetchall()
+        return filas[::-1] if before is not None else filas
+
+    def obtener_turnos_proximos(self, limit=None, after=None, before=None):
+        query, params = paginar_keyset(
+            self.SELECT_LISTADO + " WHERE t.fecha >= CURDATE()",
+            [],
+            self.ORDEN,
+            limit=limit,
+            after=after,
+            before=before,
+        )
+        with self.connection.cursor() as cursor:
+            cursor.execute(query, params)
+            filas = cursor.fetchall()
+        return filas[::-1] if before is not None else filas
+
+    def exportar_turnos(self, fecha_desde=None, fecha_hasta=None, lote=EXPORT_LOTE):
+        """Turnos del rango para exportar (ver DatabaseConnection.stream)"""
+        query, params = paginar_keyset(
+            *self._consulta_turnos(fecha_desde, fecha_hasta), self.ORDEN
+        )
+        return self.connection.stream(query, params, lote)
+
+    def exportar_turnos_proximos(self, lote=EXPORT_LOTE):
+        return self.exportar_turnos(fecha_desde=date.today(), lote=lote)
 
     def obtener_turno_por_id(self, turno_id):
         query = """
-        SELECT id_turno, id_paciente, id_doctor, fecha, hora, motivo_de_consulta, es_particular
+        SELECT id_turno, id_paciente, id_doctor, fecha, hora, motivo_de_consulta,
+               es_particular, id_serie
         FROM Turno
         WHERE id_turno = %s
         """
-        cursor = self.connection.cursor()
-        cursor.execute(query, (turno_id,))
-        return cursor.fetchone()
+        return self.connection.consultar(query, (turno_id,), uno=True)
+
+    SELECT_AGENDA = "SELECT id_turno, id_doctor, fecha, hora FROM Turno"
+
+    def obtener_agenda(self):
+        """Agenda en memoria de los próximos días; se recarga si venció"""
+        if not agenda.listo:
+            desde, hasta = agenda.rango()
+            with self.connection.cursor() as cursor:
+                cursor.execute(
+                    self.SELECT_AGENDA + " WHERE fecha BETWEEN %s AND %s",
+                    (desde, hasta),
+                )
+                agenda.cargar(cursor.fetchall(), desde, hasta)
+            print(f"📅 Agenda cargada: {len(agenda)} turnos hasta {hasta}")
+        return agenda
+
+    def refrescar_indice(self, turno_id):
+        """Releer un turno en la agenda y en los turnos sin facturar"""
+        if turno_id is None:
+            return
+        turnos_sin_facturar.refrescar(self.connection, turno_id)
+        if not agenda.listo:
+            return
+        fila = self.connection.consultar(
+            self.SELECT_AGENDA + " WHERE id_turno = %s", (turno_id,), uno=True
+        )
+        if fila:
+            agenda.agregar(*fila)
+        else:
+            agenda.quitar(turno_id)
 
-    def insertar_turno(self, datos_turno):
-        query = """
+    INSERT = """
         INSERT INTO Turno (id_paciente, id_doctor, fecha, hora, motivo_de_consulta, es_particular)
         VALUES (%s, %s, %s, %s, %s, %s)
         """
-        cursor = self.connection.cursor()
-        try:
-            cursor.execute(query, datos_turno)
-            self.connection.commit()
+
+    @reindexa(por_resultado=True)
+    def insertar_turno(self, datos_turno):
+        with self.connection.transaction() as cursor:
+            cursor.execute(self.INSERT, datos_turno)
             return cursor.lastrowid
-        except Exception as e:
-            self.connection.rollback()
-            raise e
 
+    def insertar_turnos(self, filas, chunk_size=DB_BULK_CHUNK):
+        """Insertar muchos turnos por bloques (ver ejecutar_en_lotes).
+
+        No verifica disponibilidad: es para cargar datos ya validados, como
+        un histórico importado.
+        """
+        resultado = ejecutar_en_lotes(self.connection, self.INSERT, filas, chunk_size)
+        agenda.invalidar()
+        turnos_sin_facturar.invalidar()
+        return resultado
+
+    @reindexa()
     def actualizar_turno(self, turno_id, datos_turno):
         query = """
         UPDATE Turno 
@@ -199,49 +737,402 @@ class TurnosQueries:
             motivo_de_consulta = %s, es_particular = %s
         WHERE id_turno = %s
         """
-        cursor = self.connection.cursor()
-        try:
+        with self.connection.transaction() as cursor:
+            # Si ya está facturado, su aporte al resumen cambia de doctor/obra social
+            sumar_al_resumen(cursor, "f.id_turno = %s", (turno_id,), -1)
             cursor.execute(query, (*datos_turno, turno_id))
-            self.connection.commit()
+            sumar_al_resumen(cursor, "f.id_turno = %s", (turno_id,), 1)
             return cursor.rowcount > 0
-        except Exception as e:
-            self.connection.rollback()
-            raise e
 
+    @reindexa()
     def eliminar_turno(self, turno_id):
         # Verificar si el turno tiene facturación
         query_check = "SELECT COUNT(*) FROM Facturacion WHERE id_turno = %s"
-        cursor = self.connection.cursor()
-        cursor.execute(query_check, (turno_id,))
-        count = cursor.fetchone()[0]
-
-        if count > 0:
-            return (
-                False,
-                "No se puede eliminar el turno porque tiene facturación asociada",
-            )
-
         try:
-            query_delete = "DELETE FROM Turno WHERE id_turno = %s"
-            cursor.execute(query_delete, (turno_id,))
-            self.connection.commit()
-            return True, "Turno eliminado correctamente"
+            with self.connection.transaction() as cursor:
+                cursor.execute(query_check, (turno_id,))
+                count = cursor.fetchone()[0]
+
+                if count > 0:
+                    return (
+                        False,
+                        "No se puede eliminar el turno porque tiene facturación asociada",
+                    )
+
+                query_delete = "DELETE FROM Turno WHERE id_turno = %s"
+                cursor.execute(query_delete, (turno_id,))
+                return True, "Turno eliminado correctamente"
         except Exception as e:
-            self.connection.rollback()
             return False, f"Error al eliminar turno: {str(e)}"
 
-    def verificar_disponibilidad(self, doctor_id, fecha, hora):
+    def verificar_disponibilidad(self, doctor_id, fecha, hora, excluir_turno=None):
+        """True si el doctor puede atender un turno en esa fecha y hora.
+
+        Dentro del horizonte de la agenda se responde en memoria (recargada
+        si venció) y se tienen en cuenta la duración de los turnos y el
+        horario de atención; fuera de él se consulta la base por coincidencia
+        exacta. La reserva en sí la confirma reservar_turno contra la base.
+        """
+        if self.obtener_agenda().cubre(fecha):
+            return agenda.esta_libre(doctor_id, fecha, hora, excluir_turno)
+
         query = """
         SELECT COUNT(*) 
         FROM Turno 
-        WHERE id_doctor = %s AND fecha = %s AND hora = %s
+        WHERE id_doctor = %s AND fecha = %s AND hora = %s AND id_turno != %s
         """
-        cursor = self.connection.cursor()
-        cursor.execute(query, (doctor_id, fecha, hora))
-        count = cursor.fetchone()[0]
+        (count,) = self.connection.consultar(
+            query, (doctor_id, fecha, hora, excluir_turno or 0), uno=True
+        )
         return count == 0
 
+    def reservar_turno(self, datos_turno, turno_id=None, intentos=3):
+        """Reservar un turno (o moverlo, con turno_id) de forma atómica.
+
+        Todo pasa en una sola transacción: se bloquea la fila del doctor con
+        SELECT ... FOR UPDATE, así dos puestos que reservan para el mismo
+        doctor quedan en fila; se busca un turno superpuesto y solo si no hay
+        se inserta o actualiza. Ante un deadlock o una espera de lock vencida
+        se reintenta hasta `intentos` veces. Devuelve una Reserva.
+        """
+        id_doctor, fecha, hora = datos_turno[1], datos_turno[2], datos_turno[3]
+        inicio = a_datetime(fecha, hora)
+        fin = inicio + agenda.duracion
+        if not agenda.en_horario(id_doctor, inicio, fin) and not self._sin_mover(
+            turno_id, id_doctor, inicio
+        ):
+            return self._reserva_rechazada(
+                id_doctor, inicio, None, "El horario está fuera de la atención del doctor"
+            )
+
+        # Se superpone cualquier turno que empiece en (inicio - duración, fin)
+        medianoche = datetime.combine(inicio.date(), datetime.min.time())
+        query_superpuesto = """
+        SELECT id_turno FROM Turno
+        WHERE id_doctor = %s AND fecha = %s AND hora > %s AND hora < %s
+          AND id_turno != %s
+        LIMIT 1
+        """
+        params_superpuesto = (
+            id_doctor,
+            inicio.date(),
+            hora_sql(inicio - agenda.duracion - medianoche),
+            hora_sql(fin - medianoche),
+            turno_id or 0,
+        )
+
+        for intento in range(1, intentos + 1):
+            try:
+                with self.connection.transaction() as cursor:
+                    cursor.execute(
+                        "SELECT id_doctor FROM Doctor WHERE id_doctor = %s FOR UPDATE",
+                        (id_doctor,),
+                    )
+                    if cursor.fetchone() is None:
+                        return Reserva(False, None, "El doctor no existe", None, [])
+
+                    if turno_id is not None:
+                        cursor.execute(
+                            "SELECT id_turno FROM Turno WHERE id_turno = %s FOR UPDATE",
+                            (turno_id,),
+                        )
+                        if cursor.fetchone() is None:
+                            return Reserva(False, None, "El turno no existe", None, [])
+
+                    cursor.execute(query_superpuesto, params_superpuesto)
+                    fila = cursor.fetchone()
+                    if fila is None:
+                        if turno_id is None:
+                            cursor.execute(self.INSERT, datos_turno)
+                            reservado = cursor.lastrowid
+                        else:
+                            sumar_al_resumen(cursor, "f.id_turno = %s", (turno_id,), -1)
+                            cursor.execute(
+                                """
+                                UPDATE Turno
+                                SET id_paciente = %s, id_doctor = %s, fecha = %s, hora = %s,
+                                    motivo_de_consulta = %s, es_particular = %s
+                                WHERE id_turno = %s
+                                """,
+                                (*datos_turno, turno_id),
+                            )
+                            sumar_al_resumen(cursor, "f.id_turno = %s", (turno_id,), 1)
+                            reservado = turno_id
+            except Error as e:
+                if e.errno == ER_DUP_ENTRY:
+                    # Lo frenó el índice único (id_doctor, fecha, hora)
+                    return self._reserva_rechazada(
+                        id_doctor, inicio, None, "El doctor ya tiene un turno en ese horario"
+                    )
+                if esperar_reintento(e, intento, intentos):
+                    continue
+                raise
+
+            if fila is not None:
+                return self._reserva_rechazada(
+                    id_doctor, inicio, fila[0], "El doctor ya tiene un turno en ese horario"
+                )
+            self.refrescar_indice(reservado)
+            mensaje = "Turno reservado" if turno_id is None else "Turno actualizado"
+            return Reserva(True, reservado, mensaje, None, [])
+
+    def _sin_mover(self, turno_id, id_doctor, inicio):
+        """True si turno_id ya está con ese doctor a esa hora.
+
+        Un turno cargado antes de configurar el horario de atención se puede
+        editar (paciente, motivo...) sin moverlo, aunque quede fuera del horario.
+        """
+        if turno_id is None:
+            return False
+        fila = self.connection.consultar(
+            "SELECT id_doctor, fecha, hora FROM Turno WHERE id_turno = %s",
+            (turno_id,),
+            uno=True,
+        )
+        if fila is None:
+            return False
+        return fila[0] == id_doctor and a_datetime(fila[1], fila[2]) == inicio
+
+    def _reserva_rechazada(self, id_doctor, inicio, conflicto, mensaje):
+        try:
+            libres = self.proximos_turnos_libres(id_doctor, inicio)
+        except Error:
+            libres = []
+        return Reserva(False, None, mensaje, conflicto, libres)
+
+    # ----------------------- Series de turnos -----------------------
+    def _conflictos_serie(self, cursor, id_doctor, inicios, id_serie=None):
+        """Turnos del doctor que se pisan con alguno de los inicios, en una sola consulta.
+
+        Los horarios pedidos se arman como una tabla derivada y se cruzan con
+        Turno por (id_doctor, fecha, hora), que usa el índice compuesto. Los
+        turnos de la propia serie id_serie no cuentan como conflicto.
+        """
+        pedidos = " UNION ALL ".join(
+            ["SELECT CAST(%s AS DATE) AS fecha, CAST(%s AS TIME) AS desde, "
+             "CAST(%s AS TIME) AS hasta"] * len(inicios)
+        )
+        params = []
+        for inicio in inicios:
+            medianoche = datetime.combine(inicio.date(), datetime.min.time())
+            params += [
+                inicio.date(),
+                hora_sql(inicio - agenda.duracion - medianoche),
+                hora_sql(inicio + agenda.duracion - medianoche),
+            ]
+        query = f"""
+        SELECT c.fecha, t.id_turno
+        FROM ({pedidos}) c
+        JOIN Turno t ON t.id_doctor = %s AND t.fecha = c.fecha
+                    AND t.hora > c.desde AND t.hora < c.hasta
+        WHERE t.id_serie IS NULL OR t.id_serie != %s
+        ORDER BY c.fecha
+        """
+        cursor.execute(query, (*params, id_doctor, id_serie or 0))
+        return cursor.fetchall()
+
+    def _fuera_de_horario(self, id_doctor, inicios):
+        return [
+            (inicio.date(), None)
+            for inicio in inicios
+            if not agenda.en_horario(id_doctor, inicio, inicio + agenda.duracion)
+        ]
+
+    def _refrescar_serie(self, ids_turno):
+        """Poner al día agenda y turnos sin facturar tras cambiar una serie"""
+        turnos_sin_facturar.refrescar(self.connection, *ids_turno)
+        if not agenda.listo or not ids_turno:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                self.SELECT_AGENDA
+                + " WHERE id_turno IN ({})".format(", ".join(["%s"] * len(ids_turno))),
+                ids_turno,
+            )
+            filas = {fila[0]: fila for fila in cursor.fetchall()}
+        for id_turno in ids_turno:
+            if id_turno in filas:
+                agenda.agregar(*filas[id_turno])
+            else:
+                agenda.quitar(id_turno)
+
+    def crear_serie(
+        self,
+        datos_turno,
+        frecuencia="semanal",
+        intervalo=1,
+        hasta=None,
+        cantidad=None,
+        intentos=3,
+    ):
+        """Reservar una serie de turnos recurrentes como una sola operación.
+
+        datos_turno es el primer turno; los demás repiten paciente, doctor,
+        hora y motivo según generar_fechas. La disponibilidad de toda la
+        serie se verifica con una consulta y todos los turnos se insertan en
+        la misma transacción: o se reservan todos o ninguno.
+        """
+        id_paciente, id_doctor, fecha, hora, motivo, particular = datos_turno
+        fechas = generar_fechas(como_fecha(fecha), frecuencia, intervalo, hasta, cantidad)
+        inicios = [a_datetime(f, hora) for f in fechas]
+
+        fuera = self._fuera_de_horario(id_doctor, inicios)
+        if fuera:
+            return ResultadoSerie(
+                False, None, "Hay fechas fuera del horario de atención", fuera, 0
+            )
+
+        for intento in range(1, intentos + 1):
+            try:
+                with self.connection.transaction() as cursor:
+                    cursor.execute(
+                        "SELECT id_doctor FROM Doctor WHERE id_doctor = %s FOR UPDATE",
+                        (id_doctor,),
+                    )
+                    if cursor.fetchone() is None:
+                        return ResultadoSerie(False, None, "El doctor no existe", [], 0)
+
+                    conflictos = self._conflictos_serie(cursor, id_doctor, inicios)
+                    if conflictos:
+                        return ResultadoSerie(
+                            False,
+                            None,
+                            f"{len(conflictos)} fechas de la serie ya están ocupadas",
+                            conflictos,
+                            0,
+                        )
+
+                    cursor.execute(
+                        """
+                        INSERT INTO SerieTurno (frecuencia, intervalo, hasta, cantidad)
+                        VALUES (%s, %s, %s, %s)
+                        """,
+                        (frecuencia, intervalo, hasta, cantidad),
+                    )
+                    id_serie = cursor.lastrowid
+                    cursor.executemany(
+                        """
+                        INSERT INTO Turno (id_paciente, id_doctor, fecha, hora,
+                                           motivo_de_consulta, es_particular, id_serie)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s)
+                        """,
+                        [
+                            (id_paciente, id_doctor, f, hora, motivo, particular, id_serie)
+                            for f in fechas
+                        ],
+                    )
+                    cursor.execute(
+                        "SELECT id_turno FROM Turno WHERE id_serie = %s", (id_serie,)
+                    )
+                    ids_turno = [fila[0] for fila in cursor.fetchall()]
+            except Error as e:
+                if e.errno == ER_DUP_ENTRY:
+                    return ResultadoSerie(
+                        False, None, "Alguna fecha de la serie ya está ocupada", [], 0
+                    )
+                if esperar_reintento(e, intento, intentos):
+                    continue
+                raise
+
+            self._refrescar_serie(ids_turno)
+            return ResultadoSerie(
+                True, id_serie, f"Serie creada con {len(ids_turno)} turnos", [], len(ids_turno)
+            )
+
+    # Turnos de la serie que todavía se pueden modificar: futuros y sin factura
+    SELECT_SERIE_PENDIENTE = """
+        SELECT t.id_turno, t.fecha
+        FROM Turno t
+        LEFT JOIN Facturacion f ON f.id_turno = t.id_turno
+        WHERE t.id_serie = %s AND t.fecha >= CURDATE() AND f.id_factura IS NULL
+        """
+
+    def modificar_serie(
+        self, id_serie, id_doctor, hora, motivo, es_particular, intentos=3
+    ):
+        """Cambiar doctor, hora, motivo y tipo de todos los turnos pendientes de la serie.
 
+        Los turnos pasados o ya facturados no se tocan. Igual que al crearla,
+        la disponibilidad se verifica para toda la serie a la vez y el cambio
+        se aplica en una transacción.
+        """
+        for intento in range(1, intentos + 1):
+            try:
+                with self.connection.transaction() as cursor:
+                    cursor.execute(
+                        "SELECT id_doctor FROM Doctor WHERE id_doctor = %s FOR UPDATE",
+                        (id_doctor,),
+                    )
+                    if cursor.fetchone() is None:
+                        return ResultadoSerie(False, id_serie, "El doctor no existe", [], 0)
+
+                    cursor.execute(self.SELECT_SERIE_PENDIENTE + " FOR UPDATE", (id_serie,))
+                    pendientes = cursor.fetchall()
+                    if not pendientes:
+                        return ResultadoSerie(
+                            False, id_serie, "La serie no tiene turnos pendientes", [], 0
+                        )
+
+                    inicios = [a_datetime(fecha, hora) for _, fecha in pendientes]
+                    conflictos = self._fuera_de_horario(id_doctor, inicios)
+                    conflictos += self._conflictos_serie(cursor, id_doctor, inicios, id_serie)
+                    if conflictos:
+                        return ResultadoSerie(
+                            False,
+                            id_serie,
+                            f"{len(conflictos)} fechas no están disponibles",
+                            conflictos,
+                            0,
+                        )
+
+                    ids_turno = [fila[0] for fila in pendientes]
+                    cursor.execute(
+                        """
+                        UPDATE Turno
+                        SET id_doctor = %s, hora = %s, motivo_de_consulta = %s,
+                            es_particular = %s
+                        WHERE id_turno IN ({})
+                        """.format(", ".join(["%s"] * len(ids_turno))),
+                        (id_doctor, hora, motivo, es_particular, *ids_turno),
+                    )
+            except Error as e:
+                if e.errno == ER_DUP_ENTRY:
+                    return ResultadoSerie(
+                        False, id_serie, "Alguna fecha de la serie ya está ocupada", [], 0
+                    )
+                if esperar_reintento(e, intento, intentos):
+                    continue
+                raise
+
+            self._refrescar_serie(ids_turno)
+            return ResultadoSerie(
+                True, id_serie, f"{len(ids_turno)} turnos actualizados", [], len(ids_turno)
+            )
+
+    def cancelar_serie(self, id_serie):
+        """Eliminar los turnos pendientes (futuros y sin factura) de la serie"""
+        try:
+            with self.connection.transaction() as cursor:
+                cursor.execute(self.SELECT_SERIE_PENDIENTE + " FOR UPDATE", (id_serie,))
+                ids_turno = [fila[0] for fila in cursor.fetchall()]
+                if ids_turno:
+                    cursor.execute(
+                        "DELETE FROM Turno WHERE id_turno IN ({})".format(
+                            ", ".join(["%s"] * len(ids_turno))
+                        ),
+                        ids_turno,
+                    )
+            self._refrescar_serie(ids_turno)
+            return True, f"Se cancelaron {len(ids_turno)} turnos de la serie"
+        except Exception as e:
+            return False, f"Error al cancelar la serie: {str(e)}"
+
+    def proximos_turnos_libres(self, doctor_id, desde=None, cantidad=5):
+        """Inicio (datetime) de los próximos turnos libres del doctor"""
+        return self.obtener_agenda().proximos_libres(doctor_id, desde, cantidad)
+
+
+@instrumentada
 class DoctoresQueries:
     def __init__(self, connection):
         self.connection = connection
@@ -253,9 +1144,13 @@ class DoctoresQueries:
         FROM Doctor
         ORDER BY apellido, nombre
         """
-        cursor = self.connection.cursor()
-        cursor.execute(query)
-        return cursor.fetchall()
+
+        def cargar():
+            with self.connection.cursor() as cursor:
+                cursor.execute(query)
+                return cursor.fetchall()
+
+        return lookup_cache.get("doctores", cargar)
 
     def obtener_doctores(self):
         """Obtener todos los doctores"""
@@ -265,9 +1160,9 @@ class DoctoresQueries:
         FROM Doctor
         ORDER BY apellido, nombre
         """
-        cursor = self.connection.cursor()
-        cursor.execute(query)
-        return cursor.fetchall()
+        with self.connection.cursor() as cursor:
+            cursor.execute(query)
+            return cursor.fetchall()
 
     def obtener_doctor_por_id(self, doctor_id):
         """Obtener un doctor específico por ID"""
@@ -277,10 +1172,76 @@ class DoctoresQueries:
         FROM Doctor
         WHERE id_doctor = %s
         """
-        cursor = self.connection.cursor()
-        cursor.execute(query, (doctor_id,))
-        return cursor.fetchone()
+        return self.connection.consultar(query, (doctor_id,), uno=True)
 
+    SELECT_BUSQUEDA = """
+        SELECT id_doctor, dni, matricula, apellido, nombre, telefono, 
+               correo_electronico, especialidad
+        FROM Doctor
+        """
+
+    def buscar_doctor_por_dni(self, dni, limit=LIMITE_BUSQUEDA):
+        """Buscar doctor por DNI (prefijo, o subcadena si no hay coincidencias)"""
+        return buscar_con_fallback(
+            self.connection, self.SELECT_BUSQUEDA, "dni", dni, "dni, id_doctor", limit
+        )
+
+    def buscar_doctor_por_apellido(self, apellido, limit=LIMITE_BUSQUEDA):
+        """Buscar doctor por apellido, sin distinguir mayúsculas ni acentos"""
+        return buscar_con_fallback(
+            self.connection,
+            self.SELECT_BUSQUEDA,
+            "apellido",
+            apellido,
+            "apellido, nombre, id_doctor",
+            limit,
+        )
+
+    SELECT_INDICE = "SELECT id_doctor, apellido, nombre, dni FROM Doctor"
+
+    def obtener_indice(self):
+        """Índice de prefijos (apellido, nombre, DNI) de todos los doctores"""
+        if not indice_doctores.listo:
+            with self.connection.cursor() as cursor:
+                cursor.execute(self.SELECT_INDICE)
+                indice_doctores.cargar(map(elemento_indice, cursor.fetchall()))
+        return indice_doctores
+
+    def buscar_para_selector(self, texto, limit=LIMITE_BUSQUEDA):
+        """(id, "Apellido, Nombre") de los doctors cuyo apellido empieza con texto"""
+        select = """
+        SELECT id_doctor, CONCAT(apellido, ', ', nombre) as nombre_completo
+        FROM Doctor
+        """
+        return buscar_con_fallback(
+            self.connection,
+            select,
+            "apellido",
+            texto,
+            "apellido, nombre, id_doctor",
+            limit,
+        )
+
+    def refrescar_indice(self, doctor_id):
+        """Releer un doctor en el índice, si ya fue construido"""
+        if not indice_doctores.listo or doctor_id is None:
+            return
+        try:
+            fila = self.connection.consultar(
+                self.SELECT_INDICE + " WHERE id_doctor = %s", (doctor_id,), uno=True
+            )
+        except Error as e:
+            # Mejor reconstruirlo la próxima vez que dejarlo desactualizado
+            print(f"⚠️ No se pudo actualizar el índice de doctores: {e}")
+            indice_doctores.invalidar()
+            return
+        if fila:
+            indice_doctores.agregar(*elemento_indice(fila))
+        else:
+            indice_doctores.quitar(doctor_id)
+
+    @invalida("doctores")
+    @reindexa(por_resultado=True)
     def insertar_doctor(self, datos_doctor):
         """Insertar nuevo doctor"""
         query = """
@@ -288,15 +1249,12 @@ class DoctoresQueries:
                           correo_electronico, especialidad)
         VALUES (%s, %s, %s, %s, %s, %s, %s)
         """
-        cursor = self.connection.cursor()
-        try:
+        with self.connection.transaction() as cursor:
             cursor.execute(query, datos_doctor)
-            self.connection.commit()
             return cursor.lastrowid
-        except Exception as e:
-            self.connection.rollback()
-            raise e
 
+    @invalida("doctores")
+    @reindexa()
     def actualizar_doctor(self, doctor_id, datos_doctor):
         """Actualizar doctor existente"""
         query = """
@@ -305,36 +1263,36 @@ class DoctoresQueries:
             telefono = %s, correo_electronico = %s, especialidad = %s
         WHERE id_doctor = %s
         """
-        cursor = self.connection.cursor()
-        try:
+        with self.connection.transaction() as cursor:
             cursor.execute(query, (*datos_doctor, doctor_id))
-            self.connection.commit()
             return cursor.rowcount > 0
-        except Exception as e:
-            self.connection.rollback()
-            raise e
 
+    @invalida("doctores")
+    @reindexa()
     def eliminar_doctor(self, doctor_id):
         """Eliminar doctor con verificación"""
         # Verificar si el doctor tiene turnos
         query_check = "SELECT COUNT(*) FROM Turno WHERE id_doctor = %s"
-        cursor = self.connection.cursor()
-        cursor.execute(query_check, (doctor_id,))
-        count = cursor.fetchone()[0]
-
-        if count > 0:
-            return False, "No se puede eliminar el doctor porque tiene turnos asignados"
-
         try:
-            query_delete = "DELETE FROM Doctor WHERE id_doctor = %s"
-            cursor.execute(query_delete, (doctor_id,))
-            self.connection.commit()
-            return True, "Doctor eliminado correctamente"
+            with self.connection.transaction() as cursor:
+                cursor.execute(query_check, (doctor_id,))
+                count = cursor.fetchone()[0]
+
+                if count > 0:
+                    return (
+                        False,
+                        "No se puede eliminar el doctor porque tiene turnos asignados",
+                    )
+
+                query_delete = "DELETE FROM Doctor WHERE id_doctor = %s"
+                cursor.execute(query_delete, (doctor_id,))
+                return True, "Doctor eliminado correctamente"
         except Exception as e:
-            self.connection.rollback()
             return False, f"Error al eliminar doctor: {str(e)}"
 
 
+# Sin argumentos en el log de lentas: reciben contraseñas
+@instrumentada(con_argumentos=False)
 class LoginQueries:
     def __init__(self, connection):
         self.connection = connection
@@ -349,18 +1307,24 @@ class LoginQueries:
         LEFT JOIN Doctor d ON u.id_doctor = d.id_doctor
         WHERE u.nombre_usuario = %s AND u.contrasena = SHA2(%s, 256)
         """
-        cursor = self.connection.cursor()
-        cursor.execute(query, (usuario, password))
-        return cursor.fetchone()
+        with self.connection.cursor() as cursor:
+            cursor.execute(query, (usuario, password))
+            return cursor.fetchone()
 
     def obtener_roles(self):
         """Obtener todos los roles disponibles"""
         query = "SELECT id_rol, nombre_rol FROM Rol ORDER BY nombre_rol"
-        cursor = self.connection.cursor()
-        cursor.execute(query)
-        return cursor.fetchall()
 
+        def cargar():
+            with self.connection.cursor() as cursor:
+                cursor.execute(query)
+                return cursor.fetchall()
 
+        return lookup_cache.get("roles", cargar)
+
+
+# Sin argumentos en el log de lentas: reciben contraseñas
+@instrumentada(con_argumentos=False)
 class UsuariosQueries:
     def __init__(self, connection):
         self.connection = connection
@@ -375,9 +1339,31 @@ class UsuariosQueries:
         LEFT JOIN Doctor d ON u.id_doctor = d.id_doctor
         ORDER BY u.nombre_usuario
         """
-        cursor = self.connection.cursor()
-        cursor.execute(query)
-        return cursor.fetchall()
+        with self.connection.cursor() as cursor:
+            cursor.execute(query)
+            return cursor.fetchall()
+
+    def buscar_usuarios(self, texto, limit=LIMITE_BUSQUEDA):
+        """Buscar usuarios por nombre de usuario.
+
+        Primero por prefijo, que usa el índice único de nombre_usuario; solo si
+        no hay resultados se prueba con coincidencia parcial.
+        """
+        select = """
+        SELECT u.id_usuario, u.nombre_usuario, r.nombre_rol, 
+               COALESCE(CONCAT(d.apellido, ', ', d.nombre), 'No asignado') as doctor_asignado
+        FROM Usuario u
+        JOIN Rol r ON u.id_rol = r.id_rol
+        LEFT JOIN Doctor d ON u.id_doctor = d.id_doctor
+        """
+        return buscar_con_fallback(
+            self.connection,
+            select,
+            "u.nombre_usuario",
+            texto,
+            "u.nombre_usuario",
+            limit,
+        )
 
     def obtener_usuario_por_id(self, usuario_id):
         """Obtener un usuario específico por ID"""
@@ -386,9 +1372,7 @@ class UsuariosQueries:
         FROM Usuario
         WHERE id_usuario = %s
         """
-        cursor = self.connection.cursor()
-        cursor.execute(query, (usuario_id,))
-        return cursor.fetchone()
+        return self.connection.consultar(query, (usuario_id,), uno=True)
 
     def insertar_usuario(self, datos_usuario):
         """Insertar nuevo usuario con contraseña encriptada"""
@@ -396,14 +1380,9 @@ class UsuariosQueries:
         INSERT INTO Usuario (nombre_usuario, contrasena, id_rol, id_doctor)
         VALUES (%s, SHA2(%s, 256), %s, %s)
         """
-        cursor = self.connection.cursor()
-        try:
+        with self.connection.transaction() as cursor:
             cursor.execute(query, datos_usuario)
-            self.connection.commit()
             return cursor.lastrowid
-        except Exception as e:
-            self.connection.rollback()
-            raise e
 
     def actualizar_usuario(self, usuario_id, datos_usuario):
         """Actualizar usuario existente"""
@@ -412,56 +1391,34 @@ class UsuariosQueries:
         SET nombre_usuario = %s, id_rol = %s, id_doctor = %s
         WHERE id_usuario = %s
         """
-        cursor = self.connection.cursor()
-        try:
+        with self.connection.transaction() as cursor:
             cursor.execute(query, (*datos_usuario, usuario_id))
-            self.connection.commit()
             return cursor.rowcount > 0
-        except Exception as e:
-            self.connection.rollback()
-            raise e
 
     def actualizar_contrasena(self, usuario_id, nueva_contrasena):
         """Actualizar contraseña del usuario"""
         query = "UPDATE Usuario SET contrasena = SHA2(%s, 256) WHERE id_usuario = %s"
-        cursor = self.connection.cursor()
-        try:
+        with self.connection.transaction() as cursor:
             cursor.execute(query, (nueva_contrasena, usuario_id))
-            self.connection.commit()
             return cursor.rowcount > 0
-        except Exception as e:
-            self.connection.rollback()
-            raise e
 
     def eliminar_usuario(self, usuario_id):
         """Eliminar usuario"""
         try:
             query = "DELETE FROM Usuario WHERE id_usuario = %s"
-            cursor = self.connection.cursor()
-            cursor.execute(query, (usuario_id,))
-            self.connection.commit()
+            with self.connection.transaction() as cursor:
+                cursor.execute(query, (usuario_id,))
             return True, "Usuario eliminado correctamente"
         except Exception as e:
-            self.connection.rollback()
             return False, f"Error al eliminar usuario: {str(e)}"
 
     def obtener_roles(self):
         """Obtener todos los roles"""
-        query = "SELECT id_rol, nombre_rol FROM Rol ORDER BY nombre_rol"
-        cursor = self.connection.cursor()
-        cursor.execute(query)
-        return cursor.fetchall()
+        return LoginQueries(self.connection).obtener_roles()
 
     def obtener_doctores_para_combo(self):
         """Obtener doctores para combobox"""
-        query = """
-        SELECT id_doctor, CONCAT(apellido, ', ', nombre) as nombre_completo
-        FROM Doctor
-        ORDER BY apellido, nombre
-        """
-        cursor = self.connection.cursor()
-        cursor.execute(query)
-        return cursor.fetchall()
+        return DoctoresQueries(self.connection).obtener_doctores_para_combo()
 
     def verificar_nombre_usuario(self, nombre_usuario, exclude_id=None):
         """Verificar si el nombre de usuario ya existe"""
@@ -472,17 +1429,29 @@ class UsuariosQueries:
             query = "SELECT COUNT(*) FROM Usuario WHERE nombre_usuario = %s"
             params = (nombre_usuario,)
 
-        cursor = self.connection.cursor()
-        cursor.execute(query, params)
-        return cursor.fetchone()[0] > 0
+        return self.connection.consultar(query, params, uno=True)[0] > 0
 
 
+@instrumentada
 class FacturacionQueries:
     def __init__(self, connection):
         self.connection = connection
 
-    def obtener_facturas(self):
-        """Obtener todas las facturas con información relacionada"""
+    ORDEN = ("f.fecha_emision", "f.id_factura")
+
+    @staticmethod
+    def clave_orden(fila):
+        """Clave keyset (fecha_emision, id) de una fila de obtener_facturas"""
+        return (fila[2], fila[0])
+
+    def _consulta_facturas(
+        self,
+        fecha_desde=None,
+        fecha_hasta=None,
+        pagado=None,
+        id_obra_social=None,
+        id_doctor=None,
+    ):
         query = """
         SELECT f.id_factura, t.id_turno, f.fecha_emision, f.monto, 
                f.observacion, f.pagado,
@@ -494,11 +1463,51 @@ class FacturacionQueries:
         JOIN Paciente p ON t.id_paciente = p.id_paciente
         JOIN Doctor d ON t.id_doctor = d.id_doctor
         LEFT JOIN ObraSocial os ON p.id_obra_social = os.id_obra_social
-        ORDER BY f.fecha_emision DESC
+        WHERE 1=1
         """
-        cursor = self.connection.cursor()
-        cursor.execute(query)
-        return cursor.fetchall()
+        params = []
+        if fecha_desde:
+            query += " AND f.fecha_emision >= %s"
+            params.append(fecha_desde)
+        if fecha_hasta:
+            query += " AND f.fecha_emision <= %s"
+            params.append(fecha_hasta)
+        if pagado is not None:
+            query += " AND f.pagado = %s"
+            params.append(pagado)
+        if id_obra_social is not None:
+            query += " AND p.id_obra_social = %s AND NOT t.es_particular"
+            params.append(id_obra_social)
+        if id_doctor is not None:
+            query += " AND t.id_doctor = %s"
+            params.append(id_doctor)
+        return query, params
+
+    def obtener_facturas(self, *filtros, limit=None, after=None, before=None):
+        """Obtener facturas con información relacionada, más recientes primero.
+
+        filtros = (fecha_desde, fecha_hasta, pagado, id_obra_social, id_doctor);
+        se resuelven en MySQL y los que quedan en None no se aplican.
+        """
+        query, params = paginar_keyset(
+            *self._consulta_facturas(*filtros),
+            self.ORDEN,
+            descendente=True,
+            limit=limit,
+            after=after,
+            before=before,
+        )
+        with self.connection.cursor() as cursor:
+            cursor.execute(query, params)
+            filas = cursor.fetchall()
+        return filas[::-1] if before is not None else filas
+
+    def exportar_facturas(self, *filtros, lote=EXPORT_LOTE):
+        """Facturas con los mismos filtros que obtener_facturas, para exportar"""
+        query, params = paginar_keyset(
+            *self._consulta_facturas(*filtros), self.ORDEN, descendente=True
+        )
+        return self.connection.stream(query, params, lote)
 
     def obtener_factura_por_id(self, factura_id):
         """Obtener una factura específica por ID"""
@@ -507,42 +1516,45 @@ class FacturacionQueries:
         FROM Facturacion
         WHERE id_factura = %s
         """
-        cursor = self.connection.cursor()
-        cursor.execute(query, (factura_id,))
-        return cursor.fetchone()
+        return self.connection.consultar(query, (factura_id,), uno=True)
 
-    def obtener_turnos_sin_facturar(self):
-        """Obtener turnos que no tienen factura asociada"""
-        query = """
-        SELECT t.id_turno, t.fecha, t.hora,
-               CONCAT(p.apellido, ', ', p.nombre) as paciente,
-               CONCAT(d.apellido, ', ', d.nombre) as doctor,
-               CASE WHEN t.es_particular THEN 'Particular' ELSE os.nombre END as tipo
-        FROM Turno t
-        JOIN Paciente p ON t.id_paciente = p.id_paciente
-        JOIN Doctor d ON t.id_doctor = d.id_doctor
-        LEFT JOIN ObraSocial os ON p.id_obra_social = os.id_obra_social
-        WHERE t.id_turno NOT IN (SELECT id_turno FROM Facturacion)
-        ORDER BY t.fecha, t.hora
+    def obtener_turnos_sin_facturar(
+        self, fecha_desde=None, fecha_hasta=None, usar_cache=True
+    ):
+        """Obtener turnos que no tienen factura asociada, opcionalmente entre dos fechas.
+
+        Por defecto sale del conjunto compartido turnos_sin_facturar; con
+        usar_cache=False se consulta la base directamente.
         """
-        cursor = self.connection.cursor()
-        cursor.execute(query)
-        return cursor.fetchall()
+        if usar_cache:
+            return turnos_sin_facturar.obtener(self.connection, fecha_desde, fecha_hasta)
 
-    def insertar_factura(self, datos_factura):
-        """Insertar nueva factura"""
-        query = """
+        query = SELECT_TURNOS_SIN_FACTURAR
+        params = []
+        if fecha_desde:
+            query += " AND t.fecha >= %s"
+            params.append(fecha_desde)
+        if fecha_hasta:
+            query += " AND t.fecha <= %s"
+            params.append(fecha_hasta)
+        query += " ORDER BY t.fecha, t.hora, t.id_turno"
+        with self.connection.cursor() as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+
+    INSERT = """
         INSERT INTO Facturacion (id_turno, fecha_emision, monto, observacion, pagado)
         VALUES (%s, %s, %s, %s, %s)
         """
-        cursor = self.connection.cursor()
-        try:
-            cursor.execute(query, datos_factura)
-            self.connection.commit()
-            return cursor.lastrowid
-        except Exception as e:
-            self.connection.rollback()
-            raise e
+
+    def insertar_factura(self, datos_factura):
+        """Insertar nueva factura"""
+        with self.connection.transaction() as cursor:
+            cursor.execute(self.INSERT, datos_factura)
+            factura_id = cursor.lastrowid
+            ajustar_resumen(cursor, [factura_id], 1)
+        turnos_sin_facturar.refrescar(self.connection, datos_factura[0])
+        return factura_id
 
     def actualizar_factura(self, factura_id, datos_factura):
         """Actualizar factura existente"""
@@ -551,47 +1563,382 @@ class FacturacionQueries:
         SET id_turno = %s, fecha_emision = %s, monto = %s, observacion = %s, pagado = %s
         WHERE id_factura = %s
         """
-        cursor = self.connection.cursor()
-        try:
+        with self.connection.transaction() as cursor:
+            cursor.execute(
+                "SELECT id_turno FROM Facturacion WHERE id_factura = %s", (factura_id,)
+            )
+            anterior = cursor.fetchone()
+            ajustar_resumen(cursor, [factura_id], -1)
             cursor.execute(query, (*datos_factura, factura_id))
-            self.connection.commit()
-            return cursor.rowcount > 0
-        except Exception as e:
-            self.connection.rollback()
-            raise e
+            actualizado = cursor.rowcount > 0
+            ajustar_resumen(cursor, [factura_id], 1)
+        if anterior and anterior[0] != datos_factura[0]:
+            turnos_sin_facturar.refrescar(self.connection, anterior[0], datos_factura[0])
+        return actualizado
 
     def eliminar_factura(self, factura_id):
         """Eliminar factura"""
         try:
-            query = "DELETE FROM Facturacion WHERE id_factura = %s"
-            cursor = self.connection.cursor()
-            cursor.execute(query, (factura_id,))
-            self.connection.commit()
+            with self.connection.transaction() as cursor:
+                cursor.execute(
+                    "SELECT id_turno FROM Facturacion WHERE id_factura = %s",
+                    (factura_id,),
+                )
+                fila = cursor.fetchone()
+                ajustar_resumen(cursor, [factura_id], -1)
+                query = "DELETE FROM Facturacion WHERE id_factura = %s"
+                cursor.execute(query, (factura_id,))
+            if fila:
+                turnos_sin_facturar.refrescar(self.connection, fila[0])
             return True, "Factura eliminada correctamente"
         except Exception as e:
-            self.connection.rollback()
             return False, f"Error al eliminar factura: {str(e)}"
 
+    def insertar_facturas(self, filas, chunk_size=DB_BULK_CHUNK):
+        """Insertar muchas facturas por bloques (ver ejecutar_en_lotes)"""
+
+        def actualizar_resumen(cursor, bloque):
+            # Los ids recién insertados no se conocen: se rehacen los días tocados
+            fechas = [como_fecha(fila[1]) for fila in bloque]
+            recalcular_resumen(cursor, min(fechas), max(fechas))
+
+        resultado = ejecutar_en_lotes(
+            self.connection, self.INSERT, filas, chunk_size, despues=actualizar_resumen
+        )
+        turnos_sin_facturar.invalidar()
+        return resultado
+
+    def marcar_como_pagadas(self, factura_ids, chunk_size=DB_BULK_CHUNK):
+        """Marcar muchas facturas como pagadas, una transacción por bloque"""
+
+        def ajustar(signo):
+            return lambda cursor, bloque: ajustar_resumen(
+                cursor, [fila[0] for fila in bloque], signo
+            )
+
+        return ejecutar_en_lotes(
+            self.connection,
+            "UPDATE Facturacion SET pagado = TRUE WHERE id_factura = %s",
+            ((factura_id,) for factura_id in factura_ids),
+            chunk_size,
+            antes=ajustar(-1),
+            despues=ajustar(1),
+        )
+
+    # ----------------------- Tarifas y facturación por lote -----------------------
+    def obtener_tarifas(self):
+        """Todas las tarifas, con el nombre de la obra social (None = particular)"""
+        query = """
+        SELECT t.id_tarifa, t.id_obra_social, COALESCE(os.nombre, 'Particular'),
+               t.practica, t.monto, t.vigente_desde
+        FROM Tarifa t
+        LEFT JOIN ObraSocial os ON t.id_obra_social = os.id_obra_social
+        ORDER BY os.nombre, t.practica, t.vigente_desde DESC
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute(query)
+            return cursor.fetchall()
+
+    def insertar_tarifa(self, datos_tarifa):
+        """datos_tarifa = (id_obra_social o None, practica, monto, vigente_desde)"""
+        query = """
+        INSERT INTO Tarifa (id_obra_social, practica, monto, vigente_desde)
+        VALUES (%s, %s, %s, %s)
+        """
+        with self.connection.transaction() as cursor:
+            cursor.execute(query, datos_tarifa)
+            return cursor.lastrowid
+
+    def eliminar_tarifa(self, tarifa_id):
+        with self.connection.transaction() as cursor:
+            cursor.execute("DELETE FROM Tarifa WHERE id_tarifa = %s", (tarifa_id,))
+            return cursor.rowcount > 0
+
+    @staticmethod
+    def tarifario(tarifas):
+        """{(id_obra_social, practica): ([vigente_desde...], [monto...])} ordenado por fecha"""
+        tabla = {}
+        for _, id_obra_social, _, practica, monto, vigente_desde in sorted(
+            tarifas, key=lambda t: t[5]
+        ):
+            fechas, montos = tabla.setdefault((id_obra_social, practica), ([], []))
+            fechas.append(vigente_desde)
+            montos.append(monto)
+        return tabla
+
+    @staticmethod
+    def precio(tarifario, id_obra_social, practica, fecha):
+        """Monto vigente en la fecha del turno, o None si no hay tarifa"""
+        clave = tarifario.get((id_obra_social, practica))
+        if clave is None:
+            return None
+        i = bisect_right(clave[0], fecha)
+        return clave[1][i - 1] if i else None
+
+    # Inserta solo si el turno sigue sin factura (otro puesto pudo facturarlo)
+    INSERT_SI_SIN_FACTURA = """
+        INSERT INTO Facturacion (id_turno, fecha_emision, monto, observacion, pagado)
+        SELECT %s, %s, %s, %s, FALSE FROM DUAL
+        WHERE NOT EXISTS (SELECT 1 FROM Facturacion WHERE id_turno = %s)
+        """
+
+    def obtener_corrida_pendiente(self):
+        """Última corrida de facturación que no terminó, o None"""
+        query = """
+        SELECT id_corrida, fecha_desde, fecha_hasta, fecha_emision, practica,
+               estado, procesados, facturados, sin_tarifa
+        FROM CorridaFacturacion
+        WHERE estado != 'completa'
+        ORDER BY id_corrida DESC
+        LIMIT 1
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute(query)
+            return cursor.fetchone()
+
+    def reanudar_corrida(self, id_corrida, **kwargs):
+        """Seguir una corrida interrumpida con sus mismos parámetros"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT fecha_desde, fecha_hasta, fecha_emision, practica
+                FROM CorridaFacturacion WHERE id_corrida = %s
+                """,
+                (id_corrida,),
+            )
+            corrida = cursor.fetchone()
+        if corrida is None:
+            raise ValueError(f"No existe la corrida {id_corrida}")
+        fecha_desde, fecha_hasta, fecha_emision, practica = corrida
+        return self.facturar_lote(
+            fecha_desde, fecha_hasta, fecha_emision, practica, id_corrida=id_corrida, **kwargs
+        )
+
+    def facturar_lote(
+        self,
+        fecha_desde,
+        fecha_hasta,
+        fecha_emision=None,
+        practica="consulta",
+        id_corrida=None,
+        chunk_size=DB_BULK_CHUNK,
+        progreso=None,
+        detener=None,
+    ):
+        """Facturar todos los turnos sin factura entre dos fechas, por bloques.
+
+        Cada turno se cobra con la tarifa de su obra social (o la particular)
+        para la práctica, vigente a la fecha del turno; los que no tienen
+        tarifa se cuentan y se saltean. Cada bloque se inserta en su propia
+        transacción junto con el avance de la corrida en CorridaFacturacion,
+        así una corrida cortada se retoma con reanudar_corrida: los turnos ya
+        facturados dejan de aparecer como pendientes. Los que quedaron sin
+        tarifa siguen pendientes y se vuelven a evaluar (quizás ya tienen
+        tarifa), por eso al retomar se descuentan de procesados y sin_tarifa.
+
+        progreso(dict) se llama tras cada bloque y detener (threading.Event)
+        corta la corrida entre bloques. Devuelve el resumen de esta pasada.
+        """
+        fecha_emision = fecha_emision or date.today()
+        if id_corrida is None:
+            with self.connection.transaction() as cursor:
+                cursor.execute(
+                    """
+                    INSERT INTO CorridaFacturacion
+                        (fecha_desde, fecha_hasta, fecha_emision, practica)
+                    VALUES (%s, %s, %s, %s)
+                    """,
+                    (fecha_desde, fecha_hasta, fecha_emision, practica),
+                )
+                id_corrida = cursor.lastrowid
+        else:
+            with self.connection.transaction() as cursor:
+                cursor.execute(
+                    """
+                    UPDATE CorridaFacturacion
+                    SET estado = 'en_curso', procesados = procesados - sin_tarifa,
+                        sin_tarifa = 0
+                    WHERE id_corrida = %s
+                    """,
+                    (id_corrida,),
+                )
+
+        tarifario = self.tarifario(self.obtener_tarifas())
+        turnos = self.obtener_turnos_sin_facturar(
+            fecha_desde, fecha_hasta, usar_cache=False
+        )
+        observacion = f"Facturación por lote #{id_corrida}"
+        resumen = {
+            "id_corrida": id_corrida,
+            "estado": "completa",
+            "total": len(turnos),
+            "procesados": 0,
+            "facturados": 0,
+            "sin_tarifa": 0,
+        }
+
+        try:
+            for inicio in range(0, len(turnos), chunk_size):
+                if detener is not None and detener.is_set():
+                    resumen["estado"] = "interrumpida"
+                    break
+
+                bloque = turnos[inicio : inicio + chunk_size]
+                filas = []
+                for turno in bloque:
+                    # turno[6] = es_particular, turno[7] = id_obra_social del paciente
+                    id_obra_social = None if turno[6] else turno[7]
+                    monto = self.precio(tarifario, id_obra_social, practica, turno[1])
+                    if monto is not None:
+                        filas.append((turno[0], fecha_emision, monto, observacion, turno[0]))
+                sin_tarifa = len(bloque) - len(filas)
+
+                with self.connection.transaction() as cursor:
+                    facturados = 0
+                    if filas:
+                        cursor.executemany(self.INSERT_SI_SIN_FACTURA, filas)
+                        facturados = cursor.rowcount
+                        marcas = ", ".join(["%s"] * len(filas))
+                        sumar_al_resumen(
+                            cursor,
+                            f"f.id_turno IN ({marcas}) AND f.observacion = %s",
+                            [fila[0] for fila in filas] + [observacion],
+                        )
+                    cursor.execute(
+                        """
+                        UPDATE CorridaFacturacion
+                        SET procesados = procesados + %s, facturados = facturados + %s,
+                            sin_tarifa = sin_tarifa + %s
+                        WHERE id_corrida = %s
+                        """,
+                        (len(bloque), facturados, sin_tarifa, id_corrida),
+                    )
+
+                resumen["procesados"] += len(bloque)
+                resumen["facturados"] += facturados
+                resumen["sin_tarifa"] += sin_tarifa
+                if progreso is not None:
+                    progreso(dict(resumen))
+        except Exception:
+            resumen["estado"] = "interrumpida"
+            raise
+        finally:
+            try:
+                with self.connection.transaction() as cursor:
+                    cursor.execute(
+                        "UPDATE CorridaFacturacion SET estado = %s WHERE id_corrida = %s",
+                        (resumen["estado"], id_corrida),
+                    )
+            except Error as e:
+                print(f"⚠️ No se pudo registrar el estado de la corrida: {e}")
+            turnos_sin_facturar.invalidar()
+
+        return resumen
+
     def marcar_como_pagada(self, factura_id):
         """Marcar factura como pagada"""
         query = "UPDATE Facturacion SET pagado = TRUE WHERE id_factura = %s"
-        cursor = self.connection.cursor()
-        try:
+        with self.connection.transaction() as cursor:
+            ajustar_resumen(cursor, [factura_id], -1)
             cursor.execute(query, (factura_id,))
-            self.connection.commit()
+            ajustar_resumen(cursor, [factura_id], 1)
             return cursor.rowcount > 0
-        except Exception as e:
-            self.connection.rollback()
-            raise e
 
 
+@instrumentada
+class ReportesQueries:
+    """Reportes de facturación sobre el resumen diario (ResumenFacturacion).
+
+    Un rango de varios años lee a lo sumo una fila por día, obra social,
+    doctor y estado de pago, en lugar de recorrer todo Facturacion con sus
+    joins.
+    """
+
+    # agrupar -> (expresión de la clave, expresión del nombre, orden)
+    AGRUPACIONES = {
+        "obra_social": (
+            "r.id_obra_social",
+            "COALESCE(os.nombre, 'Particular')",
+            "SUM(r.total) DESC",
+        ),
+        "doctor": ("r.id_doctor", "CONCAT(d.apellido, ', ', d.nombre)", "SUM(r.total) DESC"),
+        "dia": ("r.fecha", "r.fecha", "r.fecha"),
+        "mes": ("DATE_FORMAT(r.fecha, '%%Y-%%m')", "DATE_FORMAT(r.fecha, '%%Y-%%m')", "1"),
+    }
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def obtener_resumen(self, fecha_desde, fecha_hasta, agrupar="obra_social", pagado=None):
+        """Filas (clave, nombre, cantidad, total, cobrado) del rango, agrupadas"""
+        if agrupar not in self.AGRUPACIONES:
+            raise ValueError(f"Agrupación inválida: {agrupar}")
+        clave, nombre, orden = self.AGRUPACIONES[agrupar]
+        query = f"""
+        SELECT {clave}, {nombre}, SUM(r.cantidad), SUM(r.total),
+               SUM(CASE WHEN r.pagado THEN r.total ELSE 0 END)
+        FROM ResumenFacturacion r
+        LEFT JOIN ObraSocial os ON os.id_obra_social = r.id_obra_social
+        LEFT JOIN Doctor d ON d.id_doctor = r.id_doctor
+        WHERE r.fecha BETWEEN %s AND %s
+        """
+        params = [fecha_desde, fecha_hasta]
+        if pagado is not None:
+            query += " AND r.pagado = %s"
+            params.append(pagado)
+        query += f" GROUP BY {clave}, {nombre} HAVING SUM(r.cantidad) > 0 ORDER BY {orden}"
+        with self.connection.cursor() as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+
+    # Columnas de las copias en memoria del tablero; la primera es la clave
+    INSTANTANEAS = {
+        "Turno": "SELECT id_turno, id_doctor, id_paciente, fecha, es_particular FROM Turno",
+        "Facturacion": (
+            "SELECT id_factura, id_turno, fecha_emision, monto, pagado FROM Facturacion"
+        ),
+        "Paciente": "SELECT id_paciente, fecha_de_nacimiento FROM Paciente",
+    }
+    CLAVES = {"Turno": "id_turno", "Facturacion": "id_factura", "Paciente": "id_paciente"}
+
+    def obtener_filas_desde(self, tabla, marca=0, lote=10000):
+        """Filas de tabla con clave mayor a marca, en orden, de a bloques (generador)"""
+        clave = self.CLAVES[tabla]
+        query = f"{self.INSTANTANEAS[tabla]} WHERE {clave} > %s ORDER BY {clave} LIMIT %s"
+        while True:
+            with self.connection.cursor() as cursor:
+                cursor.execute(query, (marca, lote))
+                filas = cursor.fetchall()
+            if not filas:
+                return
+            yield filas
+            if len(filas) < lote:
+                return
+            marca = filas[-1][0]
+
+    def recalcular(self, fecha_desde, fecha_hasta):
+        """Rehacer el resumen del rango desde Facturacion.
+
+        El resumen guarda la obra social y el doctor que tenía cada factura al
+        emitirse o modificarse; esto lo alinea con los datos actuales.
+        """
+        with self.connection.transaction() as cursor:
+            recalcular_resumen(cursor, fecha_desde, fecha_hasta)
+
+
+@instrumentada
 class FichaMedicaQueries:
     def __init__(self, connection):
         self.connection = connection
 
-    def obtener_fichas_medicas(self):
-        """Obtener todas las fichas médicas con información de paciente y doctor"""
-        query = """
+    ORDEN = ("f.fecha_apertura", "f.id_ficha_medica")
+
+    @staticmethod
+    def clave_orden(fila):
+        """Clave keyset (fecha_apertura, id) de una fila de obtener_fichas_medicas"""
+        return (fila[4], fila[0])
+
+    SELECT_LISTADO = """
         SELECT f.id_ficha_medica, p.id_paciente,
                CONCAT(p.apellido, ', ', p.nombre) as paciente,
                COALESCE(CONCAT(d.apellido, ', ', d.nombre), 'No asignado') as doctor,
@@ -599,11 +1946,62 @@ class FichaMedicaQueries:
         FROM FichaMedica f
         JOIN Paciente p ON f.id_paciente = p.id_paciente
         LEFT JOIN Doctor d ON f.id_doctor = d.id_doctor
-        ORDER BY f.fecha_apertura DESC
+        WHERE 1=1
         """
-        cursor = self.connection.cursor()
-        cursor.execute(query)
-        return cursor.fetchall()
+
+    def obtener_fichas_medicas(self, limit=None, after=None, before=None):
+        """Obtener fichas médicas con información de paciente y doctor"""
+        query, params = paginar_keyset(
+            self.SELECT_LISTADO,
+            [],
+            self.ORDEN,
+            descendente=True,
+            limit=limit,
+            after=after,
+            before=before,
+        )
+        with self.connection.cursor() as cursor:
+            cursor.execute(query, params)
+            filas = cursor.fetchall()
+        return filas[::-1] if before is not None else filas
+
+    def exportar_fichas_medicas(self, lote=EXPORT_LOTE):
+        """Listado completo de fichas para exportar (ver DatabaseConnection.stream)"""
+        query, params = paginar_keyset(self.SELECT_LISTADO, [], self.ORDEN, descendente=True)
+        return self.connection.stream(query, params, lote)
+
+    def buscar_fichas(self, texto, limit=LIMITE_BUSQUEDA):
+        """Buscar fichas médicas por apellido y/o nombre del paciente.
+
+        Cada palabra debe ser prefijo del apellido o del nombre, así la
+        búsqueda usa los índices de Paciente(apellido, nombre) y Paciente(nombre)
+        en lugar de recorrer toda la tabla.
+        """
+        palabras = texto.split()
+        if not palabras:
+            return []
+
+        query = """
+        SELECT f.id_ficha_medica, p.id_paciente,
+               CONCAT(p.apellido, ', ', p.nombre) as paciente,
+               COALESCE(CONCAT(d.apellido, ', ', d.nombre), 'No asignado') as doctor,
+               f.fecha_apertura, f.grupo_sanguineo
+        FROM Paciente p
+        JOIN FichaMedica f ON f.id_paciente = p.id_paciente
+        LEFT JOIN Doctor d ON f.id_doctor = d.id_doctor
+        WHERE 1=1
+        """
+        params = []
+        for palabra in palabras:
+            query += " AND (p.apellido LIKE %s OR p.nombre LIKE %s)"
+            prefijo = escapar_like(palabra) + "%"
+            params.extend([prefijo, prefijo])
+        query += " ORDER BY p.apellido, p.nombre LIMIT %s"
+        params.append(limit)
+
+        with self.connection.cursor() as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchall()
 
     def obtener_ficha_medica_por_id(self, ficha_id):
         """Obtener una ficha médica específica por ID"""
@@ -614,9 +2012,7 @@ class FichaMedicaQueries:
         FROM FichaMedica
         WHERE id_ficha_medica = %s
         """
-        cursor = self.connection.cursor()
-        cursor.execute(query, (ficha_id,))
-        resultado = cursor.fetchone()
+        resultado = self.connection.consultar(query, (ficha_id,), uno=True)
         print(f"🔍 Query ficha ID {ficha_id}: {resultado}")  # Debug
         return resultado
 
@@ -629,9 +2025,7 @@ class FichaMedicaQueries:
         FROM FichaMedica
         WHERE id_paciente = %s
         """
-        cursor = self.connection.cursor()
-        cursor.execute(query, (paciente_id,))
-        return cursor.fetchone()
+        return self.connection.consultar(query, (paciente_id,), uno=True)
 
     def insertar_ficha_medica(self, datos_ficha):
         """Insertar nueva ficha médica"""
@@ -641,14 +2035,9 @@ class FichaMedicaQueries:
                          antecedentes_familiares, medicacion_actual)
         VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
         """
-        cursor = self.connection.cursor()
-        try:
+        with self.connection.transaction() as cursor:
             cursor.execute(query, datos_ficha)
-            self.connection.commit()
             return cursor.lastrowid
-        except Exception as e:
-            self.connection.rollback()
-            raise e
 
     def actualizar_ficha_medica(self, ficha_id, datos_ficha):
         """Actualizar ficha médica existente"""
@@ -659,14 +2048,9 @@ class FichaMedicaQueries:
             antecedentes_familiares = %s, medicacion_actual = %s
         WHERE id_ficha_medica = %s
         """
-        cursor = self.connection.cursor()
-        try:
+        with self.connection.transaction() as cursor:
             cursor.execute(query, (*datos_ficha, ficha_id))
-            self.connection.commit()
             return cursor.rowcount > 0
-        except Exception as e:
-            self.connection.rollback()
-            raise e
 
     def eliminar_ficha_medica(self, ficha_id):
         """Eliminar ficha médica"""
@@ -675,90 +2059,97 @@ class FichaMedicaQueries:
             query_check = (
                 "SELECT COUNT(*) FROM ConsultaMedica WHERE id_ficha_medica = %s"
             )
-            cursor = self.connection.cursor()
-            cursor.execute(query_check, (ficha_id,))
-            count = cursor.fetchone()[0]
-
-            if count > 0:
-                return (
-                    False,
-                    "No se puede eliminar la ficha médica porque tiene consultas asociadas",
-                )
-
-            query = "DELETE FROM FichaMedica WHERE id_ficha_medica = %s"
-            cursor.execute(query, (ficha_id,))
-            self.connection.commit()
-            return True, "Ficha médica eliminada correctamente"
+            with self.connection.transaction() as cursor:
+                cursor.execute(query_check, (ficha_id,))
+                count = cursor.fetchone()[0]
+
+                if count > 0:
+                    return (
+                        False,
+                        "No se puede eliminar la ficha médica porque tiene consultas asociadas",
+                    )
+
+                query = "DELETE FROM FichaMedica WHERE id_ficha_medica = %s"
+                cursor.execute(query, (ficha_id,))
+                return True, "Ficha médica eliminada correctamente"
         except Exception as e:
-            self.connection.rollback()
             return False, f"Error al eliminar ficha médica: {str(e)}"
 
+    def obtener_pacientes_con_ficha(self):
+        """Conjunto de ids de pacientes que ya tienen ficha (lee solo el índice)"""
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT DISTINCT id_paciente FROM FichaMedica")
+            return {fila[0] for fila in cursor.fetchall()}
+
     def obtener_pacientes_sin_ficha(self):
         """Obtener pacientes que no tienen ficha médica"""
         query = """
         SELECT p.id_paciente, CONCAT(p.apellido, ', ', p.nombre) as paciente
         FROM Paciente p
-        WHERE p.id_paciente NOT IN (SELECT id_paciente FROM FichaMedica)
+        LEFT JOIN FichaMedica f ON f.id_paciente = p.id_paciente
+        WHERE f.id_ficha_medica IS NULL
         ORDER BY p.apellido, p.nombre
         """
-        cursor = self.connection.cursor()
-        cursor.execute(query)
-        return cursor.fetchall()
+        with self.connection.cursor() as cursor:
+            cursor.execute(query)
+            return cursor.fetchall()
 
 
 from mysql.connector import Error
 
 
+@instrumentada
 class ConsultaMedicaQueries:
     def __init__(self, conn):
         self.conn = conn
 
     def obtener_consultas_por_ficha(self, ficha_id):
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(
-                """
-                SELECT id_consulta, fecha_consulta, diagnostico, tratamiento
-                FROM ConsultaMedica
-                WHERE id_ficha_medica = %s
-                ORDER BY fecha_consulta DESC
-            """,
-                (ficha_id,),
-            )
-            return cursor.fetchall()
+            with self.conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT id_consulta, fecha_consulta, diagnostico, tratamiento
+                    FROM ConsultaMedica
+                    WHERE id_ficha_medica = %s
+                    ORDER BY fecha_consulta DESC
+                """,
+                    (ficha_id,),
+                )
+                return cursor.fetchall()
         except Error as e:
             print(f"❌ Error al obtener consultas: {e}")
             return []
 
+    INSERT = """
+        INSERT INTO ConsultaMedica (id_ficha_medica, fecha_consulta, diagnostico, tratamiento, observaciones)
+        VALUES (%s, %s, %s, %s, %s)
+        """
+
     def insertar_consulta(self, datos):
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO ConsultaMedica (id_ficha_medica, fecha_consulta, diagnostico, tratamiento, observaciones)
-                VALUES (%s, %s, %s, %s, %s)
-            """,
-                datos,
-            )
-            self.conn.commit()
-            return cursor.lastrowid
+            with self.conn.transaction() as cursor:
+                cursor.execute(self.INSERT, datos)
+                return cursor.lastrowid
         except Error as e:
             print(f"❌ Error al insertar consulta: {e}")
-            self.conn.rollback()
             return None
 
+    def insertar_consultas(self, filas, chunk_size=DB_BULK_CHUNK):
+        """Insertar muchas consultas por bloques (ver ejecutar_en_lotes)"""
+        return ejecutar_en_lotes(self.conn, self.INSERT, filas, chunk_size)
+
     def obtener_consulta_por_id(self, consulta_id):
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(
-                """
-                SELECT id_consulta, id_ficha_medica, fecha_consulta, diagnostico, tratamiento, observaciones
-                FROM ConsultaMedica
-                WHERE id_consulta = %s
-            """,
-                (consulta_id,),
-            )
-            return cursor.fetchone()
+            with self.conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT id_consulta, id_ficha_medica, fecha_consulta, diagnostico, tratamiento, observaciones
+                    FROM ConsultaMedica
+                    WHERE id_consulta = %s
+                """,
+                    (consulta_id,),
+                )
+                return cursor.fetchone()
         except Error as e:
             print(f"❌ Error al obtener consulta por id: {e}")
             return None
@@ -766,89 +2157,87 @@ class ConsultaMedicaQueries:
     def actualizar_consulta(self, consulta_id, datos):
         # datos = (fecha, diagnostico, tratamiento, observaciones)
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(
-                """
-                UPDATE ConsultaMedica
-                SET fecha_consulta = %s,
-                    diagnostico = %s,
-                    tratamiento = %s,
-                    observaciones = %s
-                WHERE id_consulta = %s
-            """,
-                (*datos, consulta_id),
-            )
-            self.conn.commit()
-            return cursor.rowcount > 0
+            with self.conn.transaction() as cursor:
+                cursor.execute(
+                    """
+                    UPDATE ConsultaMedica
+                    SET fecha_consulta = %s,
+                        diagnostico = %s,
+                        tratamiento = %s,
+                        observaciones = %s
+                    WHERE id_consulta = %s
+                """,
+                    (*datos, consulta_id),
+                )
+                return cursor.rowcount > 0
         except Error as e:
             print(f"❌ Error al actualizar consulta: {e}")
-            self.conn.rollback()
             return False
 
     def eliminar_consulta(self, consulta_id):
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(
-                "DELETE FROM ConsultaMedica WHERE id_consulta = %s", (consulta_id,)
-            )
-            self.conn.commit()
-            return cursor.rowcount > 0
+            with self.conn.transaction() as cursor:
+                cursor.execute(
+                    "DELETE FROM ConsultaMedica WHERE id_consulta = %s", (consulta_id,)
+                )
+                return cursor.rowcount > 0
         except Error as e:
             print(f"❌ Error al eliminar consulta: {e}")
-            self.conn.rollback()
             return False
 
 
+@instrumentada
 class RecetaMedicaQueries:
     def __init__(self, conn):
         self.conn = conn
 
     def obtener_recetas_por_consulta(self, consulta_id):
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(
-                """
-                SELECT id_receta, medicamento, dosis, frecuencia, duracion
-                FROM RecetaMedica
-                WHERE id_consulta = %s
-                ORDER BY id_receta DESC
-            """,
-                (consulta_id,),
-            )
-            return cursor.fetchall()
+            with self.conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT id_receta, medicamento, dosis, frecuencia, duracion
+                    FROM RecetaMedica
+                    WHERE id_consulta = %s
+                    ORDER BY id_receta DESC
+                """,
+                    (consulta_id,),
+                )
+                return cursor.fetchall()
         except Error as e:
             print(f"❌ Error al obtener recetas: {e}")
             return []
 
+    INSERT = """
+        INSERT INTO RecetaMedica (id_consulta, medicamento, dosis, frecuencia, duracion)
+        VALUES (%s, %s, %s, %s, %s)
+        """
+
     def insertar_receta(self, datos):
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO RecetaMedica (id_consulta, medicamento, dosis, frecuencia, duracion)
-                VALUES (%s, %s, %s, %s, %s)
-            """,
-                datos,
-            )
-            self.conn.commit()
-            return cursor.lastrowid
+            with self.conn.transaction() as cursor:
+                cursor.execute(self.INSERT, datos)
+                return cursor.lastrowid
         except Error as e:
             print(f"❌ Error al insertar receta: {e}")
-            self.conn.rollback()
             return None
 
+    def insertar_recetas(self, filas, chunk_size=DB_BULK_CHUNK):
+        """Insertar muchas recetas por bloques (ver ejecutar_en_lotes)"""
+        return ejecutar_en_lotes(self.conn, self.INSERT, filas, chunk_size)
+
     def obtener_receta_por_id(self, receta_id):
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(
-                """
-                SELECT id_receta, id_consulta, medicamento, dosis, frecuencia, duracion
-                FROM RecetaMedica
-                WHERE id_receta = %s
-            """,
-                (receta_id,),
-            )
-            return cursor.fetchone()
+            with self.conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT id_receta, id_consulta, medicamento, dosis, frecuencia, duracion
+                    FROM RecetaMedica
+                    WHERE id_receta = %s
+                """,
+                    (receta_id,),
+                )
+                return cursor.fetchone()
         except Error as e:
             print(f"❌ Error al obtener receta por id: {e}")
             return None
@@ -856,86 +2245,84 @@ class RecetaMedicaQueries:
     def actualizar_receta(self, receta_id, datos):
         # datos = (medicamento, dosis, frecuencia, duracion)
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(
-                """
-                UPDATE RecetaMedica
-                SET medicamento=%s, dosis=%s, frecuencia=%s, duracion=%s
-                WHERE id_receta = %s
-            """,
-                (*datos, receta_id),
-            )
-            self.conn.commit()
-            return cursor.rowcount > 0
+            with self.conn.transaction() as cursor:
+                cursor.execute(
+                    """
+                    UPDATE RecetaMedica
+                    SET medicamento=%s, dosis=%s, frecuencia=%s, duracion=%s
+                    WHERE id_receta = %s
+                """,
+                    (*datos, receta_id),
+                )
+                return cursor.rowcount > 0
         except Error as e:
             print(f"❌ Error al actualizar receta: {e}")
-            self.conn.rollback()
             return False
 
     def eliminar_receta(self, receta_id):
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(
-                "DELETE FROM RecetaMedica WHERE id_receta = %s", (receta_id,)
-            )
-            self.conn.commit()
-            return cursor.rowcount > 0
+            with self.conn.transaction() as cursor:
+                cursor.execute(
+                    "DELETE FROM RecetaMedica WHERE id_receta = %s", (receta_id,)
+                )
+                return cursor.rowcount > 0
         except Error as e:
             print(f"❌ Error al eliminar receta: {e}")
-            self.conn.rollback()
             return False
 
 
+@instrumentada
 class EstudioMedicoQueries:
     def __init__(self, conn):
         self.conn = conn
 
     def obtener_estudios_por_consulta(self, consulta_id):
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(
-                """
-                SELECT id_estudio, tipo_estudio, fecha_estudio, resultados
-                FROM EstudioMedico
-                WHERE id_consulta = %s
-                ORDER BY fecha_estudio DESC
-            """,
-                (consulta_id,),
-            )
-            return cursor.fetchall()
+            with self.conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT id_estudio, tipo_estudio, fecha_estudio, resultados
+                    FROM EstudioMedico
+                    WHERE id_consulta = %s
+                    ORDER BY fecha_estudio DESC
+                """,
+                    (consulta_id,),
+                )
+                return cursor.fetchall()
         except Error as e:
             print(f"❌ Error al obtener estudios: {e}")
             return []
 
+    INSERT = """
+        INSERT INTO EstudioMedico (id_consulta, tipo_estudio, fecha_estudio, resultados)
+        VALUES (%s, %s, %s, %s)
+        """
+
     def insertar_estudio(self, datos):
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(
-                """
-                INSERT INTO EstudioMedico (id_consulta, tipo_estudio, fecha_estudio, resultados)
-                VALUES (%s, %s, %s, %s)
-            """,
-                datos,
-            )
-            self.conn.commit()
-            return cursor.lastrowid
+            with self.conn.transaction() as cursor:
+                cursor.execute(self.INSERT, datos)
+                return cursor.lastrowid
         except Error as e:
             print(f"❌ Error al insertar estudio: {e}")
-            self.conn.rollback()
             return None
 
+    def insertar_estudios(self, filas, chunk_size=DB_BULK_CHUNK):
+        """Insertar muchas estudios por bloques (ver ejecutar_en_lotes)"""
+        return ejecutar_en_lotes(self.conn, self.INSERT, filas, chunk_size)
+
     def obtener_estudio_por_id(self, estudio_id):
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(
-                """
-                SELECT id_estudio, id_consulta, tipo_estudio, fecha_estudio, resultados
-                FROM EstudioMedico
-                WHERE id_estudio = %s
-            """,
-                (estudio_id,),
-            )
-            return cursor.fetchone()
+            with self.conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT id_estudio, id_consulta, tipo_estudio, fecha_estudio, resultados
+                    FROM EstudioMedico
+                    WHERE id_estudio = %s
+                """,
+                    (estudio_id,),
+                )
+                return cursor.fetchone()
         except Error as e:
             print(f"❌ Error al obtener estudio por id: {e}")
             return None
@@ -943,31 +2330,27 @@ class EstudioMedicoQueries:
     def actualizar_estudio(self, estudio_id, datos):
         # datos = (tipo_estudio, fecha_estudio, resultados)
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(
-                """
-                UPDATE EstudioMedico
-                SET tipo_estudio=%s, fecha_estudio=%s, resultados=%s
-                WHERE id_estudio = %s
-            """,
-                (*datos, estudio_id),
-            )
-            self.conn.commit()
-            return cursor.rowcount > 0
+            with self.conn.transaction() as cursor:
+                cursor.execute(
+                    """
+                    UPDATE EstudioMedico
+                    SET tipo_estudio=%s, fecha_estudio=%s, resultados=%s
+                    WHERE id_estudio = %s
+                """,
+                    (*datos, estudio_id),
+                )
+                return cursor.rowcount > 0
         except Error as e:
             print(f"❌ Error al actualizar estudio: {e}")
-            self.conn.rollback()
             return False
 
     def eliminar_estudio(self, estudio_id):
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(
-                "DELETE FROM EstudioMedico WHERE id_estudio = %s", (estudio_id,)
-            )
-            self.conn.commit()
-            return cursor.rowcount > 0
+            with self.conn.transaction() as cursor:
+                cursor.execute(
+                    "DELETE FROM EstudioMedico WHERE id_estudio = %s", (estudio_id,)
+                )
+                return cursor.rowcount > 0
         except Error as e:
             print(f"❌ Error al eliminar estudio: {e}")
-            self.conn.rollback()
             return False
@@ -1,129 +1,239 @@
+import importlib
+import sys
 import tkinter as tk
 from tkinter import ttk, messagebox
 
-from database.connection import DatabaseConnection
-
-# Importar módulos
-from modules.doctores import DoctoresModule
-from modules.pacientes import PacientesModule
-from modules.turnos import TurnosModule
-from modules.usuarios import UsuariosModule
-from modules.facturacion import FacturacionModule
-from modules.ficha_medica import FichaMedicaModule
+from utils.arranque import Cronometro, PerfilImportaciones, modo_debug
+
+cronometro = Cronometro()
+DEBUG = modo_debug()
+# En modo debug se miden todas las importaciones desde acá
+perfil_importaciones = PerfilImportaciones().instalar() if DEBUG else None
+
+from database.cache import lookup_cache  # noqa: E402
+from utils.executor import shutdown_executor  # noqa: E402
+from utils.perfil_ui import OverlayRendimiento, perfil_ui  # noqa: E402
+
+# Pestañas: clave -> (texto, módulo, clase). Los módulos se importan y se
+# construyen recién cuando se abre la pestaña por primera vez.
+PESTANAS = {
+    "pacientes": ("👥 Pacientes", "modules.pacientes", "PacientesModule"),
+    "turnos": ("📅 Turnos", "modules.turnos", "TurnosModule"),
+    "doctores": ("👨‍⚕️ Doctores", "modules.doctores", "DoctoresModule"),
+    "usuarios": ("👤 Usuarios", "modules.usuarios", "UsuariosModule"),
+    "facturacion": ("💰 Facturación", "modules.facturacion", "FacturacionModule"),
+    "ficha_medica": ("📋 Ficha Médica", "modules.ficha_medica", "FichaMedicaModule"),
+    "reportes": ("📈 Reportes", "modules.reportes", "ReportesModule"),
+    "diagnostico": ("🩺 Diagnóstico", "modules.diagnostico", "DiagnosticoModule"),
+}
+
+PESTANAS_BASE = ["pacientes", "turnos"]
+PESTANAS_POR_ROL = {
+    "Administrador": PESTANAS_BASE
+    + ["doctores", "usuarios", "facturacion", "ficha_medica", "reportes", "diagnostico"],
+    "Cardiólogo": PESTANAS_BASE + ["ficha_medica"],
+    "Secretaria": PESTANAS_BASE + ["facturacion", "reportes"],
+}
 
 
 class ConsultorioApp:
-    def __init__(self, root, user_id, username, rol, nombre_completo):
-        self.root = root
+    def __init__(self, sesion, user_id, username, rol, nombre_completo):
+        self.sesion = sesion
+        self.root = sesion.root
         self.user_id = user_id
         self.username = username
         self.rol = rol
         self.nombre_completo = nombre_completo
+        self.cronometro = Cronometro()
 
         self.root.title(
             f"Sistema de Consultorio Médico - Cardiología - Usuario: {nombre_completo} ({rol})"
         )
+        self.root.resizable(True, True)
         self.root.geometry("1200x700")
 
         # Manejar cierre
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
-        # Conectar a la base de datos
-        self.db = DatabaseConnection()
-        self.conn = self.db.connect()
-
-        if not self.conn:
-            messagebox.showerror(
-                "Error de Conexión",
-                "No se pudo conectar a la base de datos.\n\n"
-                "• Verifica que MySQL esté en ejecución\n"
-                "• Que la base 'consultorioMedico' exista\n"
-                "• Revisá usuario y contraseña en database/connection.py",
-            )
-            root.destroy()
-            return
+        # El pool de la sesión, ya conectado desde el login
+        self.db = sesion.db
+        self.conn = sesion.db
 
         # Construir interfaz
+        self.create_menu()
         self.create_main_frame()
+        self.cronometro.marcar("primera pestaña")
+        if DEBUG:
+            self.cronometro.reporte()
+            # F12 muestra los tiempos de carga de cada vista
+            self.root.bind("<F12>", lambda event: OverlayRendimiento(self.root))
+            print("🐞 Modo debug: F12 para ver los tiempos de la interfaz")
 
         print(f"✅ Aplicación iniciada para {nombre_completo} ({rol})")
 
+    def create_menu(self):
+        self.menu = tk.Menu(self.root)
+        menu_sesion = tk.Menu(self.menu, tearoff=0)
+        menu_sesion.add_command(label="Cerrar Sesión", command=self.sesion.cerrar_sesion)
+        menu_sesion.add_separator()
+        menu_sesion.add_command(label="Salir", command=self.on_closing)
+        self.menu.add_cascade(label="Sesión", menu=menu_sesion)
+        self.root.configure(menu=self.menu)
+
     def create_main_frame(self):
 
         # Notebook principal
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill="both", expand=True, padx=10, pady=10)
 
+        # Cada pestaña empieza como un marco vacío; el módulo se construye
+        # (y carga sus datos) la primera vez que se la selecciona
+        self.pendientes = {}
+        for clave in PESTANAS_POR_ROL.get(self.rol, PESTANAS_BASE):
+            marco = ttk.Frame(self.notebook)
+            self.notebook.add(marco, text=PESTANAS[clave][0])
+            self.pendientes[str(marco)] = clave
+
+        self.notebook.bind("<<NotebookTabChanged>>", self.construir_pestana)
+        self.construir_pestana()
+        print("✅ Módulos cargados correctamente")
+
+    def construir_pestana(self, event=None):
+        """Construir el módulo de la pestaña seleccionada si todavía no existe"""
+        marco = self.notebook.select()
+        clave = self.pendientes.pop(marco, None)
+        if clave is None:
+            return
+
+        texto, ruta, clase = PESTANAS[clave]
+        cronometro_pestana = Cronometro()
         try:
-            # Módulos base
-            self.pacientes_module = PacientesModule(self.notebook, self.conn)
-            self.turnos_module = TurnosModule(self.notebook, self.conn)
+            modulo = getattr(importlib.import_module(ruta), clase)
+            cronometro_pestana.marcar("importar")
+            instancia = modulo(self.notebook.nametowidget(marco), self.conn)
+            cronometro_pestana.marcar("construir")
+        except Exception as e:
+            self.pendientes[marco] = clave
+            messagebox.showerror("Error", f"Error al cargar {texto}:\n{str(e)}")
+            return
 
-            self.notebook.add(self.pacientes_module.frame, text="👥 Pacientes")
-            self.notebook.add(self.turnos_module.frame, text="📅 Turnos")
+        instancia.frame.pack(fill="both", expand=True)
+        setattr(self, f"{clave}_module", instancia)
+        if DEBUG:
+            etapas = ", ".join(f"{n} {t * 1000:.0f} ms" for n, t, _ in cronometro_pestana.etapas)
+            print(f"⏱️ Pestaña {clave}: {etapas}")
 
-            # Módulos por rol
-            if self.rol == "Administrador":
-                self.doctores_module = DoctoresModule(self.notebook, self.conn)
-                self.usuarios_module = UsuariosModule(self.notebook, self.conn)
-                self.facturacion_module = FacturacionModule(self.notebook, self.conn)
-                self.ficha_medica_module = FichaMedicaModule(self.notebook, self.conn)
+    def on_closing(self):
+        """Cerrar aplicación correctamente"""
+        self.sesion.salir()
 
-                self.notebook.add(self.doctores_module.frame, text="👨‍⚕️ Doctores")
-                self.notebook.add(self.usuarios_module.frame, text="👤 Usuarios")
-                self.notebook.add(self.facturacion_module.frame, text="💰 Facturación")
-                self.notebook.add(self.ficha_medica_module.frame, text="📋 Ficha Médica")
 
-            elif self.rol == "Cardiólogo":
-                self.ficha_medica_module = FichaMedicaModule(self.notebook, self.conn)
-                self.notebook.add(self.ficha_medica_module.frame, text="📋 Ficha Médica")
+class Sesion:
+    """Ventana raíz y pool de conexiones, desde el login hasta salir.
 
-            elif self.rol == "Secretaria":
-                self.facturacion_module = FacturacionModule(self.notebook, self.conn)
-                self.notebook.add(self.facturacion_module.frame, text="💰 Facturación")
+    La misma ventana y la misma conexión del login pasan a la aplicación
+    principal (y vuelven al login al cerrar sesión), así el ingreso no paga
+    otra conexión a MySQL ni recrea Tk.
+    """
 
-            print("✅ Módulos cargados correctamente")
+    def __init__(self):
+        self.root = tk.Tk()
+        self.db = None
+        self.login = None
+        self.app = None
 
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al cargar módulos:\n{str(e)}")
-            self.root.destroy()
-
-    def on_closing(self):
-        """Cerrar aplicación correctamente"""
-        if self.db:
-            self.db.disconnect()
-        print("👋 Aplicación cerrada")
-        self.root.destroy()
+    def mostrar_login(self):
+        from modules.login import LoginWindow
 
+        self.limpiar()
+        self.login = LoginWindow(self.root, self.iniciar, on_salir=self.salir)
+        if self.db is not None:
+            self.login.set_connection(self.db)
 
-def iniciar_aplicacion_principal(user_id, username, rol, nombre_completo):
-    """Función llamada luego de login exitoso"""
-    root = tk.Tk()
-    app = ConsultorioApp(root, user_id, username, rol, nombre_completo)
-    root.mainloop()
+    def conectar(self):
+        """Conectar y migrar con la ventana de login ya visible"""
+        from database.connection import DatabaseConnection
+        from database.migrations import migrar
 
+        self.db = DatabaseConnection()
+        if not self.db.connect():
+            self.db = None
+            messagebox.showerror(
+                "Error de Conexión",
+                "No se pudo conectar a la base de datos.\n\n"
+                "• Verifica que MySQL esté en ejecución\n"
+                "• Que la base 'consultorioMedico' exista\n"
+                "• Revisá usuario y contraseña en config/config.py",
+            )
+            self.salir()
+            return
+        cronometro.marcar("conexión a la base")
 
-if __name__ == "__main__":
+        # Poner al día el esquema (tablas e índices) antes de usar la base
+        try:
+            version = migrar(self.db)
+            print(f"🗂️ Esquema en versión {version}")
+        except Exception as e:
+            print(f"⚠️ No se pudieron aplicar las migraciones: {e}")
+        cronometro.marcar("migraciones")
 
-    from modules.login import LoginWindow
+        self.login.set_connection(self.db)
+        print("🔌 Conexión establecida para login")
+        if DEBUG:
+            cronometro.reporte()
+            perfil_importaciones.reporte()
 
-    def on_login_success(user_id, username, rol, nombre_completo):
+    def iniciar(self, user_id, username, rol, nombre_completo):
+        """Llamada luego de login exitoso: la aplicación reemplaza al login"""
         print("🎉 Login exitoso, iniciando sistema...")
-        login_root.destroy()
-        iniciar_aplicacion_principal(user_id, username, rol, nombre_completo)
+        self.limpiar()
+        self.login = None
+        self.app = ConsultorioApp(self, user_id, username, rol, nombre_completo)
+
+    def cerrar_sesion(self):
+        """Volver al login conservando la ventana y la conexión"""
+        print(f"🔒 Sesión cerrada ({self.app.username})")
+        self.app = None
+        # Los pedidos pendientes apuntan a widgets que se destruyen
+        shutdown_executor()
+        self.mostrar_login()
+
+    def limpiar(self):
+        """Quitar de la ventana raíz todo lo que dejó la pantalla anterior"""
+        for widget in self.root.winfo_children():
+            widget.destroy()
+        self.root.configure(menu="")
+        self.root.unbind("<Return>")
+
+    def salir(self):
+        shutdown_executor()
+        if self.db is not None:
+            print(f"📊 Pool de conexiones: {self.db.stats()}")
+            print(f"📊 Cache de combos: {lookup_cache.stats()}")
+            self.db.disconnect()
+            self.db = None
+        if DEBUG and perfil_ui.stats():
+            print(f"🐞 Tiempos de la interfaz en {perfil_ui.exportar_json()}")
+        print("👋 Aplicación cerrada")
+        self.root.destroy()
 
-    # Crear ventana login
-    login_root = tk.Tk()
-    login_app = LoginWindow(login_root, on_login_success)
 
-    # Conectar BD solo para login
-    db = DatabaseConnection()
-    conn = db.connect()
+if __name__ == "__main__":
 
-    if conn:
-        login_app.set_connection(conn)
-        print("🔌 Conexión establecida para login")
-        login_root.mainloop()
-    else:
-        messagebox.showerror("Error", "No se pudo conectar a la base de datos")
-        login_root.destroy()
+    sesion = Sesion()
+    sesion.mostrar_login()
+    cronometro.marcar("construir login")
+
+    def ventana_visible():
+        sesion.root.update_idletasks()
+        cronometro.marcar("ventana de login")
+        if "--medir-arranque" in sys.argv:
+            # Usado por benchmarks/bench_arranque.py
+            print(f"ventana_login {cronometro.total():.4f}", flush=True)
+            sesion.root.destroy()
+            return
+        # El driver de MySQL y la conexión se cargan con la ventana ya en pantalla
+        sesion.root.after(1, sesion.conectar)
+
+    sesion.root.after_idle(ventana_visible)
+    sesion.root.mainloop()
@@ -0,0 +1,144 @@
+# modules/diagnostico.py
+from tkinter import ttk, messagebox
+from database.cache import lookup_cache
+from database.metricas import metricas
+
+# Columna del Treeview -> clave de metricas.stats()
+COLUMNAS_METODOS = {
+    "Método": None,
+    "Llamadas": "llamadas",
+    "Errores": "errores",
+    "Filas": "filas",
+    "p50 ms": "p50_ms",
+    "p95 ms": "p95_ms",
+    "p99 ms": "p99_ms",
+    "Máx ms": "max_ms",
+    "Total ms": "total_ms",
+}
+
+
+class DiagnosticoModule:
+    """Solo para Administrador: latencias por método de consulta, consultas
+    lentas y estado del pool de conexiones y de los caches."""
+
+    def __init__(self, parent, connection):
+        self.connection = connection
+        self.orden = "Total ms"
+
+        self.frame = ttk.Frame(parent)
+        self.create_widgets()
+        self.actualizar()
+
+    def create_widgets(self):
+        # Frame de estado general
+        estado_frame = ttk.LabelFrame(self.frame, text="Estado")
+        estado_frame.pack(fill="x", padx=5, pady=5)
+        self.pool_label = ttk.Label(estado_frame, text="")
+        self.pool_label.pack(anchor="w", padx=5, pady=2)
+        self.cache_label = ttk.Label(estado_frame, text="")
+        self.cache_label.pack(anchor="w", padx=5, pady=2)
+
+        notebook = ttk.Notebook(self.frame)
+        notebook.pack(fill="both", expand=True, padx=5, pady=5)
+        metodos = ttk.Frame(notebook)
+        lentas = ttk.Frame(notebook)
+        notebook.add(metodos, text="Consultas por método")
+        notebook.add(lentas, text=f"Consultas lentas (≥ {metricas.umbral_ms} ms)")
+
+        # Treeview de métodos; clic en un encabezado para ordenar
+        columns = tuple(COLUMNAS_METODOS)
+        self.tree = ttk.Treeview(metodos, columns=columns, show="headings", height=15)
+        for col in columns:
+            self.tree.heading(col, text=col, command=lambda c=col: self.ordenar(c))
+            if col == "Método":
+                self.tree.column(col, width=320)
+            else:
+                self.tree.column(col, width=80, anchor="e")
+        scrollbar = ttk.Scrollbar(metodos, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill="both", expand=True, padx=5, pady=5)
+        scrollbar.pack(side="right", fill="y", padx=5, pady=5)
+
+        # Treeview de consultas lentas, la más reciente primero
+        columns = ("Momento", "Método", "ms", "Argumentos")
+        self.lentas_tree = ttk.Treeview(lentas, columns=columns, show="headings", height=15)
+        column_widths = {"Momento": 140, "Método": 260, "ms": 80, "Argumentos": 400}
+        for col in columns:
+            self.lentas_tree.heading(col, text=col)
+            self.lentas_tree.column(
+                col, width=column_widths[col], anchor="e" if col == "ms" else "w"
+            )
+        scrollbar = ttk.Scrollbar(lentas, orient="vertical", command=self.lentas_tree.yview)
+        self.lentas_tree.configure(yscrollcommand=scrollbar.set)
+        self.lentas_tree.pack(side="left", fill="both", expand=True, padx=5, pady=5)
+        scrollbar.pack(side="right", fill="y", padx=5, pady=5)
+
+        # Frame de botones
+        button_frame = ttk.Frame(self.frame)
+        button_frame.pack(fill="x", padx=5, pady=5)
+        ttk.Button(button_frame, text="Actualizar", command=self.actualizar).pack(
+            side="left", padx=5
+        )
+        ttk.Button(button_frame, text="Reiniciar Métricas", command=self.reiniciar).pack(
+            side="left", padx=5
+        )
+        ttk.Label(
+            button_frame, text=f"Log de consultas lentas: {metricas.archivo}"
+        ).pack(side="right", padx=5)
+
+    def actualizar(self):
+        pool = self.connection.stats()
+        self.pool_label.configure(
+            text=f"Pool: {pool['in_use']} en uso, {pool['idle']} libres de "
+            f"{pool['max_size']} · espera promedio {pool['wait_avg_ms']:.1f} ms "
+            f"(máx {pool['wait_max_ms']:.0f} ms) · reconexiones {pool['reconnects']} · "
+            f"sentencias preparadas {pool['stmt_cached']} "
+            f"({pool['stmt_hit_rate']:.0%} reutilizadas)"
+        )
+        cache = lookup_cache.stats()
+        self.cache_label.configure(
+            text=f"Cache de combos: {cache['entries']} listas, "
+            f"{cache['hit_rate']:.0%} de aciertos "
+            f"({cache['hits']} de {cache['hits'] + cache['misses']})"
+        )
+
+        for item in self.tree.get_children():
+            self.tree.delete(item)
+        clave = COLUMNAS_METODOS[self.orden]
+        stats = metricas.stats()
+        metodos = sorted(
+            stats,
+            key=lambda m: m if clave is None else stats[m][clave],
+            reverse=clave is not None,
+        )
+        for metodo in metodos:
+            datos = stats[metodo]
+            self.tree.insert(
+                "",
+                "end",
+                values=(
+                    metodo,
+                    datos["llamadas"],
+                    datos["errores"],
+                    datos["filas"],
+                    f"{datos['p50_ms']:.1f}",
+                    f"{datos['p95_ms']:.1f}",
+                    f"{datos['p99_ms']:.1f}",
+                    f"{datos['max_ms']:.1f}",
+                    f"{datos['total_ms']:.0f}",
+                ),
+            )
+
+        for item in self.lentas_tree.get_children():
+            self.lentas_tree.delete(item)
+        for momento, metodo, ms, detalle in metricas.lentas_recientes():
+            self.lentas_tree.insert("", "end", values=(momento, metodo, f"{ms:.0f}", detalle))
+
+    def ordenar(self, columna):
+        self.orden = columna
+        self.actualizar()
+
+    def reiniciar(self):
+        if messagebox.askyesno("Confirmar", "¿Reiniciar las métricas de consultas?"):
+            metricas.reiniciar()
+            self.actualizar()
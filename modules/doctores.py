@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from database import queries
+from utils.perfil_ui import Medicion
 
 
 class DoctoresModule:
@@ -72,13 +73,17 @@ class DoctoresModule:
         )
 
     def load_doctores(self):
-        # Limpiar treeview
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        medicion = Medicion("doctores")
+        with medicion.fase("fetch"):
+            doctores = self.queries.obtener_doctores()
 
-        doctores = self.queries.obtener_doctores()
-        for doctor in doctores:
-            self.tree.insert("", "end", values=doctor)
+        with medicion.fase("render"):
+            # Limpiar treeview
+            for item in self.tree.get_children():
+                self.tree.delete(item)
+            for doctor in doctores:
+                self.tree.insert("", "end", values=doctor)
+        medicion.terminar(len(doctores))
 
     def buscar_por_dni(self):
         dni = self.dni_search.get()
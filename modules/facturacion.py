@@ -1,8 +1,12 @@
 # modules/facturacion.py
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime, date
-from database.queries import FacturacionQueries
+from database.queries import FacturacionQueries, PacientesQueries, DoctoresQueries
+from utils.executor import get_executor
+from utils.exportar import dialogo_exportar
+from utils.virtual_tree import VirtualTreeview
 
 
 class FacturacionModule:
@@ -11,6 +15,7 @@ class FacturacionModule:
         self.queries = FacturacionQueries(connection)
 
         self.frame = ttk.Frame(parent)
+        self.executor = get_executor(self.frame)
         self.create_widgets()
         self.load_facturas()
 
@@ -29,11 +34,50 @@ class FacturacionModule:
         self.fecha_hasta.grid(row=0, column=3, padx=5, pady=5)
         self.fecha_hasta.insert(0, "2025-12-31")
 
+        ttk.Label(filter_frame, text="Pagado:").grid(row=0, column=4, padx=5, pady=5)
+        self.pagado_filtro = ttk.Combobox(
+            filter_frame, values=["Todas", "Sí", "No"], state="readonly", width=8
+        )
+        self.pagado_filtro.grid(row=0, column=5, padx=5, pady=5)
+        self.pagado_filtro.set("Todas")
+
         ttk.Button(filter_frame, text="Filtrar", command=self.filtrar_facturas).grid(
-            row=0, column=4, padx=5, pady=5
+            row=0, column=6, padx=5, pady=5
         )
         ttk.Button(filter_frame, text="Mostrar Todas", command=self.load_facturas).grid(
-            row=0, column=5, padx=5, pady=5
+            row=0, column=7, padx=5, pady=5
+        )
+
+        ttk.Label(filter_frame, text="Obra Social:").grid(
+            row=1, column=0, padx=5, pady=5
+        )
+        self.obra_social_filtro = ttk.Combobox(
+            filter_frame, values=["Todas"], state="readonly", width=25
+        )
+        self.obra_social_filtro.grid(row=1, column=1, columnspan=3, padx=5, pady=5)
+        self.obra_social_filtro.set("Todas")
+
+        ttk.Label(filter_frame, text="Doctor:").grid(row=1, column=4, padx=5, pady=5)
+        self.doctor_filtro = ttk.Combobox(
+            filter_frame, values=["Todos"], state="readonly", width=25
+        )
+        self.doctor_filtro.grid(row=1, column=5, columnspan=3, padx=5, pady=5)
+        self.doctor_filtro.set("Todos")
+
+        # Las opciones de los combos se cargan en segundo plano
+        self.executor.submit(
+            "facturas_obras_sociales",
+            PacientesQueries(self.connection).obtener_obras_sociales,
+            on_success=lambda obras: self.obra_social_filtro.configure(
+                values=["Todas"] + [f"{os[0]} - {os[1]}" for os in obras]
+            ),
+        )
+        self.executor.submit(
+            "facturas_doctores",
+            DoctoresQueries(self.connection).obtener_doctores_para_combo,
+            on_success=lambda doctores: self.doctor_filtro.configure(
+                values=["Todos"] + [f"{d[0]} - {d[1]}" for d in doctores]
+            ),
         )
 
         # Treeview para mostrar facturas
@@ -71,10 +115,20 @@ class FacturacionModule:
         scrollbar = ttk.Scrollbar(
             self.frame, orient="vertical", command=self.tree.yview
         )
-        self.tree.configure(yscrollcommand=scrollbar.set)
         self.tree.pack(side="left", fill="both", expand=True, padx=5, pady=5)
         scrollbar.pack(side="right", fill="y", padx=5, pady=5)
 
+        # Solo se insertan las filas cercanas a la vista
+        self.lista = VirtualTreeview(
+            self.tree,
+            FacturacionQueries.clave_orden,
+            self.executor,
+            "facturas",
+            format_row=self.formatear_factura,
+            scrollbar=scrollbar,
+            on_error=self.error_carga,
+        )
+
         # Frame de botones
         button_frame = ttk.Frame(self.frame)
         button_frame.pack(fill="x", padx=5, pady=5)
@@ -94,44 +148,74 @@ class FacturacionModule:
         ttk.Button(button_frame, text="Actualizar", command=self.load_facturas).pack(
             side="left", padx=5
         )
+        ttk.Button(
+            button_frame, text="Facturar por Lote", command=self.abrir_facturacion_lote
+        ).pack(side="left", padx=5)
+        ttk.Button(button_frame, text="Tarifas", command=self.abrir_tarifas).pack(
+            side="left", padx=5
+        )
+        ttk.Button(button_frame, text="Exportar", command=self.exportar_facturas).pack(
+            side="left", padx=5
+        )
 
     def load_facturas(self):
         """Cargar facturas en el treeview"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self.lista.load(self.queries.obtener_facturas)
+
+    def formatear_factura(self, factura):
+        """Formatear datos para mostrar"""
+        return (
+            factura[0],  # ID
+            factura[1],  # Turno ID
+            factura[2],  # Fecha
+            f"${factura[3]:.2f}",  # Monto
+            factura[6],  # Paciente
+            factura[7],  # Doctor
+            factura[8],  # Tipo
+            "Sí" if factura[5] else "No",  # Pagado
+        )
 
-        try:
-            facturas = self.queries.obtener_facturas()
-            for factura in facturas:
-                # Formatear datos para mostrar
-                factura_formateada = (
-                    factura[0],  # ID
-                    factura[1],  # Turno ID
-                    factura[2],  # Fecha
-                    f"${factura[3]:.2f}",  # Monto
-                    factura[6],  # Paciente
-                    factura[7],  # Doctor
-                    factura[8],  # Tipo
-                    "Sí" if factura[5] else "No",  # Pagado
-                )
-                self.tree.insert("", "end", values=factura_formateada)
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al cargar facturas: {str(e)}")
+    def error_carga(self, e):
+        messagebox.showerror("Error", f"Error al cargar facturas: {str(e)}")
+
+    def exportar_facturas(self):
+        """Exportar todas las facturas con los filtros del listado actual"""
+        _, filtros = self.lista.fuente
+        dialogo_exportar(
+            self.frame, self.executor, "facturas", self.queries.exportar_facturas, *filtros
+        )
 
     def filtrar_facturas(self):
-        """Filtrar facturas por fecha"""
-        fecha_desde = self.fecha_desde.get()
-        fecha_hasta = self.fecha_hasta.get()
+        """Filtrar facturas en el servidor por fecha, pago, obra social y doctor"""
+        fecha_desde = self.fecha_desde.get().strip() or None
+        fecha_hasta = self.fecha_hasta.get().strip() or None
 
-        # Por simplicidad, recargamos todas y filtramos en memoria
-        self.load_facturas()
+        try:
+            for fecha in (fecha_desde, fecha_hasta):
+                if fecha:
+                    datetime.strptime(fecha, "%Y-%m-%d")
+        except ValueError:
+            messagebox.showerror("Error", "Formato de fecha incorrecto. Use YYYY-MM-DD")
+            return
 
-        # Filtro en memoria por fecha
-        for item in self.tree.get_children():
-            valores = self.tree.item(item)["values"]
-            fecha_factura = valores[2]  # La fecha está en el índice 2
-            if fecha_factura < fecha_desde or fecha_factura > fecha_hasta:
-                self.tree.detach(item)
+        pagado = {"Sí": True, "No": False}.get(self.pagado_filtro.get())
+
+        id_obra_social = None
+        if self.obra_social_filtro.get() not in ("", "Todas"):
+            id_obra_social = int(self.obra_social_filtro.get().split(" - ")[0])
+
+        id_doctor = None
+        if self.doctor_filtro.get() not in ("", "Todos"):
+            id_doctor = int(self.doctor_filtro.get().split(" - ")[0])
+
+        self.lista.load(
+            self.queries.obtener_facturas,
+            fecha_desde,
+            fecha_hasta,
+            pagado,
+            id_obra_social,
+            id_doctor,
+        )
 
     def nueva_factura(self):
         self.abrir_formulario_factura()
@@ -196,7 +280,8 @@ class FacturacionModule:
         # Obtener turnos sin facturar
         try:
             if factura_id is None:
-                turnos = self.queries.obtener_turnos_sin_facturar()
+                # Directo de la base: otro puesto pudo reservar o facturar turnos
+                turnos = self.queries.obtener_turnos_sin_facturar(usar_cache=False)
             else:
                 # Para edición, obtener todos los turnos
                 from database.queries import TurnosQueries
@@ -341,3 +426,235 @@ class FacturacionModule:
         ttk.Button(button_frame, text="Cancelar", command=formulario.destroy).pack(
             side="left", padx=10
         )
+
+    def abrir_facturacion_lote(self):
+        """Facturar todos los turnos pendientes de un rango, con barra de progreso"""
+        try:
+            pendiente = self.queries.obtener_corrida_pendiente()
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al consultar corridas: {str(e)}")
+            return
+
+        reanudar = None
+        if pendiente and messagebox.askyesno(
+            "Corrida pendiente",
+            f"La corrida #{pendiente[0]} ({pendiente[1]} a {pendiente[2]}) quedó "
+            f"{pendiente[5]} con {pendiente[7]} facturas emitidas.\n¿Desea retomarla?",
+        ):
+            reanudar = pendiente[0]
+
+        ventana = tk.Toplevel(self.frame)
+        ventana.title("Facturación por Lote")
+        ventana.geometry("420x260")
+        ventana.transient(self.frame)
+        ventana.grab_set()
+
+        campos = {}
+        valores = (
+            ("Desde:", pendiente[1] if reanudar else self.fecha_desde.get()),
+            ("Hasta:", pendiente[2] if reanudar else self.fecha_hasta.get()),
+            ("Fecha Emisión:", pendiente[3] if reanudar else date.today()),
+            ("Práctica:", pendiente[4] if reanudar else "consulta"),
+        )
+        for fila, (etiqueta, valor) in enumerate(valores):
+            ttk.Label(ventana, text=etiqueta).grid(
+                row=fila, column=0, padx=5, pady=5, sticky="e"
+            )
+            entry = ttk.Entry(ventana, width=15)
+            entry.grid(row=fila, column=1, padx=5, pady=5, sticky="w")
+            entry.insert(0, str(valor))
+            if reanudar:
+                entry.configure(state="disabled")
+            campos[etiqueta] = entry
+
+        barra = ttk.Progressbar(ventana, length=380, mode="determinate")
+        barra.grid(row=4, column=0, columnspan=2, padx=10, pady=10)
+        estado = ttk.Label(ventana, text="")
+        estado.grid(row=5, column=0, columnspan=2)
+
+        detener = threading.Event()
+        botones = ttk.Frame(ventana)
+        botones.grid(row=6, column=0, columnspan=2, pady=10)
+
+        def mostrar_avance(resumen):
+            if not ventana.winfo_exists():
+                return
+            barra.configure(maximum=max(resumen["total"], 1), value=resumen["procesados"])
+            estado.configure(
+                text=f"{resumen['procesados']}/{resumen['total']} turnos · "
+                f"{resumen['facturados']} facturados · {resumen['sin_tarifa']} sin tarifa"
+            )
+
+        def terminar(resumen):
+            self.load_facturas()
+            if not ventana.winfo_exists():
+                return
+            mostrar_avance(resumen)
+            boton_detener.configure(state="disabled")
+            messagebox.showinfo(
+                "Facturación por Lote",
+                f"Corrida #{resumen['id_corrida']} {resumen['estado']}: "
+                f"{resumen['facturados']} facturas emitidas, "
+                f"{resumen['sin_tarifa']} turnos sin tarifa.",
+                parent=ventana,
+            )
+
+        def fallar(e):
+            if not ventana.winfo_exists():
+                print(f"❌ Error en la facturación por lote: {e}")
+                return
+            boton_iniciar.configure(state="normal")
+            boton_detener.configure(state="disabled")
+            messagebox.showerror("Error", f"Error en la facturación: {str(e)}", parent=ventana)
+
+        def iniciar():
+            if reanudar:
+                func, args = self.queries.reanudar_corrida, (reanudar,)
+            else:
+                try:
+                    desde = date.fromisoformat(campos["Desde:"].get())
+                    hasta = date.fromisoformat(campos["Hasta:"].get())
+                    emision = date.fromisoformat(campos["Fecha Emisión:"].get())
+                except ValueError:
+                    messagebox.showerror(
+                        "Error", "Formato de fecha incorrecto. Use YYYY-MM-DD", parent=ventana
+                    )
+                    return
+                practica = campos["Práctica:"].get().strip() or "consulta"
+                func, args = self.queries.facturar_lote, (desde, hasta, emision, practica)
+
+            detener.clear()
+            boton_iniciar.configure(state="disabled")
+            boton_detener.configure(state="normal")
+            estado.configure(text="Buscando turnos sin facturar...")
+            self.executor.submit(
+                "facturacion_lote",
+                func,
+                *args,
+                on_success=terminar,
+                on_error=fallar,
+                on_progress=mostrar_avance,  # El executor le pasa progreso a func
+                detener=detener,
+            )
+
+        def cerrar():
+            # La corrida se corta entre bloques y sus avisos ya no van a la ventana
+            if self.executor.is_pending("facturacion_lote"):
+                if not messagebox.askyesno(
+                    "Facturación por Lote",
+                    "La corrida está en curso. ¿Detenerla y cerrar?",
+                    parent=ventana,
+                ):
+                    return
+                detener.set()
+                self.executor.cancel("facturacion_lote")
+            ventana.destroy()
+
+        boton_iniciar = ttk.Button(
+            botones, text="Retomar" if reanudar else "Iniciar", command=iniciar
+        )
+        boton_iniciar.pack(side="left", padx=10)
+        boton_detener = ttk.Button(
+            botones, text="Detener", command=detener.set, state="disabled"
+        )
+        boton_detener.pack(side="left", padx=10)
+        ttk.Button(botones, text="Cerrar", command=cerrar).pack(side="left", padx=10)
+        ventana.protocol("WM_DELETE_WINDOW", cerrar)
+
+    def abrir_tarifas(self):
+        """Ver y cargar las tarifas por obra social y práctica"""
+        ventana = tk.Toplevel(self.frame)
+        ventana.title("Tarifas")
+        ventana.geometry("560x400")
+        ventana.transient(self.frame)
+        ventana.grab_set()
+
+        columnas = ("ID", "Obra Social", "Práctica", "Monto", "Vigente desde")
+        tree = ttk.Treeview(ventana, columns=columnas, show="headings", height=10)
+        for col in columnas:
+            tree.heading(col, text=col)
+            tree.column(col, width=60 if col == "ID" else 120)
+        tree.pack(fill="both", expand=True, padx=5, pady=5)
+
+        def cargar():
+            tree.delete(*tree.get_children())
+            try:
+                tarifas = self.queries.obtener_tarifas()
+            except Exception as e:
+                messagebox.showerror("Error", f"Error al cargar tarifas: {str(e)}", parent=ventana)
+                return
+            for t in tarifas:
+                tree.insert("", "end", values=(t[0], t[2], t[3], f"${t[4]:.2f}", t[5]))
+
+        alta = ttk.LabelFrame(ventana, text="Nueva tarifa")
+        alta.pack(fill="x", padx=5, pady=5)
+
+        obras = PacientesQueries(self.connection).obtener_obras_sociales()
+        ttk.Label(alta, text="Obra Social:").grid(row=0, column=0, padx=5, pady=5)
+        obra_combo = ttk.Combobox(
+            alta,
+            values=["Particular"] + [f"{os[0]} - {os[1]}" for os in obras],
+            state="readonly",
+            width=25,
+        )
+        obra_combo.grid(row=0, column=1, padx=5, pady=5)
+        obra_combo.set("Particular")
+
+        ttk.Label(alta, text="Práctica:").grid(row=0, column=2, padx=5, pady=5)
+        practica_entry = ttk.Entry(alta, width=15)
+        practica_entry.grid(row=0, column=3, padx=5, pady=5)
+        practica_entry.insert(0, "consulta")
+
+        ttk.Label(alta, text="Monto:").grid(row=1, column=0, padx=5, pady=5)
+        monto_entry = ttk.Entry(alta, width=12)
+        monto_entry.grid(row=1, column=1, padx=5, pady=5, sticky="w")
+
+        ttk.Label(alta, text="Desde:").grid(row=1, column=2, padx=5, pady=5)
+        desde_entry = ttk.Entry(alta, width=15)
+        desde_entry.grid(row=1, column=3, padx=5, pady=5)
+        desde_entry.insert(0, date.today().strftime("%Y-%m-%d"))
+
+        def agregar():
+            try:
+                monto = float(monto_entry.get())
+                if monto < 0:
+                    raise ValueError
+            except ValueError:
+                messagebox.showerror(
+                    "Error", "El monto debe ser un número válido y positivo", parent=ventana
+                )
+                return
+            try:
+                vigente_desde = date.fromisoformat(desde_entry.get())
+            except ValueError:
+                messagebox.showerror(
+                    "Error", "Formato de fecha incorrecto. Use YYYY-MM-DD", parent=ventana
+                )
+                return
+            obra = obra_combo.get()
+            id_obra_social = None if obra == "Particular" else int(obra.split(" - ")[0])
+            practica = practica_entry.get().strip() or "consulta"
+            try:
+                self.queries.insertar_tarifa((id_obra_social, practica, monto, vigente_desde))
+            except Exception as e:
+                messagebox.showerror("Error", f"Error al guardar tarifa: {str(e)}", parent=ventana)
+                return
+            monto_entry.delete(0, tk.END)
+            cargar()
+
+        def eliminar():
+            seleccion = tree.selection()
+            if not seleccion:
+                return
+            tarifa_id = tree.item(seleccion[0])["values"][0]
+            if messagebox.askyesno("Confirmar", "¿Eliminar esta tarifa?", parent=ventana):
+                self.queries.eliminar_tarifa(tarifa_id)
+                cargar()
+
+        botones = ttk.Frame(ventana)
+        botones.pack(fill="x", padx=5, pady=5)
+        ttk.Button(botones, text="Agregar", command=agregar).pack(side="left", padx=5)
+        ttk.Button(botones, text="Eliminar", command=eliminar).pack(side="left", padx=5)
+        ttk.Button(botones, text="Cerrar", command=ventana.destroy).pack(side="right", padx=5)
+
+        cargar()
@@ -2,6 +2,10 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime, date
 from database.queries import FichaMedicaQueries
+from utils.autocomplete import AutocompleteEntry
+from utils.executor import get_executor
+from utils.exportar import dialogo_exportar
+from utils.virtual_tree import VirtualTreeview
 
 
 class FichaMedicaModule:
@@ -10,6 +14,7 @@ class FichaMedicaModule:
         self.queries = FichaMedicaQueries(connection)
 
         self.frame = ttk.Frame(parent)
+        self.executor = get_executor(self.frame)
         self.create_widgets()
         self.load_fichas()
 
@@ -60,10 +65,19 @@ class FichaMedicaModule:
         scrollbar = ttk.Scrollbar(
             self.frame, orient="vertical", command=self.tree.yview
         )
-        self.tree.configure(yscrollcommand=scrollbar.set)
         self.tree.pack(side="left", fill="both", expand=True, padx=5, pady=5)
         scrollbar.pack(side="right", fill="y", padx=5, pady=5)
 
+        # Solo se insertan las filas cercanas a la vista
+        self.lista = VirtualTreeview(
+            self.tree,
+            FichaMedicaQueries.clave_orden,
+            self.executor,
+            "fichas",
+            scrollbar=scrollbar,
+            on_error=self.error_carga,
+        )
+
         # Frame de botones
         button_frame = ttk.Frame(self.frame)
         button_frame.pack(fill="x", padx=5, pady=5)
@@ -83,34 +97,39 @@ class FichaMedicaModule:
         ttk.Button(button_frame, text="Actualizar", command=self.load_fichas).pack(
             side="left", padx=5
         )
+        ttk.Button(
+            button_frame,
+            text="Exportar",
+            command=lambda: dialogo_exportar(
+                self.frame, self.executor, "fichas", self.queries.exportar_fichas_medicas
+            ),
+        ).pack(side="left", padx=5)
 
     def load_fichas(self):
         """Cargar fichas médicas en el treeview"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self.lista.load(
+            self.queries.obtener_fichas_medicas,
+            on_loaded=lambda fichas: print(
+                f"✅ Primera página: {len(fichas)} fichas médicas"
+            ),
+        )
 
-        try:
-            fichas = self.queries.obtener_fichas_medicas()
-            for ficha in fichas:
-                self.tree.insert("", "end", values=ficha)
-            print(f"✅ Cargadas {len(fichas)} fichas médicas")
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al cargar fichas médicas: {str(e)}")
-            print(f"❌ Error cargando fichas: {e}")
+    def error_carga(self, e):
+        messagebox.showerror("Error", f"Error al cargar fichas médicas: {str(e)}")
+        print(f"❌ Error cargando fichas: {e}")
 
     def buscar_ficha(self):
         paciente = self.paciente_search.get()
         if paciente:
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-
-            try:
-                fichas = self.queries.obtener_fichas_medicas()
-                for ficha in fichas:
-                    if paciente.lower() in (ficha[2] or "").lower():
-                        self.tree.insert("", "end", values=ficha)
-            except Exception as e:
-                messagebox.showerror("Error", f"Error al buscar ficha: {str(e)}")
+            self.executor.submit(
+                "fichas",
+                self.queries.buscar_fichas,
+                paciente,
+                on_success=self.lista.show,
+                on_error=lambda e: messagebox.showerror(
+                    "Error", f"Error al buscar ficha: {str(e)}"
+                ),
+            )
 
     def nueva_ficha(self):
         self.abrir_formulario_ficha()
@@ -154,7 +173,11 @@ class FichaMedicaModule:
             )
 
     def obtener_datos_formulario(self, ficha_id=None):
-        """Obtener pacientes y doctores para el formulario con manejo de errores"""
+        """Obtener lo necesario para el formulario con manejo de errores.
+
+        Los pacientes no se cargan en una lista: el selector los busca en el
+        índice de prefijos. Devuelve (pacientes_queries, ids a excluir, doctores).
+        """
         try:
             from database.queries import PacientesQueries, DoctoresQueries
 
@@ -163,17 +186,16 @@ class FichaMedicaModule:
 
             if ficha_id is None:
                 # Para nueva ficha, solo pacientes sin ficha
-                pacientes = self.queries.obtener_pacientes_sin_ficha()
-                print(f"📝 Nuevas fichas - {len(pacientes)} pacientes sin ficha")
+                con_ficha = self.queries.obtener_pacientes_con_ficha()
+                print(f"📝 Nueva ficha - {len(con_ficha)} pacientes ya tienen ficha")
             else:
                 # Para edición, todos los pacientes
-                pacientes = pacientes_queries.obtener_pacientes_para_combo()
-                print(f"📝 Editando ficha - {len(pacientes)} pacientes disponibles")
+                con_ficha = None
 
             doctores = doctores_queries.obtener_doctores_para_combo()
             print(f"👨‍⚕️ {len(doctores)} doctores disponibles")
 
-            return pacientes, doctores
+            return pacientes_queries, con_ficha, doctores
 
         except Exception as e:
             print(f"❌ Error obteniendo datos para formulario: {e}")
@@ -189,14 +211,15 @@ class FichaMedicaModule:
         formulario.grab_set()
 
         try:
-            pacientes, doctores = self.obtener_datos_formulario(ficha_id)
+            pacientes_queries, con_ficha, doctores = self.obtener_datos_formulario(
+                ficha_id
+            )
         except Exception as e:
             messagebox.showerror("Error", f"Error al cargar datos: {str(e)}")
             formulario.destroy()
             return
 
         # Variables para almacenar datos
-        paciente_var = tk.StringVar()
         doctor_var = tk.StringVar()
         fecha_var = tk.StringVar(value=date.today().strftime("%Y-%m-%d"))
         grupo_sanguineo_var = tk.StringVar()
@@ -205,11 +228,11 @@ class FichaMedicaModule:
         ttk.Label(formulario, text="Paciente:*").grid(
             row=0, column=0, padx=5, pady=5, sticky="e"
         )
-        paciente_combo = ttk.Combobox(
+        paciente_combo = AutocompleteEntry(
             formulario,
-            values=[f"{p[0]} - {p[1]}" for p in pacientes],
-            state="readonly",
-            textvariable=paciente_var,
+            pacientes_queries.obtener_indice,
+            buscar_db=pacientes_queries.buscar_para_selector,
+            excluir=con_ficha,
         )
         paciente_combo.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
 
@@ -274,17 +297,9 @@ class FichaMedicaModule:
                 if ficha:
                     print(f"✅ Ficha encontrada: {ficha}")
 
-                    # Buscar y seleccionar paciente
-                    paciente_encontrado = False
-                    for p in pacientes:
-                        if p[0] == ficha[1]:  # ficha[1] = id_paciente
-                            paciente_combo.set(f"{p[0]} - {p[1]}")
-                            paciente_encontrado = True
-                            print(f"✅ Paciente seleccionado: {p[1]}")
-                            break
-
-                    if not paciente_encontrado:
-                        print("⚠️ No se encontró el paciente en la lista")
+                    # Seleccionar paciente (la etiqueta sale del índice)
+                    paciente_combo.set(ficha[1])  # ficha[1] = id_paciente
+                    print(f"✅ Paciente seleccionado: {ficha[1]}")
 
                     # Buscar y seleccionar doctor
                     if ficha[2]:  # ficha[2] = id_doctor
@@ -1,12 +1,12 @@
 import customtkinter as ctk
 from tkinter import messagebox
-from database.queries import LoginQueries
 
 
 class LoginWindow:
-    def __init__(self, root, on_login_success):
+    def __init__(self, root, on_login_success, on_salir=None):
         self.root = root
         self.on_login_success = on_login_success
+        self.on_salir = on_salir
         self.queries = None
 
         # Configuración global de CustomTkinter
@@ -36,6 +36,10 @@ class LoginWindow:
     # -----------------------------------------------------
     def set_connection(self, connection):
         """Configura la conexión a la BD."""
+        # Se importa recién acá: carga el driver de MySQL, que no hace falta
+        # para mostrar la ventana
+        from database.queries import LoginQueries
+
         self.queries = LoginQueries(connection)
         print("✅ Conexión configurada en login")
 
@@ -138,4 +142,7 @@ class LoginWindow:
     # -----------------------------------------------------
     def salir(self):
         print("👋 Cerrando aplicación...")
-        self.root.destroy()
+        if self.on_salir:
+            self.on_salir()
+        else:
+            self.root.destroy()
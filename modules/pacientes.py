@@ -3,6 +3,10 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
 from database.queries import PacientesQueries
+from utils.executor import get_executor
+from utils.exportar import dialogo_exportar
+from utils.importar import dialogo_importar
+from utils.virtual_tree import VirtualTreeview
 
 
 class PacientesModule:
@@ -11,6 +15,7 @@ class PacientesModule:
         self.queries = PacientesQueries(connection)
 
         self.frame = ttk.Frame(parent)
+        self.executor = get_executor(self.frame)
         self.create_widgets()
         self.load_pacientes()
 
@@ -23,12 +28,16 @@ class PacientesModule:
         self.dni_search = ttk.Entry(search_frame)
         self.dni_search.grid(row=0, column=1, padx=5, pady=5)
 
+        ttk.Label(search_frame, text="Apellido:").grid(row=0, column=2, padx=5, pady=5)
+        self.apellido_search = ttk.Entry(search_frame)
+        self.apellido_search.grid(row=0, column=3, padx=5, pady=5)
+
         ttk.Button(search_frame, text="Buscar", command=self.buscar_paciente).grid(
-            row=0, column=2, padx=5, pady=5
+            row=0, column=4, padx=5, pady=5
         )
         ttk.Button(
             search_frame, text="Mostrar Todos", command=self.load_pacientes
-        ).grid(row=0, column=3, padx=5, pady=5)
+        ).grid(row=0, column=5, padx=5, pady=5)
 
         # Treeview para mostrar pacientes
         self.tree = ttk.Treeview(
@@ -65,10 +74,20 @@ class PacientesModule:
         scrollbar = ttk.Scrollbar(
             self.frame, orient="vertical", command=self.tree.yview
         )
-        self.tree.configure(yscrollcommand=scrollbar.set)
         self.tree.pack(side="left", fill="both", expand=True, padx=5, pady=5)
         scrollbar.pack(side="right", fill="y", padx=5, pady=5)
 
+        # Solo se insertan las filas cercanas a la vista
+        self.lista = VirtualTreeview(
+            self.tree,
+            PacientesQueries.clave_orden,
+            self.executor,
+            "pacientes",
+            format_row=self.formatear_paciente,
+            scrollbar=scrollbar,
+            on_error=lambda e: self.error_carga("cargar pacientes", e),
+        )
+
         # Frame de botones
         button_frame = ttk.Frame(self.frame)
         button_frame.pack(fill="x", padx=5, pady=5)
@@ -85,92 +104,75 @@ class PacientesModule:
         ttk.Button(button_frame, text="Actualizar", command=self.load_pacientes).pack(
             side="left", padx=5
         )
+        ttk.Button(
+            button_frame,
+            text="Exportar",
+            command=lambda: dialogo_exportar(
+                self.frame, self.executor, "pacientes", self.queries.exportar_pacientes
+            ),
+        ).pack(side="left", padx=5)
+        ttk.Button(
+            button_frame,
+            text="Importar",
+            command=lambda: dialogo_importar(
+                self.frame, self.executor, self.queries, on_terminar=self.load_pacientes
+            ),
+        ).pack(side="left", padx=5)
 
     def load_pacientes(self):
-        """Cargar pacientes en el treeview con manejo seguro de índices"""
-        # Limpiar treeview
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        try:
-            pacientes = self.queries.obtener_pacientes()
-            for paciente in pacientes:
-                # Manejar diferentes longitudes de tuplas de forma segura
-                try:
-                    # Verificar la longitud de la tupla y asignar valores por defecto
-                    paciente_id = paciente[0] if len(paciente) > 0 else ""
-                    dni = paciente[1] if len(paciente) > 1 else ""
-                    apellido = paciente[2] if len(paciente) > 2 else ""
-                    nombre = paciente[3] if len(paciente) > 3 else ""
-                    telefono = paciente[4] if len(paciente) > 4 else ""
-                    email = paciente[5] if len(paciente) > 5 else ""
-
-                    # Para obra social, puede ser el índice 8 o 6 dependiendo de la consulta
-                    obra_social = "Particular"
-                    if len(paciente) > 8:
-                        obra_social = paciente[8] or "Particular"
-                    elif len(paciente) > 6:
-                        # Si solo hay 7 columnas, la obra social podría estar en el índice 6
-                        obra_social = paciente[6] or "Particular"
-
-                    paciente_formateado = (
-                        paciente_id,
-                        dni,
-                        apellido,
-                        nombre,
-                        telefono or "",
-                        email or "",
-                        obra_social,
-                    )
-                    self.tree.insert("", "end", values=paciente_formateado)
-
-                except IndexError as ie:
-                    print(f"Error de índice al procesar paciente: {ie}")
-                    print(f"Tupla paciente: {paciente}")
-                    continue
+        """Cargar pacientes en el treeview sin bloquear la interfaz"""
+        self.lista.load(self.queries.obtener_pacientes)
+
+    def formatear_paciente(self, paciente):
+        """Valores a mostrar de un paciente, con manejo seguro de índices"""
+        # Verificar la longitud de la tupla y asignar valores por defecto
+        paciente_id = paciente[0] if len(paciente) > 0 else ""
+        dni = paciente[1] if len(paciente) > 1 else ""
+        apellido = paciente[2] if len(paciente) > 2 else ""
+        nombre = paciente[3] if len(paciente) > 3 else ""
+        telefono = paciente[4] if len(paciente) > 4 else ""
+        email = paciente[5] if len(paciente) > 5 else ""
+
+        # Para obra social, puede ser el índice 8 o 6 dependiendo de la consulta
+        obra_social = "Particular"
+        if len(paciente) > 8:
+            obra_social = paciente[8] or "Particular"
+        elif len(paciente) > 6:
+            # Si solo hay 7 columnas, la obra social podría estar en el índice 6
+            obra_social = paciente[6] or "Particular"
+
+        return (
+            paciente_id,
+            dni,
+            apellido,
+            nombre,
+            telefono or "",
+            email or "",
+            obra_social,
+        )
 
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al cargar pacientes: {str(e)}")
-            print(f"Error completo: {e}")
+    def error_carga(self, accion, e):
+        messagebox.showerror("Error", f"Error al {accion}: {str(e)}")
+        print(f"Error completo: {e}")
 
     def buscar_paciente(self):
-        dni = self.dni_search.get()
+        """Buscar por DNI o, si está vacío, por apellido"""
+        dni = self.dni_search.get().strip()
+        apellido = self.apellido_search.get().strip()
         if dni:
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-
-            try:
-                pacientes = self.queries.buscar_paciente_por_dni(dni)
-                for paciente in pacientes:
-                    try:
-                        paciente_id = paciente[0] if len(paciente) > 0 else ""
-                        dni_val = paciente[1] if len(paciente) > 1 else ""
-                        apellido = paciente[2] if len(paciente) > 2 else ""
-                        nombre = paciente[3] if len(paciente) > 3 else ""
-                        telefono = paciente[4] if len(paciente) > 4 else ""
-                        email = paciente[5] if len(paciente) > 5 else ""
-
-                        obra_social = "Particular"
-                        if len(paciente) > 8:
-                            obra_social = paciente[8] or "Particular"
-                        elif len(paciente) > 6:
-                            obra_social = paciente[6] or "Particular"
-
-                        paciente_formateado = (
-                            paciente_id,
-                            dni_val,
-                            apellido,
-                            nombre,
-                            telefono or "",
-                            email or "",
-                            obra_social,
-                        )
-                        self.tree.insert("", "end", values=paciente_formateado)
-                    except IndexError as ie:
-                        print(f"Error de índice al buscar paciente: {ie}")
-                        continue
-            except Exception as e:
-                messagebox.showerror("Error", f"Error al buscar paciente: {str(e)}")
+            consulta, texto = self.queries.buscar_paciente_por_dni, dni
+        elif apellido:
+            consulta, texto = self.queries.buscar_paciente_por_apellido, apellido
+        else:
+            return
+
+        self.executor.submit(
+            "pacientes",
+            consulta,
+            texto,
+            on_success=self.lista.show,
+            on_error=lambda e: self.error_carga("buscar paciente", e),
+        )
 
     def nuevo_paciente(self):
         self.abrir_formulario_paciente()
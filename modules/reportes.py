@@ -1,12 +1,433 @@
 # modules/reportes.py
-def generar_reporte_facturacion(self, fecha_inicio, fecha_fin):
-    query = """
-    SELECT os.nombre AS obra_social, SUM(f.monto) AS total_facturado,
-           COUNT(f.id_factura) AS cantidad_facturas
-    FROM Facturacion f
-    JOIN Turno t ON t.id_turno = f.id_turno
-    JOIN Paciente p ON p.id_paciente = t.id_paciente
-    JOIN ObraSocial os ON os.id_obra_social = p.id_obra_social
-    WHERE f.fecha_emision BETWEEN %s AND %s
-    GROUP BY os.nombre
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from datetime import date, timedelta
+from functools import lru_cache
+from itertools import compress
+from operator import and_
+from tkinter import ttk, messagebox
+from database.queries import DoctoresQueries, ReportesQueries, agenda
+from utils.columnar import TablaColumnar, contar, entre, sumar
+from utils.executor import get_executor
+
+AGRUPAR = {
+    "Obra Social": "obra_social",
+    "Doctor": "doctor",
+    "Día": "dia",
+    "Mes": "mes",
+}
+
+
+@lru_cache(maxsize=None)
+def mes_de(ordinal):
+    fecha = date.fromordinal(ordinal)
+    return f"{fecha.year}-{fecha.month:02d}"
+
+
+class AnaliticaConsultorio:
+    """Tablero de gestión calculado sobre copias en memoria de Turno,
+    Facturacion y Paciente, guardadas por columnas (ver TablaColumnar).
+
+    A MySQL solo se le piden las filas nuevas de cada tabla desde la última
+    marca; los agrupamientos se hacen en memoria, sin cargar a la base en
+    horario de atención. Pagos o cambios de turnos ya cargados se ven recién
+    al recargar todo (refrescar con completo=True).
+
+    Turno no registra asistencia: se toma como ausente un turno pasado que
+    no tiene factura.
     """
+
+    RANGOS_EDAD = (0, 18, 30, 45, 60, 75)
+
+    def __init__(self, queries, agenda):
+        self.queries = queries
+        self.agenda = agenda
+        self._lock = threading.Lock()
+        self.tablas = {
+            "Turno": TablaColumnar(
+                [
+                    ("id_turno", "l"),
+                    ("id_doctor", "l"),
+                    ("id_paciente", "l"),
+                    ("fecha", "l"),
+                    ("es_particular", "b"),
+                ]
+            ),
+            "Facturacion": TablaColumnar(
+                [
+                    ("id_factura", "l"),
+                    ("id_turno", "l"),
+                    ("fecha", "l"),
+                    ("monto", "d"),
+                    ("pagado", "b"),
+                ]
+            ),
+            "Paciente": TablaColumnar([("id_paciente", "l"), ("nacimiento", "l")]),
+        }
+
+    def refrescar(self, completo=False):
+        """Traer las filas nuevas de cada tabla (o todas, con completo)"""
+        with self._lock:
+            nuevas = 0
+            for nombre, tabla in self.tablas.items():
+                if completo:
+                    tabla.vaciar()
+                for filas in self.queries.obtener_filas_desde(nombre, tabla.marca):
+                    nuevas += tabla.agregar(filas)
+            return nuevas
+
+    def calcular(self, metrica, desde, hasta, completo=False):
+        """Refrescar y calcular una métrica; devuelve (filas, estadísticas)"""
+        inicio = time.perf_counter()
+        nuevas = self.refrescar(completo)
+        refresco = time.perf_counter()
+        with self._lock:
+            filas = getattr(self, metrica)(desde, hasta)
+        fin = time.perf_counter()
+        estadisticas = {
+            "filas": {nombre: len(tabla) for nombre, tabla in self.tablas.items()},
+            "nuevas": nuevas,
+            "bytes": sum(tabla.bytes() for tabla in self.tablas.values()),
+            "refresco_ms": (refresco - inicio) * 1000,
+            "calculo_ms": (fin - refresco) * 1000,
+        }
+        return filas, estadisticas
+
+    def ingresos_por_mes(self, desde, hasta):
+        """[(mes, facturas, total, cobrado)] por fecha de emisión"""
+        f = self.tablas["Facturacion"]
+        meses = list(map(mes_de, f["fecha"]))
+        en_rango = entre(f["fecha"], desde.toordinal(), hasta.toordinal())
+        cobradas = array("b", map(and_, en_rango, f["pagado"]))
+        cantidad = contar(meses, en_rango)
+        total = sumar(meses, f["monto"], en_rango)
+        cobrado = sumar(meses, f["monto"], cobradas)
+        return [
+            (mes, cantidad[mes], total[mes], cobrado.get(mes, 0.0)) for mes in sorted(cantidad)
+        ]
+
+    def ausentismo(self, desde, hasta):
+        """[(id_doctor, turnos, ausentes, tasa)] de los turnos ya pasados del rango"""
+        t = self.tablas["Turno"]
+        hasta = min(hasta, date.today() - timedelta(days=1))
+        facturados = set(self.tablas["Facturacion"]["id_turno"])
+        en_rango = entre(t["fecha"], desde.toordinal(), hasta.toordinal())
+        atendidos = array(
+            "b", map(and_, en_rango, map(facturados.__contains__, t["id_turno"]))
+        )
+        turnos = contar(t["id_doctor"], en_rango)
+        presentes = contar(t["id_doctor"], atendidos)
+        return [
+            (id_doctor, n, n - presentes[id_doctor], (n - presentes[id_doctor]) / n)
+            for id_doctor, n in turnos.most_common()
+        ]
+
+    def edades(self, desde, hasta):
+        """[(rango, pacientes, proporción)] de los pacientes con turnos en el rango"""
+        t = self.tablas["Turno"]
+        p = self.tablas["Paciente"]
+        en_rango = entre(t["fecha"], desde.toordinal(), hasta.toordinal())
+        atendidos = set(compress(t["id_paciente"], en_rango))
+        con_turno = array("b", map(atendidos.__contains__, p["id_paciente"]))
+        hoy = date.today().toordinal()
+        rangos = self.RANGOS_EDAD
+        por_rango = contar(
+            (
+                bisect_right(rangos, (hoy - nacimiento) / 365.2425) - 1 if nacimiento else -1
+                for nacimiento in p["nacimiento"]
+            ),
+            con_turno,
+        )
+        total = sum(por_rango.values()) or 1
+        etiquetas = [f"{a} a {b - 1}" for a, b in zip(rangos, rangos[1:])]
+        etiquetas.append(f"{rangos[-1]} o más")
+        filas = [
+            (etiqueta, por_rango[i], por_rango[i] / total)
+            for i, etiqueta in enumerate(etiquetas)
+        ]
+        if por_rango[-1]:
+            filas.append(("Sin fecha de nacimiento", por_rango[-1], por_rango[-1] / total))
+        return filas
+
+    def utilizacion(self, desde, hasta):
+        """[(id_doctor, turnos, capacidad, uso)] según el horario de atención"""
+        t = self.tablas["Turno"]
+        en_rango = entre(t["fecha"], desde.toordinal(), hasta.toordinal())
+        filas = []
+        for id_doctor, n in contar(t["id_doctor"], en_rango).most_common():
+            capacidad = self.agenda.capacidad(id_doctor, desde, hasta)
+            filas.append((id_doctor, n, capacidad, n / capacidad if capacidad else 0.0))
+        return filas
+
+
+# Compartida por todas las ventanas: la copia en memoria se carga una sola vez
+_analitica = None
+
+
+def get_analitica(connection):
+    global _analitica
+    if _analitica is None:
+        _analitica = AnaliticaConsultorio(ReportesQueries(connection), agenda)
+    return _analitica
+
+
+def porcentaje(valor):
+    return f"{valor * 100:.1f}%"
+
+
+# Nombre -> (método de AnaliticaConsultorio, columnas, formato de cada fila)
+METRICAS = {
+    "Ingresos por mes": (
+        "ingresos_por_mes",
+        ("Mes", "Facturas", "Total", "Cobrado"),
+        lambda f, _: (f[0], f[1], f"${f[2]:.2f}", f"${f[3]:.2f}"),
+    ),
+    "Ausentismo por doctor": (
+        "ausentismo",
+        ("Doctor", "Turnos", "Ausentes", "Tasa"),
+        lambda f, doctores: (doctores.get(f[0], f[0]), f[1], f[2], porcentaje(f[3])),
+    ),
+    "Edades de pacientes": (
+        "edades",
+        ("Rango", "Pacientes", "Proporción"),
+        lambda f, _: (f[0], f[1], porcentaje(f[2])),
+    ),
+    "Utilización de doctores": (
+        "utilizacion",
+        ("Doctor", "Turnos", "Capacidad", "Uso"),
+        lambda f, doctores: (doctores.get(f[0], f[0]), f[1], f[2], porcentaje(f[3])),
+    ),
+}
+
+
+class ReportesModule:
+    def __init__(self, parent, connection):
+        self.connection = connection
+        self.queries = ReportesQueries(connection)
+        self.analitica = get_analitica(connection)
+        self.doctores = {}
+
+        self.frame = ttk.Frame(parent)
+        self.executor = get_executor(self.frame)
+        self.create_widgets()
+        self.generar_reporte()
+
+    def create_widgets(self):
+        notebook = ttk.Notebook(self.frame)
+        notebook.pack(fill="both", expand=True)
+        facturacion = ttk.Frame(notebook)
+        tablero = ttk.Frame(notebook)
+        notebook.add(facturacion, text="Facturación")
+        notebook.add(tablero, text="Tablero")
+        self.create_reporte_facturacion(facturacion)
+        self.create_tablero(tablero)
+
+    def create_reporte_facturacion(self, parent):
+        # Frame de filtros
+        filter_frame = ttk.LabelFrame(parent, text="Reporte de Facturación")
+        filter_frame.pack(fill="x", padx=5, pady=5)
+
+        hoy = date.today()
+        ttk.Label(filter_frame, text="Desde:").grid(row=0, column=0, padx=5, pady=5)
+        self.fecha_desde = ttk.Entry(filter_frame, width=12)
+        self.fecha_desde.grid(row=0, column=1, padx=5, pady=5)
+        self.fecha_desde.insert(0, date(hoy.year, 1, 1).strftime("%Y-%m-%d"))
+
+        ttk.Label(filter_frame, text="Hasta:").grid(row=0, column=2, padx=5, pady=5)
+        self.fecha_hasta = ttk.Entry(filter_frame, width=12)
+        self.fecha_hasta.grid(row=0, column=3, padx=5, pady=5)
+        self.fecha_hasta.insert(0, hoy.strftime("%Y-%m-%d"))
+
+        ttk.Label(filter_frame, text="Agrupar por:").grid(row=0, column=4, padx=5, pady=5)
+        self.agrupar = ttk.Combobox(
+            filter_frame, values=list(AGRUPAR), state="readonly", width=12
+        )
+        self.agrupar.grid(row=0, column=5, padx=5, pady=5)
+        self.agrupar.set("Obra Social")
+
+        ttk.Label(filter_frame, text="Pagado:").grid(row=0, column=6, padx=5, pady=5)
+        self.pagado_filtro = ttk.Combobox(
+            filter_frame, values=["Todas", "Sí", "No"], state="readonly", width=8
+        )
+        self.pagado_filtro.grid(row=0, column=7, padx=5, pady=5)
+        self.pagado_filtro.set("Todas")
+
+        ttk.Button(filter_frame, text="Generar", command=self.generar_reporte).grid(
+            row=0, column=8, padx=5, pady=5
+        )
+        ttk.Button(filter_frame, text="Recalcular", command=self.recalcular).grid(
+            row=0, column=9, padx=5, pady=5
+        )
+
+        # Treeview del reporte
+        columns = ("Grupo", "Facturas", "Total", "Cobrado", "Pendiente")
+        self.tree = ttk.Treeview(parent, columns=columns, show="headings", height=15)
+        for col in columns:
+            self.tree.heading(col, text=col)
+            if col == "Grupo":
+                self.tree.column(col, width=250)
+            else:
+                self.tree.column(col, width=110, anchor="e")
+
+        scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+
+        # Los totales van abajo: se empaquetan antes que la tabla
+        self.total_label = ttk.Label(parent, text="")
+        self.total_label.pack(side="bottom", anchor="w", padx=5, pady=5)
+        self.tree.pack(side="left", fill="both", expand=True, padx=5, pady=5)
+        scrollbar.pack(side="right", fill="y", padx=5, pady=5)
+
+    def leer_filtros(self):
+        """(desde, hasta, agrupar, pagado) del formulario, o None si hay un error"""
+        try:
+            desde = date.fromisoformat(self.fecha_desde.get())
+            hasta = date.fromisoformat(self.fecha_hasta.get())
+        except ValueError:
+            messagebox.showerror("Error", "Formato de fecha incorrecto. Use YYYY-MM-DD")
+            return None
+        pagado = {"Sí": True, "No": False}.get(self.pagado_filtro.get())
+        return desde, hasta, AGRUPAR[self.agrupar.get()], pagado
+
+    def generar_reporte(self):
+        filtros = self.leer_filtros()
+        if filtros is None:
+            return
+        self.executor.submit(
+            "reporte_facturacion",
+            self.generar_reporte_facturacion,
+            *filtros,
+            on_success=self.mostrar_reporte,
+            on_error=lambda e: messagebox.showerror(
+                "Error", f"Error al generar el reporte: {str(e)}"
+            ),
+        )
+
+    def generar_reporte_facturacion(
+        self, fecha_inicio, fecha_fin, agrupar="obra_social", pagado=None
+    ):
+        """Filas (clave, grupo, cantidad, total, cobrado) desde el resumen diario"""
+        return self.queries.obtener_resumen(fecha_inicio, fecha_fin, agrupar, pagado)
+
+    def mostrar_reporte(self, filas):
+        self.tree.delete(*self.tree.get_children())
+        cantidad = total = cobrado = 0
+        for _, grupo, n, suma, pagado in filas:
+            self.tree.insert(
+                "",
+                "end",
+                values=(grupo, n, f"${suma:.2f}", f"${pagado:.2f}", f"${suma - pagado:.2f}"),
+            )
+            cantidad += n
+            total += suma
+            cobrado += pagado
+        self.total_label.configure(
+            text=f"Total: {cantidad} facturas · ${total:.2f} · "
+            f"cobrado ${cobrado:.2f} · pendiente ${total - cobrado:.2f}"
+        )
+
+    def recalcular(self):
+        filtros = self.leer_filtros()
+        if filtros is None:
+            return
+        if not messagebox.askyesno(
+            "Recalcular",
+            "¿Rehacer el resumen del rango desde las facturas?\n"
+            "Toma la obra social y el doctor actuales de cada turno.",
+        ):
+            return
+        self.executor.submit(
+            "reporte_recalcular",
+            self.queries.recalcular,
+            filtros[0],
+            filtros[1],
+            on_success=lambda _: self.generar_reporte(),
+            on_error=lambda e: messagebox.showerror(
+                "Error", f"Error al recalcular el resumen: {str(e)}"
+            ),
+        )
+
+    # ----------------------------- Tablero -----------------------------
+    def create_tablero(self, parent):
+        filter_frame = ttk.LabelFrame(parent, text="Tablero de Gestión")
+        filter_frame.pack(fill="x", padx=5, pady=5)
+
+        hoy = date.today()
+        ttk.Label(filter_frame, text="Desde:").grid(row=0, column=0, padx=5, pady=5)
+        self.tablero_desde = ttk.Entry(filter_frame, width=12)
+        self.tablero_desde.grid(row=0, column=1, padx=5, pady=5)
+        self.tablero_desde.insert(0, date(hoy.year, 1, 1).strftime("%Y-%m-%d"))
+
+        ttk.Label(filter_frame, text="Hasta:").grid(row=0, column=2, padx=5, pady=5)
+        self.tablero_hasta = ttk.Entry(filter_frame, width=12)
+        self.tablero_hasta.grid(row=0, column=3, padx=5, pady=5)
+        self.tablero_hasta.insert(0, hoy.strftime("%Y-%m-%d"))
+
+        ttk.Label(filter_frame, text="Métrica:").grid(row=0, column=4, padx=5, pady=5)
+        self.metrica = ttk.Combobox(
+            filter_frame, values=list(METRICAS), state="readonly", width=25
+        )
+        self.metrica.grid(row=0, column=5, padx=5, pady=5)
+        self.metrica.set("Ingresos por mes")
+        self.metrica.bind("<<ComboboxSelected>>", lambda e: self.calcular_metrica())
+
+        ttk.Button(filter_frame, text="Calcular", command=self.calcular_metrica).grid(
+            row=0, column=6, padx=5, pady=5
+        )
+        ttk.Button(
+            filter_frame,
+            text="Recargar Todo",
+            command=lambda: self.calcular_metrica(completo=True),
+        ).grid(row=0, column=7, padx=5, pady=5)
+
+        self.tablero_estado = ttk.Label(parent, text="")
+        self.tablero_estado.pack(side="bottom", anchor="w", padx=5, pady=5)
+        self.tablero_tree = ttk.Treeview(parent, show="headings", height=15)
+        self.tablero_tree.pack(fill="both", expand=True, padx=5, pady=5)
+
+    def calcular_metrica(self, completo=False):
+        try:
+            desde = date.fromisoformat(self.tablero_desde.get())
+            hasta = date.fromisoformat(self.tablero_hasta.get())
+        except ValueError:
+            messagebox.showerror("Error", "Formato de fecha incorrecto. Use YYYY-MM-DD")
+            return
+        nombre = self.metrica.get()
+        self.tablero_estado.configure(text="Calculando...")
+
+        def calcular():
+            if not self.doctores:
+                combo = DoctoresQueries(self.connection).obtener_doctores_para_combo()
+                self.doctores = {d[0]: d[1] for d in combo}
+            return self.analitica.calcular(METRICAS[nombre][0], desde, hasta, completo)
+
+        self.executor.submit(
+            "tablero",
+            calcular,
+            on_success=lambda resultado: self.mostrar_metrica(nombre, *resultado),
+            on_error=lambda e: messagebox.showerror(
+                "Error", f"Error al calcular el tablero: {str(e)}"
+            ),
+        )
+
+    def mostrar_metrica(self, nombre, filas, estadisticas):
+        _, columnas, formato = METRICAS[nombre]
+        tree = self.tablero_tree
+        tree.delete(*tree.get_children())
+        tree.configure(columns=columnas)
+        for col in columnas:
+            tree.heading(col, text=col)
+            tree.column(col, width=250 if col == columnas[0] else 110)
+        for fila in filas:
+            tree.insert("", "end", values=formato(fila, self.doctores))
+
+        cantidades = estadisticas["filas"]
+        self.tablero_estado.configure(
+            text=f"En memoria: {cantidades['Turno']} turnos, "
+            f"{cantidades['Facturacion']} facturas, {cantidades['Paciente']} pacientes "
+            f"({estadisticas['bytes'] / 1024:.0f} KB) · "
+            f"{estadisticas['nuevas']} filas nuevas en {estadisticas['refresco_ms']:.0f} ms · "
+            f"cálculo {estadisticas['calculo_ms']:.0f} ms"
+        )
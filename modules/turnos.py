@@ -2,6 +2,10 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime, date
 from database.queries import TurnosQueries, DoctoresQueries, PacientesQueries
+from utils.autocomplete import AutocompleteEntry
+from utils.executor import get_executor
+from utils.exportar import dialogo_exportar
+from utils.virtual_tree import VirtualTreeview
 
 
 class TurnosModule:
@@ -12,9 +16,17 @@ class TurnosModule:
         self.pacientes_queries = PacientesQueries(connection)
 
         self.frame = ttk.Frame(parent)
+        self.executor = get_executor(self.frame)
         self.create_widgets()
         self.load_todos_turnos()  # Cambiado: cargar todos los turnos por defecto
 
+        # Agenda en memoria para verificar disponibilidad sin ir a la base
+        self.executor.submit(
+            "turnos_agenda",
+            self.queries.obtener_agenda,
+            on_error=lambda e: print(f"⚠️ No se pudo cargar la agenda: {e}"),
+        )
+
     def create_widgets(self):
         # Frame de búsqueda y filtros
         filter_frame = ttk.LabelFrame(self.frame, text="Filtros de Turnos")
@@ -75,6 +87,17 @@ class TurnosModule:
 
         self.tree.pack(fill="both", expand=True, padx=5, pady=5)
 
+        # Solo se insertan las filas cercanas a la vista
+        self.lista = VirtualTreeview(
+            self.tree,
+            TurnosQueries.clave_orden,
+            self.executor,
+            "turnos",
+            on_error=lambda e: messagebox.showerror(
+                "Error", f"Error al cargar turnos: {str(e)}"
+            ),
+        )
+
         # Frame de botones
         button_frame = ttk.Frame(self.frame)
         button_frame.pack(fill="x", padx=5, pady=5)
@@ -88,64 +111,61 @@ class TurnosModule:
         ttk.Button(
             button_frame, text="Eliminar Turno", command=self.eliminar_turno
         ).pack(side="left", padx=5)
+        ttk.Button(
+            button_frame, text="Cancelar Serie", command=self.cancelar_serie
+        ).pack(side="left", padx=5)
         ttk.Button(
             button_frame, text="Actualizar", command=self.load_todos_turnos
         ).pack(
             side="left", padx=5
         )  # Cambiado: actualizar muestra todos
+        ttk.Button(button_frame, text="Exportar", command=self.exportar_turnos).pack(
+            side="left", padx=5
+        )
 
     def load_todos_turnos(self):
         """Cargar TODOS los turnos sin filtrar"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        # Obtener todos los turnos sin filtros de fecha
-        # Si no tienes un método para obtener todos, usamos obtener_turnos sin parámetros
-        try:
-            turnos = self.queries.obtener_turnos()
-        except:
-            # Si falla, intentamos con fechas muy amplias
-            turnos = self.queries.obtener_turnos("2000-01-01", "2030-12-31")
-
-        if turnos:
-            for turno in turnos:
-                self.tree.insert("", "end", values=turno)
-            print(f"✅ Cargados {len(turnos)} turnos")
-        else:
-            print("ℹ️ No se encontraron turnos en la base de datos")
+        self.cargar_turnos(
+            self.queries.obtener_turnos, descripcion="turnos en la base de datos"
+        )
 
     def load_turnos_proximos(self):
         """Cargar solo turnos futuros"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        turnos = self.queries.obtener_turnos_proximos()
-
-        if turnos:
-            for turno in turnos:
-                self.tree.insert("", "end", values=turno)
-            print(f"✅ Cargados {len(turnos)} turnos próximos")
-        else:
-            print("ℹ️ No se encontraron turnos próximos")
+        self.cargar_turnos(
+            self.queries.obtener_turnos_proximos, descripcion="turnos próximos"
+        )
 
     def filtrar_por_fecha(self):
         """Filtrar turnos por rango de fechas"""
         fecha_desde = self.fecha_desde.get()
         fecha_hasta = self.fecha_hasta.get()
 
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self.cargar_turnos(
+            self.queries.obtener_turnos,
+            fecha_desde,
+            fecha_hasta,
+            descripcion=f"turnos entre {fecha_desde} y {fecha_hasta}",
+        )
+
+    def cargar_turnos(self, consulta, *args, descripcion):
+        """Correr la consulta en segundo plano; un pedido nuevo reemplaza al anterior"""
 
-        turnos = self.queries.obtener_turnos(fecha_desde, fecha_hasta)
+        def informar(turnos):
+            if turnos:
+                print(f"✅ Primera página: {len(turnos)} {descripcion}")
+            else:
+                print(f"ℹ️ No se encontraron {descripcion}")
 
-        if turnos:
-            for turno in turnos:
-                self.tree.insert("", "end", values=turno)
-            print(
-                f"✅ Cargados {len(turnos)} turnos entre {fecha_desde} y {fecha_hasta}"
-            )
+        self.lista.load(consulta, *args, on_loaded=informar)
+
+    def exportar_turnos(self):
+        """Exportar los turnos del listado actual (todos, próximos o por fechas)"""
+        consulta, args = self.lista.fuente
+        if consulta == self.queries.obtener_turnos_proximos:
+            abrir, args = self.queries.exportar_turnos_proximos, ()
         else:
-            print(f"ℹ️ No se encontraron turnos entre {fecha_desde} y {fecha_hasta}")
+            abrir = self.queries.exportar_turnos
+        dialogo_exportar(self.frame, self.executor, "turnos", abrir, *args)
 
     def nuevo_turno(self):
         self.abrir_formulario_turno()
@@ -172,53 +192,64 @@ class TurnosModule:
         else:
             messagebox.showwarning("Advertencia", "Seleccione un turno para eliminar")
 
+    def cancelar_serie(self):
+        """Eliminar los turnos pendientes de la serie del turno seleccionado"""
+        selected = self.tree.selection()
+        if not selected:
+            messagebox.showwarning("Advertencia", "Seleccione un turno de la serie")
+            return
+
+        turno_id = self.tree.item(selected[0])["values"][0]
+        try:
+            turno = self.queries.obtener_turno_por_id(turno_id)
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al cargar turno: {str(e)}")
+            return
+        if not turno or turno[7] is None:
+            messagebox.showwarning("Advertencia", "El turno no pertenece a una serie")
+            return
+
+        if messagebox.askyesno(
+            "Confirmar",
+            "¿Cancelar todos los turnos futuros y sin facturar de esta serie?",
+        ):
+            success, message = self.queries.cancelar_serie(turno[7])
+            if success:
+                messagebox.showinfo("Éxito", message)
+                self.load_todos_turnos()
+            else:
+                messagebox.showerror("Error", message)
+
+    @staticmethod
+    def describir_conflictos(resultado, maximo=10):
+        """Mensaje de error de una serie con las fechas en conflicto"""
+        mensaje = resultado.mensaje
+        if resultado.conflictos:
+            lineas = [
+                f"{fecha} - "
+                + ("fuera de horario" if id_turno is None else f"turno {id_turno}")
+                for fecha, id_turno in resultado.conflictos[:maximo]
+            ]
+            if len(resultado.conflictos) > maximo:
+                lineas.append(f"... y {len(resultado.conflictos) - maximo} más")
+            mensaje += "\n\n" + "\n".join(lineas)
+        return mensaje
+
     def abrir_formulario_turno(self, turno_id=None):
         formulario = tk.Toplevel(self.frame)
         formulario.title("Nuevo Turno" if turno_id is None else "Editar Turno")
-        formulario.geometry("500x400")
+        formulario.geometry("500x480")
         formulario.transient(self.frame.winfo_toplevel())
         formulario.grab_set()
 
-        # Obtener listas de pacientes y doctores
-        try:
-            # Pacientes: intentar método específico para combo, si no existe, intentar métodos alternativos
-            try:
-                pacientes = self.pacientes_queries.obtener_pacientes_para_combo()
-            except AttributeError:
-                if hasattr(self.pacientes_queries, "obtener_pacientes"):
-                    pacientes = self.pacientes_queries.obtener_pacientes()
-                elif hasattr(self.pacientes_queries, "listar_pacientes"):
-                    pacientes = self.pacientes_queries.listar_pacientes()
-                else:
-                    raise AttributeError(
-                        "No se encontró un método válido en PacientesQueries para obtener la lista de pacientes"
-                    )
-
-            # Doctores: idem para doctores
-            try:
-                doctores = self.doctores_queries.obtener_doctores_para_combo()
-            except AttributeError:
-                if hasattr(self.doctores_queries, "obtener_doctores"):
-                    doctores = self.doctores_queries.obtener_doctores()
-                elif hasattr(self.doctores_queries, "listar_doctores"):
-                    doctores = self.doctores_queries.listar_doctores()
-                else:
-                    raise AttributeError(
-                        "No se encontró un método válido en DoctoresQueries para obtener la lista de doctores"
-                    )
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al cargar datos: {str(e)}")
-            formulario.destroy()
-            return
-
-        # Campos del formulario
+        # Selectores con búsqueda: no se cargan listas completas al abrir
         ttk.Label(formulario, text="Paciente:").grid(
             row=0, column=0, padx=5, pady=5, sticky="e"
         )
-        paciente_combo = ttk.Combobox(
+        paciente_combo = AutocompleteEntry(
             formulario,
-            values=[f"{p[0]} - {p[1]}" for p in pacientes],
-            state="readonly",
+            self.pacientes_queries.obtener_indice,
+            buscar_db=self.pacientes_queries.buscar_para_selector,
             width=40,
         )
         paciente_combo.grid(row=0, column=1, padx=5, pady=5)
@@ -226,10 +257,10 @@ class TurnosModule:
         ttk.Label(formulario, text="Doctor:").grid(
             row=1, column=0, padx=5, pady=5, sticky="e"
         )
-        doctor_combo = ttk.Combobox(
+        doctor_combo = AutocompleteEntry(
             formulario,
-            values=[f"{d[0]} - {d[1]}" for d in doctores],
-            state="readonly",
+            self.doctores_queries.obtener_indice,
+            buscar_db=self.doctores_queries.buscar_para_selector,
             width=40,
         )
         doctor_combo.grid(row=1, column=1, padx=5, pady=5)
@@ -259,20 +290,44 @@ class TurnosModule:
             row=5, column=1, sticky="w", padx=5, pady=5
         )
 
+        # Repetición (solo al crear): cada N semanas o meses, hasta fecha o cantidad
+        repetir = tk.BooleanVar()
+        frecuencia_var = tk.StringVar(value="semanal")
+        intervalo_var = tk.StringVar(value="1")
+        if turno_id is None:
+            repetir_frame = ttk.LabelFrame(formulario, text="Repetir")
+            repetir_frame.grid(row=6, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
+            ttk.Checkbutton(repetir_frame, text="Cada", variable=repetir).grid(
+                row=0, column=0, padx=5, pady=5
+            )
+            ttk.Spinbox(
+                repetir_frame, from_=1, to=12, width=4, textvariable=intervalo_var
+            ).grid(row=0, column=1, padx=5, pady=5)
+            ttk.Combobox(
+                repetir_frame,
+                values=["semanal", "mensual"],
+                textvariable=frecuencia_var,
+                state="readonly",
+                width=10,
+            ).grid(row=0, column=2, padx=5, pady=5)
+            ttk.Label(repetir_frame, text="Hasta:").grid(row=1, column=0, padx=5, pady=5)
+            hasta_entry = ttk.Entry(repetir_frame, width=12)
+            hasta_entry.grid(row=1, column=1, columnspan=2, padx=5, pady=5, sticky="w")
+            ttk.Label(repetir_frame, text="o Cantidad:").grid(
+                row=1, column=3, padx=5, pady=5
+            )
+            cantidad_entry = ttk.Entry(repetir_frame, width=6)
+            cantidad_entry.grid(row=1, column=4, padx=5, pady=5)
+
+        serie = {"id": None}
+
         if turno_id is not None:
             # Cargar datos existentes
             try:
                 turno = self.queries.obtener_turno_por_id(turno_id)
                 if turno:
-                    # Buscar el paciente y doctor en las listas
-                    for p in pacientes:
-                        if p[0] == turno[1]:
-                            paciente_combo.set(f"{p[0]} - {p[1]}")
-                            break
-                    for d in doctores:
-                        if d[0] == turno[2]:
-                            doctor_combo.set(f"{d[0]} - {d[1]}")
-                            break
+                    paciente_combo.set(turno[1])
+                    doctor_combo.set(turno[2])
 
                     # Formatear fecha y hora
                     fecha_entry.delete(0, tk.END)
@@ -291,6 +346,9 @@ class TurnosModule:
                     motivo_text.delete("1.0", tk.END)
                     motivo_text.insert("1.0", turno[5] or "")
                     es_particular.set(turno[6] if turno[6] is not None else False)
+                    serie["id"] = turno[7]
+                    serie["paciente"] = turno[1]
+                    serie["fecha"] = turno[3]
             except Exception as e:
                 messagebox.showerror("Error", f"Error al cargar turno: {str(e)}")
 
@@ -332,38 +390,96 @@ class TurnosModule:
                 )
                 return
 
-            # Verificar disponibilidad (solo para nuevo turno)
-            if turno_id is None:
+            datos = (paciente_id, doctor_id, fecha, hora, motivo, particular)
+
+            if turno_id is None and repetir.get():
+                guardar_serie(datos)
+                return
+            if serie["id"] is not None and messagebox.askyesno(
+                "Serie",
+                "Este turno es parte de una serie.\n¿Aplicar doctor, hora, motivo y "
+                "tipo a todos sus turnos futuros sin facturar?",
+            ):
+                # modificar_serie no cambia paciente ni fecha: no perder esos cambios
+                fecha_nueva = datetime.strptime(fecha, "%Y-%m-%d").date()
+                if paciente_id != serie["paciente"] or fecha_nueva != serie["fecha"]:
+                    messagebox.showwarning(
+                        "Serie",
+                        "El paciente y la fecha no se aplican a la serie.\n"
+                        "Para cambiarlos en este turno, guárdelo sin aplicar a la serie.",
+                    )
+                    return
                 try:
-                    if not self.queries.verificar_disponibilidad(
-                        doctor_id, fecha, hora
-                    ):
-                        messagebox.showerror(
-                            "Error", "El doctor ya tiene un turno en esa fecha y hora"
-                        )
-                        return
-                except Exception as e:
-                    messagebox.showerror(
-                        "Error", f"Error al verificar disponibilidad: {str(e)}"
+                    resultado = self.queries.modificar_serie(
+                        serie["id"], doctor_id, hora, motivo, particular
                     )
+                except Exception as e:
+                    messagebox.showerror("Error", f"Error al guardar: {str(e)}")
                     return
-
-            datos = (paciente_id, doctor_id, fecha, hora, motivo, particular)
+                if resultado.ok:
+                    messagebox.showinfo("Éxito", resultado.mensaje)
+                    formulario.destroy()
+                    self.load_todos_turnos()
+                else:
+                    messagebox.showerror("Error", self.describir_conflictos(resultado))
+                return
 
             try:
+                # Verificar disponibilidad y guardar en una sola transacción,
+                # así dos puestos no pueden dar el mismo horario
+                reserva = self.queries.reservar_turno(datos, turno_id)
+                if not reserva.ok:
+                    mensaje = reserva.mensaje
+                    if reserva.libres:
+                        mensaje += "\n\nPróximos horarios libres:\n" + "\n".join(
+                            libre.strftime("%Y-%m-%d %H:%M") for libre in reserva.libres
+                        )
+                    messagebox.showerror("Error", mensaje)
+                    return
                 if turno_id is None:
-                    nuevo_id = self.queries.insertar_turno(datos)
-                    messagebox.showinfo("Éxito", f"Turno agregado con ID: {nuevo_id}")
+                    messagebox.showinfo(
+                        "Éxito", f"Turno agregado con ID: {reserva.id_turno}"
+                    )
                 else:
-                    if self.queries.actualizar_turno(turno_id, datos):
-                        messagebox.showinfo("Éxito", "Turno actualizado correctamente")
-                    else:
-                        messagebox.showerror("Error", "No se pudo actualizar el turno")
+                    messagebox.showinfo("Éxito", "Turno actualizado correctamente")
                 formulario.destroy()
                 self.load_todos_turnos()  # Recargar la lista de turnos
             except Exception as e:
                 messagebox.showerror("Error", f"Error al guardar: {str(e)}")
 
+        def guardar_serie(datos):
+            try:
+                intervalo = int(intervalo_var.get())
+                hasta = hasta_entry.get().strip()
+                hasta = datetime.strptime(hasta, "%Y-%m-%d").date() if hasta else None
+                cantidad = cantidad_entry.get().strip()
+                cantidad = int(cantidad) if cantidad else None
+            except ValueError:
+                messagebox.showerror(
+                    "Error", "Repetición inválida: intervalo y cantidad son números, "
+                    "hasta es YYYY-MM-DD"
+                )
+                return
+            if hasta is None and cantidad is None:
+                messagebox.showerror(
+                    "Error", "Indique hasta qué fecha o cuántas veces repetir"
+                )
+                return
+
+            try:
+                resultado = self.queries.crear_serie(
+                    datos, frecuencia_var.get(), intervalo, hasta, cantidad
+                )
+            except Exception as e:
+                messagebox.showerror("Error", f"Error al guardar: {str(e)}")
+                return
+            if resultado.ok:
+                messagebox.showinfo("Éxito", resultado.mensaje)
+                formulario.destroy()
+                self.load_todos_turnos()
+            else:
+                messagebox.showerror("Error", self.describir_conflictos(resultado))
+
         ttk.Button(formulario, text="Guardar", command=guardar).grid(
-            row=6, column=0, columnspan=2, pady=10
+            row=7, column=0, columnspan=2, pady=10
         )
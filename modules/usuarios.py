@@ -2,6 +2,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from database.queries import UsuariosQueries
+from utils.perfil_ui import Medicion
 
 
 class UsuariosModule:
@@ -76,9 +77,13 @@ class UsuariosModule:
             self.tree.delete(item)
 
         try:
-            usuarios = self.queries.obtener_usuarios()
-            for usuario in usuarios:
-                self.tree.insert("", "end", values=usuario)
+            medicion = Medicion("usuarios")
+            with medicion.fase("fetch"):
+                usuarios = self.queries.obtener_usuarios()
+            with medicion.fase("render"):
+                for usuario in usuarios:
+                    self.tree.insert("", "end", values=usuario)
+            medicion.terminar(len(usuarios))
         except Exception as e:
             messagebox.showerror("Error", f"Error al cargar usuarios: {str(e)}")
 
@@ -89,10 +94,9 @@ class UsuariosModule:
                 self.tree.delete(item)
 
             try:
-                usuarios = self.queries.obtener_usuarios()
+                usuarios = self.queries.buscar_usuarios(usuario)
                 for user in usuarios:
-                    if usuario.lower() in user[1].lower():
-                        self.tree.insert("", "end", values=user)
+                    self.tree.insert("", "end", values=user)
             except Exception as e:
                 messagebox.showerror("Error", f"Error al buscar usuario: {str(e)}")
 
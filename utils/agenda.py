@@ -0,0 +1,199 @@
+# utils/agenda.py
+import threading
+import time as reloj
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime, time, timedelta
+
+
+def a_datetime(fecha, hora):
+    """Combinar fecha y hora tal como llegan de MySQL, de un formulario o de Python.
+
+    mysql.connector devuelve las columnas TIME como timedelta; los
+    formularios, como texto "HH:MM" o "HH:MM:SS".
+    """
+    if isinstance(fecha, str):
+        fecha = date.fromisoformat(fecha)
+    if isinstance(hora, timedelta):
+        return datetime.combine(fecha, time()) + hora
+    if isinstance(hora, str):
+        hora = time.fromisoformat(hora if hora.count(":") == 2 else hora + ":00")
+    return datetime.combine(fecha, hora)
+
+
+class Agenda:
+    """Índice en memoria de los turnos de cada doctor, para consultar disponibilidad.
+
+    Por doctor guarda una lista ordenada de (inicio, fin, id_turno) dentro de
+    un horizonte de días. "¿Está libre este intervalo?" es un bisect más
+    mirar los vecinos, y los próximos huecos libres se obtienen recorriendo
+    a la vez los horarios de atención y los turnos ocupados de cada día.
+
+    Todos los turnos duran `duracion` minutos (la tabla Turno no guarda
+    duración). horario mapea día de la semana (0 = lunes) a (desde, hasta);
+    horarios_doctor permite uno distinto por id_doctor.
+
+    La agenda deja de estar lista al cambiar el día (el horizonte se corre)
+    y, con ttl, a los ttl segundos de cargada, por si otro puesto reservó o
+    canceló turnos.
+    """
+
+    def __init__(
+        self, duracion=30, horario=None, horarios_doctor=None, horizonte_dias=60, ttl=None
+    ):
+        self.duracion = timedelta(minutes=duracion)
+        self.horario = horario or {}
+        self.horarios_doctor = horarios_doctor or {}
+        self.horizonte_dias = horizonte_dias
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._turnos = {}  # id_doctor -> [(inicio, fin, id_turno)] ordenada
+        self._por_id = {}  # id_turno -> (id_doctor, inicio, fin)
+        self.desde = None
+        self.hasta = None
+        self._listo = False
+        self._vence = None
+
+    @property
+    def listo(self):
+        if not self._listo or self.desde != date.today():
+            return False
+        return self._vence is None or reloj.monotonic() < self._vence
+
+    def rango(self, hoy=None):
+        """Fechas (desde, hasta) que debe cubrir la carga inicial"""
+        hoy = hoy or date.today()
+        return hoy, hoy + timedelta(days=self.horizonte_dias)
+
+    def cargar(self, filas, desde, hasta):
+        """Construir el índice con filas (id_turno, id_doctor, fecha, hora)"""
+        turnos = {}
+        por_id = {}
+        for id_turno, id_doctor, fecha, hora in filas:
+            inicio = a_datetime(fecha, hora)
+            fin = inicio + self.duracion
+            turnos.setdefault(id_doctor, []).append((inicio, fin, id_turno))
+            por_id[id_turno] = (id_doctor, inicio, fin)
+        for lista in turnos.values():
+            lista.sort()
+        with self._lock:
+            self._turnos = turnos
+            self._por_id = por_id
+            self.desde, self.hasta = desde, hasta
+            self._listo = True
+            self._vence = None if self.ttl is None else reloj.monotonic() + self.ttl
+
+    def invalidar(self):
+        """Marcar la agenda para recargarla en el próximo uso"""
+        self._listo = False
+
+    def cubre(self, fecha):
+        if isinstance(fecha, str):
+            fecha = date.fromisoformat(fecha)
+        return self.listo and self.desde <= fecha <= self.hasta
+
+    def agregar(self, id_turno, id_doctor, fecha, hora):
+        """Agregar o mover un turno; los que caen fuera del horizonte se ignoran"""
+        inicio = a_datetime(fecha, hora)
+        with self._lock:
+            self._quitar(id_turno)
+            if not self.listo or not (self.desde <= inicio.date() <= self.hasta):
+                return
+            fin = inicio + self.duracion
+            insort(self._turnos.setdefault(id_doctor, []), (inicio, fin, id_turno))
+            self._por_id[id_turno] = (id_doctor, inicio, fin)
+
+    def quitar(self, id_turno):
+        with self._lock:
+            self._quitar(id_turno)
+
+    def en_horario(self, id_doctor, inicio, fin):
+        franja = self._franja(id_doctor, inicio.date())
+        return franja is not None and franja[0] <= inicio and fin <= franja[1]
+
+    def esta_libre(self, id_doctor, fecha, hora, excluir_turno=None):
+        """True si el turno [hora, hora + duracion) está en horario y no se superpone"""
+        inicio = a_datetime(fecha, hora)
+        fin = inicio + self.duracion
+        if not self.en_horario(id_doctor, inicio, fin):
+            return False
+        with self._lock:
+            return not self._superpuestos(id_doctor, inicio, fin, excluir_turno)
+
+    def proximos_libres(self, id_doctor, desde=None, cantidad=5):
+        """Inicio de los próximos `cantidad` turnos libres del doctor desde `desde`"""
+        desde = desde or datetime.now()
+        libres = []
+        dia = desde.date()
+        with self._lock:
+            ocupados = self._turnos.get(id_doctor, [])
+            while len(libres) < cantidad and dia <= self.hasta:
+                franja = self._franja(id_doctor, dia)
+                if franja is not None:
+                    libres.extend(
+                        self._libres_en(ocupados, franja, desde, cantidad - len(libres))
+                    )
+                dia += timedelta(days=1)
+        return libres
+
+    def capacidad(self, id_doctor, desde, hasta):
+        """Cantidad de turnos que entran en el horario del doctor entre dos fechas"""
+        total = 0
+        dia = desde
+        while dia <= hasta:
+            franja = self._franja(id_doctor, dia)
+            if franja is not None:
+                total += (franja[1] - franja[0]) // self.duracion
+            dia += timedelta(days=1)
+        return total
+
+    def __len__(self):
+        return len(self._por_id)
+
+    # -----------------------------------------------------
+    def _quitar(self, id_turno):
+        turno = self._por_id.pop(id_turno, None)
+        if turno is None:
+            return
+        id_doctor, inicio, fin = turno
+        lista = self._turnos.get(id_doctor, [])
+        i = bisect_left(lista, (inicio, fin, id_turno))
+        if i < len(lista) and lista[i][2] == id_turno:
+            del lista[i]
+
+    def _franja(self, id_doctor, dia):
+        horario = self.horarios_doctor.get(id_doctor, self.horario)
+        franja = horario.get(dia.weekday())
+        if franja is None:
+            return None
+        return a_datetime(dia, franja[0]), a_datetime(dia, franja[1])
+
+    def _superpuestos(self, id_doctor, inicio, fin, excluir_turno=None):
+        lista = self._turnos.get(id_doctor, [])
+        # Todos duran lo mismo, así que solo pueden pisarse los que empiezan
+        # en (inicio - duracion, fin)
+        i = bisect_right(lista, (inicio - self.duracion, datetime.max, 0))
+        while i < len(lista) and lista[i][0] < fin:
+            if lista[i][1] > inicio and lista[i][2] != excluir_turno:
+                return True
+            i += 1
+        return False
+
+    def _libres_en(self, ocupados, franja, desde, cantidad):
+        """Barrer los turnos posibles de una franja junto con los ocupados de ese día"""
+        libres = []
+        slot = franja[0]
+        i = bisect_left(ocupados, (franja[0] - self.duracion,))
+        while slot + self.duracion <= franja[1] and len(libres) < cantidad:
+            fin = slot + self.duracion
+            while i < len(ocupados) and ocupados[i][1] <= slot:
+                i += 1
+            if i < len(ocupados) and ocupados[i][0] < fin:
+                # Ocupado: saltar al final de ese turno, alineado a la grilla
+                pasos = -(-(ocupados[i][1] - franja[0]) // self.duracion)
+                slot = franja[0] + pasos * self.duracion
+                continue
+            if slot >= desde:
+                libres.append(slot)
+            slot = fin
+        return libres
@@ -0,0 +1,112 @@
+# utils/arranque.py
+import sys
+import time
+
+try:
+    from config.config import DEBUG
+except ImportError:
+    DEBUG = False
+
+
+def modo_debug():
+    """DEBUG en config.py o la opción --debug en la línea de comandos"""
+    return DEBUG or "--debug" in sys.argv
+
+
+class Cronometro:
+    """Tiempos de las etapas del arranque, medidos desde que se creó"""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.anterior = self.inicio
+        self.etapas = []  # (nombre, segundos de la etapa, segundos desde el inicio)
+
+    def marcar(self, nombre):
+        ahora = time.perf_counter()
+        self.etapas.append((nombre, ahora - self.anterior, ahora - self.inicio))
+        self.anterior = ahora
+
+    def total(self):
+        return self.anterior - self.inicio
+
+    def reporte(self):
+        print("⏱️ Tiempos de arranque:")
+        for nombre, etapa, acumulado in self.etapas:
+            print(f"   {nombre:<32} {etapa * 1000:>8.1f} ms  (t = {acumulado * 1000:.0f} ms)")
+
+
+class _LoaderMedido:
+    """Envuelve el loader de un módulo para medir cuánto tarda en ejecutarse"""
+
+    def __init__(self, loader, perfil, nombre):
+        self._loader = loader
+        self._perfil = perfil
+        self._nombre = nombre
+
+    def create_module(self, spec):
+        # Las extensiones en C hacen casi todo su trabajo al crearse
+        return self._perfil.medir(self._nombre, self._loader.create_module, spec)
+
+    def exec_module(self, module):
+        self._perfil.medir(self._nombre, self._loader.exec_module, module)
+
+    def __getattr__(self, nombre):
+        return getattr(self._loader, nombre)
+
+
+class PerfilImportaciones:
+    """Equivalente dentro de la aplicación a python -X importtime.
+
+    Se instala al principio de sys.meta_path: resuelve cada import con los
+    buscadores normales y mide el tiempo propio (sin sus imports anidados)
+    y el acumulado de cada módulo. Funciona también en el ejecutable de
+    PyInstaller, donde no se pueden pasar opciones al intérprete.
+    """
+
+    def __init__(self):
+        self.tiempos = {}  # módulo -> [propio, acumulado] en segundos
+        self._pila = []  # tiempo de los imports anidados del módulo en curso
+
+    def instalar(self):
+        sys.meta_path.insert(0, self)
+        return self
+
+    def desinstalar(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, nombre, path=None, target=None):
+        for buscador in sys.meta_path:
+            if buscador is self or not hasattr(buscador, "find_spec"):
+                continue
+            spec = buscador.find_spec(nombre, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _LoaderMedido(spec.loader, self, nombre)
+        return spec
+
+    def medir(self, nombre, func, *args):
+        self._pila.append(0.0)
+        inicio = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            acumulado = time.perf_counter() - inicio
+            anidados = self._pila.pop()
+            if self._pila:
+                self._pila[-1] += acumulado
+            tiempo = self.tiempos.setdefault(nombre, [0.0, 0.0])
+            tiempo[0] += acumulado - anidados
+            tiempo[1] += acumulado
+
+    def reporte(self, cantidad=20):
+        """Los módulos más lentos por tiempo acumulado, como -X importtime"""
+        lentos = sorted(self.tiempos.items(), key=lambda t: t[1][1], reverse=True)
+        total = sum(propio for propio, _ in self.tiempos.values())
+        print(f"📦 Importaciones: {len(self.tiempos)} módulos en {total * 1000:.0f} ms")
+        print(f"   {'propio [ms]':>11} | {'acumulado [ms]':>14} | módulo")
+        for nombre, (propio, acumulado) in lentos[:cantidad]:
+            print(f"   {propio * 1000:>11.1f} | {acumulado * 1000:>14.1f} | {nombre}")
@@ -0,0 +1,202 @@
+# utils/autocomplete.py
+import tkinter as tk
+from tkinter import ttk
+
+from utils.executor import get_executor
+
+
+class AutocompleteEntry(ttk.Frame):
+    """Selector con búsqueda mientras se escribe, en lugar de un Combobox con todo.
+
+    obtener_indice() devuelve un PrefixIndex listo (la primera vez lo
+    construye, por eso corre en segundo plano). Hasta que esté listo, o si
+    el índice no encuentra nada (el elemento pudo cargarse en otro puesto),
+    la búsqueda va a la base con buscar_db(texto, limit=), que devuelve a lo
+    sumo limit filas (id, etiqueta). excluir es un conjunto de ids que no se
+    ofrecen.
+
+    get() devuelve "id - etiqueta" como los Combobox que reemplaza, o "" si
+    no hay nada elegido.
+    """
+
+    def __init__(
+        self,
+        parent,
+        obtener_indice,
+        buscar_db=None,
+        excluir=None,
+        limit=15,
+        width=40,
+        delay_ms=150,
+    ):
+        super().__init__(parent)
+        self.obtener_indice = obtener_indice
+        self.buscar_db = buscar_db
+        self.excluir = excluir
+        self.limit = limit
+        self.delay_ms = delay_ms
+
+        self.executor = get_executor(self)
+        self.key = f"autocomplete_{id(self)}"
+        self.indice = None
+        self.seleccion = None  # (id, etiqueta)
+        self._pendiente = None  # id a mostrar cuando el índice esté listo
+        self._after_id = None
+        self._opciones = []
+
+        self.texto_var = tk.StringVar()
+        self.entry = ttk.Entry(self, textvariable=self.texto_var, width=width)
+        self.entry.pack(fill="x", expand=True)
+
+        self.popup = None
+        self.listbox = None
+
+        self.entry.bind("<KeyRelease>", self._on_key)
+        self.entry.bind("<Down>", self._bajar)
+        self.entry.bind("<Return>", self._elegir_primera)
+        self.entry.bind("<Escape>", lambda e: self._cerrar_popup())
+        self.entry.bind("<FocusOut>", self._on_focus_out)
+
+        self.executor.submit(
+            f"{self.key}_indice",
+            obtener_indice,
+            on_success=self._indice_listo,
+            on_error=lambda e: print(f"⚠️ Índice no disponible, se busca en la base: {e}"),
+        )
+
+    # -----------------------------------------------------
+    def get(self):
+        if self.seleccion is None:
+            return ""
+        return f"{self.seleccion[0]} - {self.seleccion[1]}"
+
+    def get_id(self):
+        return self.seleccion[0] if self.seleccion else None
+
+    def set(self, id_, etiqueta=None):
+        """Elegir un elemento por id; sin etiqueta se toma del índice"""
+        if etiqueta is None and self.indice is not None:
+            etiqueta = self.indice.etiqueta(id_)
+        if etiqueta is None:
+            # Se completa cuando termine de construirse el índice
+            self._pendiente = id_
+            self.seleccion = (id_, str(id_))
+            self.texto_var.set(str(id_))
+            return
+        self._pendiente = None
+        self.seleccion = (id_, etiqueta)
+        self.texto_var.set(etiqueta)
+
+    def clear(self):
+        self.seleccion = None
+        self.texto_var.set("")
+
+    # -----------------------------------------------------
+    def _indice_listo(self, indice):
+        self.indice = indice
+        if self._pendiente is not None:
+            self.set(self._pendiente)
+
+    def _on_key(self, event):
+        if event.keysym in ("Down", "Up", "Return", "Escape", "Tab"):
+            return
+        # Escribir invalida la selección hasta elegir otra vez
+        self.seleccion = None
+        if self._after_id:
+            self.after_cancel(self._after_id)
+        self._after_id = self.after(self.delay_ms, self._buscar)
+
+    def _buscar(self):
+        self._after_id = None
+        texto = self.texto_var.get().strip()
+        if not texto:
+            self._cerrar_popup()
+            return
+
+        if self.indice is not None:
+            opciones = self.indice.buscar(texto, self.limit, self.excluir)
+            if opciones or self.buscar_db is None:
+                self._mostrar(opciones)
+                return
+        if self.buscar_db is not None:
+            self.executor.submit(
+                self.key,
+                self.buscar_db,
+                texto,
+                limit=self.limit,
+                on_success=self._mostrar_db,
+            )
+
+    def _mostrar_db(self, filas):
+        if self.excluir:
+            filas = [f for f in filas if f[0] not in self.excluir]
+        self._mostrar([(f[0], f[1]) for f in filas])
+
+    def _mostrar(self, opciones):
+        self._opciones = opciones
+        if not opciones or not self.entry.winfo_exists():
+            self._cerrar_popup()
+            return
+
+        if self.popup is None:
+            self.popup = tk.Toplevel(self)
+            self.popup.overrideredirect(True)
+            self.listbox = tk.Listbox(self.popup, height=8, exportselection=False)
+            self.listbox.pack(fill="both", expand=True)
+            self.listbox.bind("<ButtonRelease-1>", self._elegir_listbox)
+            self.listbox.bind("<Return>", self._elegir_listbox)
+            self.listbox.bind("<Escape>", lambda e: self._cerrar_popup())
+
+        self.listbox.delete(0, tk.END)
+        for _, etiqueta in opciones:
+            self.listbox.insert(tk.END, etiqueta)
+
+        x = self.entry.winfo_rootx()
+        y = self.entry.winfo_rooty() + self.entry.winfo_height()
+        self.popup.geometry(f"{self.entry.winfo_width()}x160+{x}+{y}")
+        self.popup.lift()
+
+    def _cerrar_popup(self):
+        if self.popup is not None:
+            self.popup.destroy()
+            self.popup = None
+            self.listbox = None
+
+    def _elegir(self, indice):
+        if 0 <= indice < len(self._opciones):
+            self.set(*self._opciones[indice])
+        self._cerrar_popup()
+        self.entry.focus_set()
+
+    def _elegir_listbox(self, event=None):
+        seleccion = self.listbox.curselection() if self.listbox else ()
+        if seleccion:
+            self._elegir(seleccion[0])
+        return "break"
+
+    def _elegir_primera(self, event=None):
+        if self.popup is not None and self._opciones:
+            self._elegir(0)
+        return "break"
+
+    def _bajar(self, event=None):
+        if self.listbox is not None:
+            self.listbox.focus_set()
+            self.listbox.selection_clear(0, tk.END)
+            self.listbox.selection_set(0)
+            self.listbox.activate(0)
+        return "break"
+
+    def _on_focus_out(self, event=None):
+        # Dar tiempo a que el clic en la lista llegue antes de cerrarla
+        self.after(150, self._cerrar_si_sin_foco)
+
+    def _cerrar_si_sin_foco(self):
+        if self.popup is None:
+            return
+        try:
+            foco = self.focus_get()
+        except (KeyError, tk.TclError):
+            foco = None
+        if foco not in (self.entry, self.listbox):
+            self._cerrar_popup()
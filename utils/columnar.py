@@ -0,0 +1,90 @@
+# utils/columnar.py
+from array import array
+from collections import Counter, defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import compress
+
+
+def a_numero(valor):
+    """Valor de MySQL listo para un array: fechas como ordinal, NULL como 0"""
+    if valor is None:
+        return 0
+    if isinstance(valor, datetime):
+        return valor.date().toordinal()
+    if isinstance(valor, date):
+        return valor.toordinal()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    return valor
+
+
+class TablaColumnar:
+    """Copia en memoria de una tabla, guardada por columnas en arrays compactos.
+
+    Cada columna es un array.array de tipo fijo: 100.000 turnos ocupan unos
+    pocos MB en lugar de 100.000 tuplas, y los cálculos recorren una columna
+    a la vez. Las fechas se guardan como ordinal (date.toordinal) y los NULL
+    como 0.
+
+    La primera columna es la clave primaria, que crece con cada alta: marca
+    es la mayor cargada, y refrescar consiste en agregar las filas con clave
+    mayor. Cambios y bajas de filas ya cargadas requieren vaciar y recargar.
+    """
+
+    def __init__(self, columnas):
+        """columnas = [(nombre, typecode de array)], la primera es la clave"""
+        self.tipos = dict(columnas)
+        self.nombres = [nombre for nombre, _ in columnas]
+        self.vaciar()
+
+    def vaciar(self):
+        self.columnas = {nombre: array(tipo) for nombre, tipo in self.tipos.items()}
+        self.marca = 0
+
+    def agregar(self, filas):
+        """Agregar filas (tuplas en el orden de las columnas); devuelve cuántas"""
+        filas = [tuple(map(a_numero, fila)) for fila in filas]
+        if not filas:
+            return 0
+        for nombre, valores in zip(self.nombres, zip(*filas)):
+            self.columnas[nombre].extend(valores)
+        self.marca = max(self.marca, self.columnas[self.nombres[0]][-1])
+        return len(filas)
+
+    def __getitem__(self, nombre):
+        return self.columnas[nombre]
+
+    def __len__(self):
+        return len(self.columnas[self.nombres[0]])
+
+    def bytes(self):
+        return sum(col.itemsize * len(col) for col in self.columnas.values())
+
+
+def mascara(columna, condicion):
+    """array de 0/1 con condicion(valor) para cada fila de la columna"""
+    return array("b", map(condicion, columna))
+
+
+def entre(columna, desde, hasta):
+    """Máscara de las filas con desde <= valor <= hasta"""
+    return mascara(columna, lambda v: desde <= v <= hasta)
+
+
+def contar(claves, filtro=None):
+    """{clave: cantidad de filas}, opcionalmente solo las de la máscara"""
+    if filtro is not None:
+        claves = compress(claves, filtro)
+    return Counter(claves)
+
+
+def sumar(claves, valores, filtro=None):
+    """{clave: suma de valores}, opcionalmente solo las filas de la máscara"""
+    if filtro is not None:
+        claves = compress(claves, filtro)
+        valores = compress(valores, filtro)
+    totales = defaultdict(float)
+    for clave, valor in zip(claves, valores):
+        totales[clave] += valor
+    return dict(totales)
@@ -0,0 +1,153 @@
+# utils/executor.py
+import queue
+import threading
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueryExecutor:
+    """Ejecuta consultas en un pool de hilos, fuera del mainloop de Tk.
+
+    Los resultados vuelven al hilo de la interfaz con root.after, así los
+    callbacks pueden tocar widgets sin problemas. Cada pedido lleva una clave:
+    uno nuevo con la misma clave reemplaza al anterior y el resultado viejo se
+    descarta (por ejemplo, dos clics seguidos en "Filtrar").
+
+    Para tareas largas, on_progress recibe los avances que la función
+    informa llamando al argumento progreso que se le agrega.
+    """
+
+    def __init__(self, root, max_workers=4, poll_ms=20):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="consulta"
+        )
+        self._results = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = {}  # clave -> (generación, future, on_success, on_error, on_progress)
+        self._generation = 0
+        self._polling = False
+        self._closed = False
+
+    def submit(
+        self, key, func, *args, on_success=None, on_error=None, on_progress=None, **kwargs
+    ):
+        """Correr func(*args, **kwargs) en segundo plano.
+
+        Debe llamarse desde el hilo de Tk. on_success recibe el resultado y
+        on_error la excepción; ambos se ejecutan en el hilo de la interfaz.
+        Con on_progress, func recibe además progreso=callable para avisar
+        avances, que llegan a on_progress también en el hilo de la interfaz.
+        """
+        if self._closed:
+            return None
+
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            anterior = self._pending.pop(key, None)
+            if anterior:
+                anterior[1].cancel()
+            if on_progress is not None:
+                kwargs["progreso"] = (
+                    lambda dato: self._results.put((key, generation, "progreso", dato))
+                )
+            future = self._pool.submit(self._run, key, generation, func, args, kwargs)
+            self._pending[key] = (generation, future, on_success, on_error, on_progress)
+
+        self._schedule_poll()
+        return future
+
+    def cancel(self, key):
+        """Descartar el pedido pendiente con esa clave, si lo hay"""
+        with self._lock:
+            anterior = self._pending.pop(key, None)
+        if anterior:
+            anterior[1].cancel()
+
+    def is_pending(self, key):
+        with self._lock:
+            return key in self._pending
+
+    def _run(self, key, generation, func, args, kwargs):
+        try:
+            resultado = func(*args, **kwargs)
+        except Exception as e:
+            self._results.put((key, generation, "error", e))
+        else:
+            self._results.put((key, generation, "ok", resultado))
+
+    def _schedule_poll(self):
+        if self._polling or self._closed:
+            return
+        try:
+            self.root.after(self.poll_ms, self._poll)
+            self._polling = True
+        except tk.TclError:
+            # La ventana ya fue destruida
+            pass
+
+    def _poll(self):
+        self._polling = False
+        while True:
+            try:
+                key, generation, tipo, valor = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            with self._lock:
+                actual = self._pending.get(key)
+                if actual is None or actual[0] != generation:
+                    # Pedido reemplazado o cancelado: se ignora
+                    continue
+                if tipo != "progreso":
+                    del self._pending[key]
+
+            _, _, on_success, on_error, on_progress = actual
+            try:
+                if tipo == "progreso":
+                    on_progress(valor)
+                elif tipo == "ok" and on_success:
+                    on_success(valor)
+                elif tipo == "error":
+                    if on_error:
+                        on_error(valor)
+                    else:
+                        print(f"❌ Error en consulta en segundo plano ({key}): {valor}")
+            except Exception as e:
+                print(f"❌ Error procesando resultado de {key}: {e}")
+
+        with self._lock:
+            quedan = bool(self._pending)
+        if quedan:
+            self._schedule_poll()
+
+    def shutdown(self):
+        self._closed = True
+        with self._lock:
+            for _, future, *_ in self._pending.values():
+                future.cancel()
+            self._pending.clear()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_shared = None
+
+
+def get_executor(widget):
+    """Executor compartido por todos los módulos de la ventana de widget"""
+    global _shared
+    root = widget.winfo_toplevel()
+    if _shared is None or _shared.root is not root:
+        if _shared is not None:
+            _shared.shutdown()
+        _shared = QueryExecutor(root)
+    return _shared
+
+
+def shutdown_executor():
+    global _shared
+    if _shared is not None:
+        _shared.shutdown()
+        _shared = None
@@ -0,0 +1,212 @@
+# utils/exportar.py
+import csv
+import os
+import threading
+import time
+import tkinter as tk
+import zipfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from tkinter import ttk, messagebox, filedialog
+from xml.sax.saxutils import escape
+
+FORMATOS = (("CSV", "*.csv"), ("Excel", "*.xlsx"))
+
+
+def texto(valor):
+    """Valor de MySQL como texto para el archivo"""
+    if valor is None:
+        return ""
+    if isinstance(valor, datetime):
+        return valor.isoformat(sep=" ")
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, timedelta):
+        # Columnas TIME
+        segundos = int(valor.total_seconds())
+        return f"{segundos // 3600:02d}:{segundos % 3600 // 60:02d}"
+    if isinstance(valor, bytes):
+        return valor.decode("utf-8", "replace")
+    return str(valor)
+
+
+def escribir_csv(archivo, columnas, bloques, avance):
+    # Excel en español espera ";" como separador y la marca BOM para leer UTF-8
+    with open(archivo, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(columnas)
+        for bloque in bloques:
+            writer.writerows([texto(v) for v in fila] for fila in bloque)
+            avance(len(bloque))
+
+
+# Partes mínimas de un libro .xlsx con una sola hoja
+XLSX_PARTES = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" '
+        'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/'
+        '2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Datos" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/'
+        '2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        "</Relationships>"
+    ),
+}
+
+
+def celda(valor):
+    """Celda de la hoja: números como números, todo lo demás como texto"""
+    if isinstance(valor, bool):
+        valor = "Sí" if valor else "No"
+    elif isinstance(valor, (int, float, Decimal)):
+        return f"<c><v>{valor}</v></c>"
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(texto(valor))}</t></is></c>'
+
+
+def escribir_xlsx(archivo, columnas, bloques, avance):
+    """Libro .xlsx escrito a medida que llegan las filas.
+
+    La hoja se comprime en el zip mientras se genera (zipfile abierto en
+    modo escritura), con texto en línea en lugar de la tabla de strings
+    compartidos, así no hace falta tener el libro en memoria.
+    """
+    with zipfile.ZipFile(archivo, "w", zipfile.ZIP_DEFLATED) as libro:
+        for nombre, contenido in XLSX_PARTES.items():
+            libro.writestr(nombre, contenido)
+        with libro.open("xl/worksheets/sheet1.xml", "w") as hoja:
+            hoja.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b"<sheetData>"
+            )
+            encabezado = "".join(celda(str(c)) for c in columnas)
+            hoja.write(f"<row>{encabezado}</row>".encode("utf-8"))
+            for bloque in bloques:
+                hoja.write(
+                    "".join(
+                        "<row>" + "".join(map(celda, fila)) + "</row>" for fila in bloque
+                    ).encode("utf-8")
+                )
+                avance(len(bloque))
+            hoja.write(b"</sheetData></worksheet>")
+
+
+ESCRITORES = {".csv": escribir_csv, ".xlsx": escribir_xlsx}
+
+
+def exportar(archivo, abrir_stream, *args, progreso=None, detener=None):
+    """Escribir en archivo (.csv o .xlsx) el resultado de abrir_stream(*args).
+
+    abrir_stream devuelve el context manager de DatabaseConnection.stream:
+    las filas pasan de a un bloque del servidor al archivo. progreso(dict)
+    se llama por bloque y detener (threading.Event) corta la exportación.
+    Si se corta o falla, el archivo a medio escribir se borra. Devuelve el
+    resumen final.
+    """
+    escritor = ESCRITORES.get(os.path.splitext(archivo)[1].lower())
+    if escritor is None:
+        raise ValueError("Formato no soportado: use .csv o .xlsx")
+
+    resumen = {"archivo": archivo, "filas": 0, "segundos": 0.0, "cancelado": False}
+    inicio = time.perf_counter()
+
+    def avance(cantidad):
+        resumen["filas"] += cantidad
+        resumen["segundos"] = time.perf_counter() - inicio
+        if progreso is not None:
+            progreso(dict(resumen))
+        if detener is not None and detener.is_set():
+            raise InterruptedError
+
+    abierto = False
+    try:
+        with abrir_stream(*args) as (columnas, bloques):
+            abierto = True
+            escritor(archivo, columnas, bloques, avance)
+    except BaseException as e:
+        # Un archivo cortado a la mitad parecería completo: no dejarlo
+        if abierto and os.path.exists(archivo):
+            os.remove(archivo)
+        if not isinstance(e, InterruptedError):
+            raise
+        resumen["cancelado"] = True
+    resumen["segundos"] = time.perf_counter() - inicio
+    return resumen
+
+
+def dialogo_exportar(parent, executor, nombre, abrir_stream, *args):
+    """Pedir el archivo y exportar en segundo plano, con avance y botón para cancelar"""
+    archivo = filedialog.asksaveasfilename(
+        parent=parent,
+        title="Exportar",
+        initialfile=f"{nombre}_{date.today():%Y%m%d}.csv",
+        defaultextension=".csv",
+        filetypes=FORMATOS,
+    )
+    if not archivo:
+        return
+
+    ventana = tk.Toplevel(parent)
+    ventana.title("Exportando...")
+    ventana.geometry("360x110")
+    ventana.transient(parent)
+    estado = ttk.Label(ventana, text=f"Exportando a {os.path.basename(archivo)}...")
+    estado.pack(padx=10, pady=10)
+    detener = threading.Event()
+    ttk.Button(ventana, text="Cancelar", command=detener.set).pack(pady=5)
+    ventana.protocol("WM_DELETE_WINDOW", detener.set)
+
+    def mostrar_avance(resumen):
+        velocidad = resumen["filas"] / resumen["segundos"] if resumen["segundos"] else 0
+        estado.configure(text=f"{resumen['filas']} filas ({velocidad:.0f} filas/s)")
+
+    def terminar(resumen):
+        ventana.destroy()
+        if resumen["cancelado"]:
+            messagebox.showinfo("Exportar", "Exportación cancelada", parent=parent)
+        else:
+            messagebox.showinfo(
+                "Exportar",
+                f"{resumen['filas']} filas exportadas en {resumen['segundos']:.1f} s\n"
+                f"{resumen['archivo']}",
+                parent=parent,
+            )
+
+    def fallar(e):
+        ventana.destroy()
+        messagebox.showerror("Error", f"Error al exportar: {str(e)}", parent=parent)
+
+    executor.submit(
+        f"exportar_{nombre}",
+        exportar,
+        archivo,
+        abrir_stream,
+        *args,
+        detener=detener,
+        on_success=terminar,
+        on_error=fallar,
+        on_progress=mostrar_avance,
+    )
@@ -0,0 +1,283 @@
+# utils/importar.py
+import csv
+import os
+import threading
+import time
+import tkinter as tk
+from itertools import islice
+from tkinter import ttk, messagebox, filedialog
+
+from utils import validators
+from utils.prefix_index import normalizar
+
+try:
+    from config.config import DB_BULK_CHUNK
+except ImportError:
+    DB_BULK_CHUNK = 500
+
+# Otros nombres de columna aceptados en el encabezado del archivo
+ALIAS = {
+    "email": "correo_electronico",
+    "mail": "correo_electronico",
+    "correo": "correo_electronico",
+    "fecha_nacimiento": "fecha_de_nacimiento",
+    "nacimiento": "fecha_de_nacimiento",
+    "obra": "obra_social",
+    "obrasocial": "obra_social",
+}
+
+
+def abrir_csv(archivo):
+    """(archivo abierto, encabezados, filas como dicts) con el separador detectado"""
+    f = open(archivo, newline="", encoding="utf-8-sig")
+    try:
+        dialecto = csv.Sniffer().sniff(f.read(4096), delimiters=";,\t")
+    except csv.Error:
+        dialecto = csv.excel
+    f.seek(0)
+    lector = csv.reader(f, dialecto)
+    encabezados = []
+    for encabezado in next(lector, []):
+        nombre = normalizar(encabezado).strip().replace(" ", "_")
+        encabezados.append(ALIAS.get(nombre, nombre))
+    return f, encabezados, (dict(zip(encabezados, fila)) for fila in lector)
+
+
+def importar(
+    archivo, reglas, preparar, insertar, progreso=None, detener=None, lote=DB_BULK_CHUNK
+):
+    """Importar un CSV en streaming: leer, validar e insertar de a un bloque.
+
+    Cada bloque se valida columna por columna (validators.validar_bloque),
+    preparar(válidas) lo convierte en (filas para insertar, filas
+    originales, rechazadas) y insertar(filas) lo guarda por bloques
+    devolviendo un ResultadoLote. Las filas rechazadas, con el motivo, van a
+    <archivo>_rechazos.csv. progreso(dict) se llama por bloque y detener
+    (threading.Event) corta entre bloques; lo ya insertado queda guardado.
+    """
+    base = os.path.splitext(archivo)[0]
+    resumen = {
+        "leidas": 0,
+        "importadas": 0,
+        "rechazadas": 0,
+        "segundos": 0.0,
+        "filas_por_segundo": 0.0,
+        "cancelado": False,
+        "archivo_rechazos": None,
+    }
+    inicio = time.perf_counter()
+    salida = escritor = None
+
+    def rechazar(encabezados, rechazadas):
+        nonlocal salida, escritor
+        if not rechazadas:
+            return
+        if escritor is None:
+            resumen["archivo_rechazos"] = f"{base}_rechazos.csv"
+            salida = open(resumen["archivo_rechazos"], "w", newline="", encoding="utf-8-sig")
+            escritor = csv.writer(salida, delimiter=";")
+            escritor.writerow(encabezados + ["motivo"])
+        escritor.writerows(
+            [fila.get(col, "") for col in encabezados] + [motivo] for fila, motivo in rechazadas
+        )
+        resumen["rechazadas"] += len(rechazadas)
+
+    f, encabezados, filas = abrir_csv(archivo)
+    try:
+        faltan = [
+            col
+            for col, (_, obligatoria) in reglas.items()
+            if obligatoria and col not in encabezados
+        ]
+        if faltan:
+            raise ValueError(f"Faltan columnas en el archivo: {', '.join(faltan)}")
+
+        while True:
+            if detener is not None and detener.is_set():
+                resumen["cancelado"] = True
+                break
+            bloque = list(islice(filas, lote))
+            if not bloque:
+                break
+            resumen["leidas"] += len(bloque)
+
+            validas, rechazadas = validators.validar_bloque(bloque, reglas)
+            nuevas, originales, repetidas = preparar(validas)
+            rechazadas.extend(repetidas)
+            if nuevas:
+                resultado = insertar(nuevas)
+                resumen["importadas"] += resultado.procesadas
+                rechazadas.extend((originales[i], error) for i, _, error in resultado.errores)
+            rechazar(encabezados, rechazadas)
+
+            resumen["segundos"] = time.perf_counter() - inicio
+            resumen["filas_por_segundo"] = resumen["leidas"] / resumen["segundos"]
+            if progreso is not None:
+                progreso(dict(resumen))
+    finally:
+        f.close()
+        if salida is not None:
+            salida.close()
+
+    resumen["segundos"] = time.perf_counter() - inicio
+    if resumen["segundos"]:
+        resumen["filas_por_segundo"] = resumen["leidas"] / resumen["segundos"]
+    return resumen
+
+
+def importar_pacientes(queries, archivo, progreso=None, detener=None, lote=DB_BULK_CHUNK):
+    """Importar pacientes. Columnas: dni, apellido, nombre y opcionales
+    telefono, correo_electronico, fecha_de_nacimiento, direccion y
+    obra_social (nombre o id; vacía o "Particular" = sin obra social).
+    """
+    # Una sola consulta: cada DNI se descarta con una búsqueda en el conjunto
+    existentes = queries.obtener_dnis()
+    obras = {}
+    for id_obra_social, nombre in queries.obtener_obras_sociales():
+        obras[normalizar(nombre)] = id_obra_social
+        obras[str(id_obra_social)] = id_obra_social
+
+    def preparar(validas):
+        nuevas, originales, rechazadas = [], [], []
+        for fila, v in validas:
+            if v["dni"] in existentes:
+                rechazadas.append((fila, "DNI ya registrado"))
+                continue
+            id_obra_social = None
+            obra = normalizar(v["obra_social"] or "")
+            if obra and obra != "particular":
+                id_obra_social = obras.get(obra)
+                if id_obra_social is None:
+                    rechazadas.append((fila, f"Obra social desconocida: {v['obra_social']}"))
+                    continue
+            existentes.add(v["dni"])
+            nuevas.append(
+                (
+                    v["dni"],
+                    v["apellido"],
+                    v["nombre"],
+                    v["telefono"],
+                    v["correo_electronico"],
+                    v["fecha_de_nacimiento"],
+                    v["direccion"],
+                    id_obra_social,
+                )
+            )
+            originales.append(fila)
+        return nuevas, originales, rechazadas
+
+    return importar(
+        archivo,
+        validators.PACIENTE,
+        preparar,
+        lambda filas: queries.insertar_pacientes(filas, chunk_size=lote),
+        progreso,
+        detener,
+        lote,
+    )
+
+
+def importar_obras_sociales(
+    queries, archivo, progreso=None, detener=None, lote=DB_BULK_CHUNK
+):
+    """Importar obras sociales. Columnas: nombre y opcionales direccion,
+    telefono y correo_electronico. Se descartan los nombres ya cargados.
+    """
+    existentes = {normalizar(nombre) for _, nombre in queries.obtener_obras_sociales()}
+
+    def preparar(validas):
+        nuevas, originales, rechazadas = [], [], []
+        for fila, v in validas:
+            clave = normalizar(v["nombre"])
+            if clave in existentes:
+                rechazadas.append((fila, "Obra social ya registrada"))
+                continue
+            existentes.add(clave)
+            nuevas.append((v["nombre"], v["direccion"], v["telefono"], v["correo_electronico"]))
+            originales.append(fila)
+        return nuevas, originales, rechazadas
+
+    return importar(
+        archivo,
+        validators.OBRA_SOCIAL,
+        preparar,
+        lambda filas: queries.insertar_obras_sociales(filas, chunk_size=lote),
+        progreso,
+        detener,
+        lote,
+    )
+
+
+def dialogo_importar(parent, executor, queries, on_terminar=None):
+    """Elegir tipo y archivo, e importar en segundo plano con avance"""
+    ventana = tk.Toplevel(parent)
+    ventana.title("Importar desde CSV")
+    ventana.geometry("420x200")
+    ventana.transient(parent)
+    ventana.grab_set()
+
+    tipos = {"Pacientes": importar_pacientes, "Obras Sociales": importar_obras_sociales}
+    ttk.Label(ventana, text="Importar:").grid(row=0, column=0, padx=5, pady=10, sticky="e")
+    tipo_combo = ttk.Combobox(ventana, values=list(tipos), state="readonly", width=20)
+    tipo_combo.grid(row=0, column=1, padx=5, pady=10, sticky="w")
+    tipo_combo.set("Pacientes")
+
+    estado = ttk.Label(ventana, text="Elija un archivo CSV con encabezados")
+    estado.grid(row=1, column=0, columnspan=2, padx=10, pady=10)
+    detener = threading.Event()
+
+    def mostrar_avance(resumen):
+        estado.configure(
+            text=f"{resumen['leidas']} leídas · {resumen['importadas']} importadas · "
+            f"{resumen['rechazadas']} rechazadas ({resumen['filas_por_segundo']:.0f} filas/s)"
+        )
+
+    def terminar(resumen):
+        mostrar_avance(resumen)
+        boton_detener.configure(state="disabled")
+        mensaje = (
+            f"{resumen['importadas']} filas importadas y {resumen['rechazadas']} "
+            f"rechazadas en {resumen['segundos']:.1f} s "
+            f"({resumen['filas_por_segundo']:.0f} filas/s)."
+        )
+        if resumen["cancelado"]:
+            mensaje = "Importación detenida. " + mensaje
+        if resumen["archivo_rechazos"]:
+            mensaje += f"\nRechazos: {resumen['archivo_rechazos']}"
+        messagebox.showinfo("Importar", mensaje, parent=ventana)
+        if on_terminar:
+            on_terminar()
+
+    def fallar(e):
+        boton_elegir.configure(state="normal")
+        boton_detener.configure(state="disabled")
+        messagebox.showerror("Error", f"Error al importar: {str(e)}", parent=ventana)
+
+    def elegir():
+        archivo = filedialog.askopenfilename(
+            parent=ventana, title="Importar", filetypes=(("CSV", "*.csv"), ("Todos", "*.*"))
+        )
+        if not archivo:
+            return
+        detener.clear()
+        boton_elegir.configure(state="disabled")
+        boton_detener.configure(state="normal")
+        estado.configure(text="Importando...")
+        executor.submit(
+            "importar",
+            tipos[tipo_combo.get()],
+            queries,
+            archivo,
+            detener=detener,
+            on_success=terminar,
+            on_error=fallar,
+            on_progress=mostrar_avance,
+        )
+
+    botones = ttk.Frame(ventana)
+    botones.grid(row=2, column=0, columnspan=2, pady=10)
+    boton_elegir = ttk.Button(botones, text="Elegir Archivo...", command=elegir)
+    boton_elegir.pack(side="left", padx=5)
+    boton_detener = ttk.Button(botones, text="Detener", command=detener.set, state="disabled")
+    boton_detener.pack(side="left", padx=5)
+    ttk.Button(botones, text="Cerrar", command=ventana.destroy).pack(side="left", padx=5)
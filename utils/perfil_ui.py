@@ -0,0 +1,149 @@
+# utils/perfil_ui.py
+import json
+import threading
+import time
+import tkinter as tk
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from tkinter import ttk, messagebox, filedialog
+
+try:
+    from config.config import UI_PERFIL_JSON
+except ImportError:
+    UI_PERFIL_JSON = "rendimiento_ui.json"
+
+FASES = ("fetch", "transform", "render")
+MUESTRAS = 200  # Cargas guardadas por vista para los percentiles
+
+
+class Medicion:
+    """Tiempos de una carga de una vista, separada en fases.
+
+    fetch es la consulta (corre en el hilo del executor), transform el
+    formateo de las filas en Python y render los tree.insert/delete.
+    """
+
+    def __init__(self, vista):
+        self.vista = vista
+        self.fases = dict.fromkeys(FASES, 0.0)
+
+    @contextmanager
+    def fase(self, nombre):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.fases[nombre] += time.perf_counter() - inicio
+
+    def terminar(self, filas):
+        perfil_ui.registrar(self.vista, filas, self.fases)
+
+
+class PerfilUI:
+    """Últimas cargas de cada vista, para el overlay de debug y el JSON"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cargas = {}  # vista -> deque de (momento, filas, {fase: segundos})
+
+    def registrar(self, vista, filas, fases):
+        with self._lock:
+            self._cargas.setdefault(vista, deque(maxlen=MUESTRAS)).append(
+                (datetime.now().isoformat(timespec="seconds"), filas, dict(fases))
+            )
+
+    def stats(self):
+        """{vista: cargas, filas de la última, p95 del total y, por fase,
+        última/p50/p95 en ms}"""
+        with self._lock:
+            copia = {vista: list(cargas) for vista, cargas in self._cargas.items()}
+        resultado = {}
+        for vista, cargas in copia.items():
+            totales = sorted(sum(fases.values()) * 1000 for _, _, fases in cargas)
+            datos = {
+                "cargas": len(cargas),
+                "filas_ultima": cargas[-1][1],
+                "total_p95_ms": totales[min(len(totales) - 1, len(totales) * 95 // 100)],
+            }
+            for fase in FASES:
+                tiempos = sorted(fases[fase] * 1000 for _, _, fases in cargas)
+                datos[fase] = {
+                    "ultima_ms": cargas[-1][2][fase] * 1000,
+                    "p50_ms": tiempos[len(tiempos) // 2],
+                    "p95_ms": tiempos[min(len(tiempos) - 1, len(tiempos) * 95 // 100)],
+                }
+            resultado[vista] = datos
+        return resultado
+
+    def exportar_json(self, archivo=UI_PERFIL_JSON):
+        """Guardar resumen y cargas individuales, para comparar entre versiones"""
+        with self._lock:
+            cargas = [
+                {
+                    "vista": vista,
+                    "momento": momento,
+                    "filas": filas,
+                    **{f"{fase}_ms": round(fases[fase] * 1000, 3) for fase in FASES},
+                }
+                for vista, lista in self._cargas.items()
+                for momento, filas, fases in lista
+            ]
+        datos = {
+            "generado": datetime.now().isoformat(timespec="seconds"),
+            "vistas": self.stats(),
+            "cargas": cargas,
+        }
+        with open(archivo, "w", encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False, indent=2)
+        return archivo
+
+
+perfil_ui = PerfilUI()
+
+
+class OverlayRendimiento:
+    """Ventanita siempre visible con los tiempos por fase de cada vista (modo debug)"""
+
+    def __init__(self, root, intervalo_ms=1000):
+        self.intervalo_ms = intervalo_ms
+        self.ventana = tk.Toplevel(root)
+        self.ventana.title("Rendimiento de la interfaz")
+        self.ventana.geometry("560x220")
+        self.ventana.attributes("-topmost", True)
+
+        columns = ("Vista", "Filas") + tuple(f"{fase} ms" for fase in FASES) + ("p95 total",)
+        self.tree = ttk.Treeview(self.ventana, columns=columns, show="headings", height=6)
+        for col in columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=130 if col == "Vista" else 70, anchor="e")
+        self.tree.column("Vista", anchor="w")
+        self.tree.pack(fill="both", expand=True, padx=5, pady=5)
+
+        ttk.Button(self.ventana, text="Guardar JSON", command=self.guardar).pack(pady=5)
+        self.refrescar()
+
+    def refrescar(self):
+        if not self.ventana.winfo_exists():
+            return
+        self.tree.delete(*self.tree.get_children())
+        for vista, datos in sorted(perfil_ui.stats().items()):
+            self.tree.insert(
+                "",
+                "end",
+                values=(vista, datos["filas_ultima"])
+                + tuple(f"{datos[fase]['ultima_ms']:.1f}" for fase in FASES)
+                + (f"{datos['total_p95_ms']:.1f}",),
+            )
+        self.ventana.after(self.intervalo_ms, self.refrescar)
+
+    def guardar(self):
+        archivo = filedialog.asksaveasfilename(
+            parent=self.ventana,
+            initialfile=UI_PERFIL_JSON,
+            defaultextension=".json",
+            filetypes=(("JSON", "*.json"),),
+        )
+        if archivo:
+            perfil_ui.exportar_json(archivo)
+            messagebox.showinfo("Rendimiento", f"Guardado en {archivo}", parent=self.ventana)
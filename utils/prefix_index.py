@@ -0,0 +1,121 @@
+# utils/prefix_index.py
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+
+
+def normalizar(texto):
+    """Minúsculas y sin acentos, para comparar como lo hace la collation de MySQL"""
+    texto = unicodedata.normalize("NFKD", str(texto or "").lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+class PrefixIndex:
+    """Índice en memoria para buscar por prefijo (apellido, nombre, DNI...).
+
+    Guarda una lista ordenada de (clave, id) y resuelve cada búsqueda con
+    bisect: encontrar el primer candidato es O(log n) y se recorre solo lo
+    que hace falta para juntar limit resultados. Cada elemento se indexa por
+    cada palabra de sus textos, así "per" encuentra a "García Pérez".
+    Altas, bajas y cambios se aplican de a uno, sin reconstruir todo. Con
+    ttl, el índice deja de estar listo a los ttl segundos de construido, por
+    si otro puesto cargó o modificó elementos.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._claves = []  # [(clave, id)] ordenada
+        self._elementos = {}  # id -> (etiqueta, claves)
+        self._listo = False
+        self._vence = None
+
+    @property
+    def listo(self):
+        return self._listo and (self._vence is None or time.monotonic() < self._vence)
+
+    def cargar(self, elementos):
+        """Construir el índice completo con elementos (id, etiqueta, textos)"""
+        claves = []
+        indexados = {}
+        for id_, etiqueta, textos in elementos:
+            propias = self._claves_de(textos)
+            indexados[id_] = (etiqueta, propias)
+            claves.extend((clave, id_) for clave in propias)
+        claves.sort()
+        with self._lock:
+            self._claves = claves
+            self._elementos = indexados
+            self._listo = True
+            self._vence = None if self.ttl is None else time.monotonic() + self.ttl
+
+    def invalidar(self):
+        """Marcar el índice para reconstruirlo en el próximo uso"""
+        self._listo = False
+
+    def agregar(self, id_, etiqueta, textos):
+        """Agregar o reemplazar un elemento"""
+        with self._lock:
+            self._quitar(id_)
+            propias = self._claves_de(textos)
+            self._elementos[id_] = (etiqueta, propias)
+            for clave in propias:
+                insort(self._claves, (clave, id_))
+
+    def quitar(self, id_):
+        with self._lock:
+            self._quitar(id_)
+
+    def etiqueta(self, id_):
+        with self._lock:
+            elemento = self._elementos.get(id_)
+        return elemento[0] if elemento else None
+
+    def buscar(self, texto, limit=20, excluir=None):
+        """Elementos cuyas palabras empiezan con las del texto: [(id, etiqueta)]
+
+        La primera palabra se busca en el índice y las demás filtran esos
+        candidatos. excluir es un conjunto de ids a omitir.
+        """
+        palabras = normalizar(texto).split()
+        if not palabras:
+            return []
+        primera, resto = palabras[0], palabras[1:]
+
+        resultados = []
+        vistos = set()
+        with self._lock:
+            i = bisect_left(self._claves, (primera,))
+            while i < len(self._claves) and len(resultados) < limit:
+                clave, id_ = self._claves[i]
+                i += 1
+                if not clave.startswith(primera):
+                    break
+                if id_ in vistos or (excluir and id_ in excluir):
+                    continue
+                vistos.add(id_)
+                etiqueta, propias = self._elementos[id_]
+                if all(any(c.startswith(p) for c in propias) for p in resto):
+                    resultados.append((id_, etiqueta))
+        return resultados
+
+    def __len__(self):
+        return len(self._elementos)
+
+    # -----------------------------------------------------
+    def _quitar(self, id_):
+        elemento = self._elementos.pop(id_, None)
+        if elemento is None:
+            return
+        for clave in elemento[1]:
+            i = bisect_left(self._claves, (clave, id_))
+            if i < len(self._claves) and self._claves[i] == (clave, id_):
+                del self._claves[i]
+
+    @staticmethod
+    def _claves_de(textos):
+        claves = set()
+        for texto in textos:
+            claves.update(normalizar(texto).replace(",", " ").split())
+        return sorted(claves)
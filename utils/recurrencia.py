@@ -0,0 +1,44 @@
+# utils/recurrencia.py
+import calendar
+from datetime import date, timedelta
+
+FRECUENCIAS = ("semanal", "mensual")
+MAX_OCURRENCIAS = 104  # Dos años de turnos semanales
+
+
+def sumar_meses(fecha, meses):
+    """Mismo día del mes, o el último día si ese mes es más corto (31 -> 30)"""
+    total = fecha.month - 1 + meses
+    anio, mes = fecha.year + total // 12, total % 12 + 1
+    dia = min(fecha.day, calendar.monthrange(anio, mes)[1])
+    return date(anio, mes, dia)
+
+
+def generar_fechas(inicio, frecuencia="semanal", intervalo=1, hasta=None, cantidad=None):
+    """Fechas de una serie tipo RRULE: cada `intervalo` semanas o meses desde inicio.
+
+    La serie termina en la fecha hasta (inclusive) o al llegar a cantidad
+    ocurrencias, lo que pase primero; hace falta al menos uno de los dos.
+    Nunca se generan más de MAX_OCURRENCIAS.
+    """
+    if frecuencia not in FRECUENCIAS:
+        raise ValueError(f"Frecuencia inválida: {frecuencia}")
+    if intervalo < 1:
+        raise ValueError("El intervalo debe ser al menos 1")
+    if hasta is None and cantidad is None:
+        raise ValueError("Indique una fecha de fin o una cantidad de turnos")
+
+    limite = min(cantidad or MAX_OCURRENCIAS, MAX_OCURRENCIAS)
+    fechas = []
+    n = 0
+    while len(fechas) < limite:
+        if frecuencia == "semanal":
+            fecha = inicio + timedelta(weeks=intervalo * n)
+        else:
+            # Siempre desde el inicio, para no arrastrar el recorte de fin de mes
+            fecha = sumar_meses(inicio, intervalo * n)
+        if hasta is not None and fecha > hasta:
+            break
+        fechas.append(fecha)
+        n += 1
+    return fechas
@@ -0,0 +1,109 @@
+# utils/validators.py
+import re
+from datetime import date, datetime
+
+RE_DNI = re.compile(r"\d{7,8}")
+RE_EMAIL = re.compile(r"[^@\s]+@[^@\s]+\.[A-Za-z]{2,}")
+RE_TELEFONO = re.compile(r"[\d\s()+\-]{6,30}")
+FORMATOS_FECHA = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y")
+
+
+def dni(valor):
+    """DNI de 7 u 8 dígitos; se aceptan puntos y espacios (20.123.456)"""
+    limpio = valor.replace(".", "").replace(" ", "")
+    if not RE_DNI.fullmatch(limpio):
+        raise ValueError(f"DNI inválido: {valor}")
+    return limpio
+
+
+def email(valor):
+    if len(valor) > 100 or not RE_EMAIL.fullmatch(valor):
+        raise ValueError(f"Email inválido: {valor}")
+    return valor.lower()
+
+
+def telefono(valor):
+    if not RE_TELEFONO.fullmatch(valor):
+        raise ValueError(f"Teléfono inválido: {valor}")
+    return valor
+
+
+def fecha_nacimiento(valor):
+    """Fecha en YYYY-MM-DD o DD/MM/YYYY, entre 1900 y hoy"""
+    for formato in FORMATOS_FECHA:
+        try:
+            fecha = datetime.strptime(valor, formato).date()
+            break
+        except ValueError:
+            continue
+    else:
+        raise ValueError(f"Fecha inválida: {valor}")
+    if not date(1900, 1, 1) <= fecha <= date.today():
+        raise ValueError(f"Fecha fuera de rango: {valor}")
+    return fecha
+
+
+def texto(maximo):
+    """Validador de texto libre de hasta maximo caracteres (el largo de la columna)"""
+
+    def validar(valor):
+        if len(valor) > maximo:
+            raise ValueError(f"Supera los {maximo} caracteres: {valor[:20]}...")
+        return valor
+
+    return validar
+
+
+def _aplicar(validador, obligatoria, valor):
+    if not valor:
+        return None, "Falta un dato obligatorio" if obligatoria else None
+    try:
+        return validador(valor), None
+    except ValueError as e:
+        return None, str(e)
+
+
+def validar_bloque(filas, reglas):
+    """Validar un bloque de filas (dicts de texto) columna por columna.
+
+    reglas = {columna: (validador, obligatoria)}. Cada validador se aplica
+    de una vez a toda la columna del bloque; un validador recibe el texto
+    sin espacios alrededor y devuelve el valor normalizado o lanza
+    ValueError. Devuelve (válidas, rechazadas): las válidas como (fila,
+    dict de valores normalizados) y las rechazadas como (fila, motivo).
+    """
+    resultados = {}
+    for columna, (validador, obligatoria) in reglas.items():
+        valores = [(fila.get(columna) or "").strip() for fila in filas]
+        resultados[columna] = [_aplicar(validador, obligatoria, v) for v in valores]
+
+    validas = []
+    rechazadas = []
+    columnas = list(resultados)
+    for i, fila in enumerate(filas):
+        celdas = [resultados[columna][i] for columna in columnas]
+        errores = [f"{col}: {error}" for col, (_, error) in zip(columnas, celdas) if error]
+        if errores:
+            rechazadas.append((fila, "; ".join(errores)))
+        else:
+            validas.append((fila, {col: valor for col, (valor, _) in zip(columnas, celdas)}))
+    return validas, rechazadas
+
+
+PACIENTE = {
+    "dni": (dni, True),
+    "apellido": (texto(100), True),
+    "nombre": (texto(100), True),
+    "telefono": (telefono, False),
+    "correo_electronico": (email, False),
+    "fecha_de_nacimiento": (fecha_nacimiento, False),
+    "direccion": (texto(200), False),
+    "obra_social": (texto(100), False),
+}
+
+OBRA_SOCIAL = {
+    "nombre": (texto(100), True),
+    "direccion": (texto(200), False),
+    "telefono": (telefono, False),
+    "correo_electronico": (email, False),
+}
@@ -0,0 +1,222 @@
+# utils/virtual_tree.py
+from collections import deque
+
+from utils.perfil_ui import Medicion
+
+
+class VirtualTreeview:
+    """Treeview paginado que mantiene en pantalla solo una ventana de filas.
+
+    Envuelve un ttk.Treeview ya configurado. Las filas se piden por páginas
+    con paginación keyset: fetch(*args, limit=, after=, before=) devuelve
+    filas ordenadas y key_func(fila) da la clave de orden de una fila. Al
+    acercarse al borde de la ventana se trae la página siguiente (o la
+    anterior) y se descarta la del extremo opuesto, así nunca hay más de
+    max_pages * page_size filas insertadas.
+
+    Cada carga se mide por fases (consulta, formateo e inserción en el
+    Treeview) con utils.perfil_ui, bajo el nombre key.
+    """
+
+    def __init__(
+        self,
+        tree,
+        key_func,
+        executor,
+        key,
+        format_row=None,
+        scrollbar=None,
+        page_size=200,
+        max_pages=3,
+        prefetch=50,
+        on_error=None,
+    ):
+        self.tree = tree
+        self.key_func = key_func
+        self.executor = executor
+        self.key = key
+        self.format_row = format_row or (lambda fila: fila)
+        self.scrollbar = scrollbar
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.prefetch = prefetch
+        self.on_error = on_error
+
+        self._fetch = None
+        self._args = ()
+        self._pages = deque()  # Cada página: lista de (item_id, fila)
+        self._generation = 0
+        self._loading = False
+        self._at_start = True
+        self._at_end = True
+
+        self.tree.configure(yscrollcommand=self._on_scroll)
+
+    # -----------------------------------------------------
+    def load(self, fetch, *args, on_loaded=None):
+        """Mostrar desde el principio el resultado de fetch(*args)"""
+        self._fetch = fetch
+        self._args = args
+        self._generation += 1
+        generation = self._generation
+        self._loading = True
+        medicion = Medicion(self.key)
+
+        def mostrar(filas):
+            if generation != self._generation:
+                return
+            with medicion.fase("render"):
+                self.clear()
+            self._append(filas, medicion)
+            medicion.terminar(len(filas))
+            self._at_start = True
+            self._at_end = len(filas) < self.page_size
+            self._loading = False
+            if on_loaded:
+                on_loaded(filas)
+
+        self.executor.submit(
+            self.key,
+            self._medir,
+            medicion,
+            fetch,
+            *args,
+            limit=self.page_size,
+            on_success=mostrar,
+            on_error=lambda e: self._failed(generation, e),
+        )
+
+    def show(self, filas):
+        """Mostrar una lista ya completa, sin paginar (p. ej. un resultado filtrado)"""
+        self._generation += 1
+        self._fetch = None
+        self.executor.cancel(self.key)
+        medicion = Medicion(self.key)
+        with medicion.fase("render"):
+            self.clear()
+        self._append(filas, medicion)
+        medicion.terminar(len(filas))
+        self._loading = False
+        self._at_start = self._at_end = True
+
+    def clear(self):
+        self.tree.delete(*self.tree.get_children())
+        self._pages.clear()
+
+    @property
+    def fuente(self):
+        """(fetch, args) del listado actual; fetch es None si se usó show()"""
+        return self._fetch, self._args
+
+    def rows(self):
+        """Filas actualmente en memoria, en orden de pantalla"""
+        return [fila for pagina in self._pages for _, fila in pagina]
+
+    # -----------------------------------------------------
+    @staticmethod
+    def _medir(medicion, fetch, *args, **kwargs):
+        """fetch(*args, **kwargs) midiendo la fase de consulta (en el executor)"""
+        with medicion.fase("fetch"):
+            return fetch(*args, **kwargs)
+
+    def _failed(self, generation, e):
+        if generation != self._generation:
+            return
+        self._loading = False
+        if self.on_error:
+            self.on_error(e)
+        else:
+            print(f"❌ Error al cargar página ({self.key}): {e}")
+
+    def _on_scroll(self, first, last):
+        if self.scrollbar is not None:
+            self.scrollbar.set(first, last)
+
+        if self._loading or self._fetch is None or not self._pages:
+            return
+
+        total = sum(len(pagina) for pagina in self._pages)
+        margen = self.prefetch / total if total else 1.0
+        if not self._at_end and float(last) >= 1.0 - margen:
+            self._load_page(after=self.key_func(self._pages[-1][-1][1]))
+        elif not self._at_start and float(first) <= margen:
+            self._load_page(before=self.key_func(self._pages[0][0][1]))
+
+    def _load_page(self, after=None, before=None):
+        generation = self._generation
+        self._loading = True
+        medicion = Medicion(f"{self.key} (página)")
+
+        def recibir(filas):
+            if generation != self._generation:
+                return
+            self._loading = False
+            if after is not None:
+                self._at_end = len(filas) < self.page_size
+                if filas:
+                    self._append(filas, medicion)
+                    if len(self._pages) > self.max_pages:
+                        with medicion.fase("render"):
+                            self._drop(primera=True)
+            else:
+                self._at_start = len(filas) < self.page_size
+                if filas:
+                    self._prepend(filas, medicion)
+                    if len(self._pages) > self.max_pages:
+                        with medicion.fase("render"):
+                            self._drop(primera=False)
+            medicion.terminar(len(filas))
+
+        self.executor.submit(
+            self.key,
+            self._medir,
+            medicion,
+            self._fetch,
+            *self._args,
+            limit=self.page_size,
+            after=after,
+            before=before,
+            on_success=recibir,
+            on_error=lambda e: self._failed(generation, e),
+        )
+
+    def _append(self, filas, medicion):
+        with medicion.fase("transform"):
+            valores = [self.format_row(fila) for fila in filas]
+        with medicion.fase("render"):
+            pagina = [
+                (self.tree.insert("", "end", values=v), fila) for v, fila in zip(valores, filas)
+            ]
+        self._pages.append(pagina)
+
+    def _prepend(self, filas, medicion):
+        with medicion.fase("transform"):
+            valores = [self.format_row(fila) for fila in filas]
+        with medicion.fase("render"):
+            tope = self._top_index()
+            pagina = [
+                (self.tree.insert("", i, values=v), fila)
+                for i, (v, fila) in enumerate(zip(valores, filas))
+            ]
+            self._pages.appendleft(pagina)
+            # Mantener a la vista las mismas filas que antes de insertar arriba
+            self._move_to(tope + len(pagina))
+
+    def _drop(self, primera):
+        tope = self._top_index()
+        pagina = self._pages.popleft() if primera else self._pages.pop()
+        self.tree.delete(*[item for item, _ in pagina])
+        if primera:
+            self._at_start = False
+            self._move_to(tope - len(pagina))
+        else:
+            self._at_end = False
+
+    def _top_index(self):
+        total = len(self.tree.get_children())
+        return round(float(self.tree.yview()[0]) * total)
+
+    def _move_to(self, indice):
+        total = len(self.tree.get_children())
+        if total:
+            self.tree.yview_moveto(max(indice, 0) / total)